@@ -0,0 +1,136 @@
+"""Offline benchmark of the assistant against local OpenAI/Anthropic stand-ins."""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from bench.mock_api import Latency, MockAPIServer, MockProfile
+from bench.runner import Benchmark, default_workload, find_regressions, load_workload
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Replay a workload through the real providers pointed at local mock "
+            "APIs and report latency and throughput as JSON. Latencies are "
+            "MEAN, MEAN:JITTER or DIST:MEAN:JITTER in seconds "
+            "(DIST: fixed, normal, lognormal, uniform)."
+        )
+    )
+    parser.add_argument("--workload", type=Path, help="JSONL workload (default: built-in)")
+    parser.add_argument("--llm", choices=("openai", "anthropic"), default="openai")
+    parser.add_argument("--sync", action="store_true", help="benchmark AIAssistant on threads")
+    parser.add_argument(
+        "--concurrency", default="1,4,16", help="comma-separated concurrency levels"
+    )
+    parser.add_argument("--turns", type=int, default=40, help="turns per concurrency level")
+    parser.add_argument("--deadline", type=float, default=0.0, help="turn deadline (0: none)")
+    parser.add_argument("--llm-first-token", type=Latency.parse, default=Latency(0.35, 0.1, "lognormal"))
+    parser.add_argument("--llm-token-interval", type=Latency.parse, default=Latency(0.02, 0.005))
+    parser.add_argument("--llm-reply-words", type=int, default=40)
+    parser.add_argument("--stt-latency", type=Latency.parse, default=Latency(0.4, 0.1, "lognormal"))
+    parser.add_argument("--tts-first-byte", type=Latency.parse, default=Latency(0.2, 0.05, "lognormal"))
+    parser.add_argument(
+        "--tts-realtime-factor", type=float, default=8.0,
+        help="seconds of audio the TTS mock streams per second",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failed requests")
+    parser.add_argument("--seed", type=int, help="seed for reproducible latencies")
+    parser.add_argument("--output", type=Path, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="earlier report to check for regressions")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="regression threshold as a fraction of the baseline",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark and print or save its report."""
+    args = parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+
+    profile = MockProfile(
+        llm_first_token=args.llm_first_token,
+        llm_token_interval=args.llm_token_interval,
+        llm_reply_words=args.llm_reply_words,
+        stt_latency=args.stt_latency,
+        tts_first_byte=args.tts_first_byte,
+        tts_realtime_factor=args.tts_realtime_factor,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    workload = load_workload(args.workload) if args.workload else default_workload()
+
+    mock = MockAPIServer(profile)
+    mock.start()
+    try:
+        benchmark = Benchmark(
+            mock,
+            workload,
+            llm_provider=args.llm,
+            async_mode=not args.sync,
+            turns_per_level=args.turns,
+            turn_deadline=args.deadline,
+            pool_size=max(levels) * 2,
+        )
+        results = benchmark.run(levels)
+    finally:
+        mock.stop()
+
+    report = {
+        "config": {
+            "llm": args.llm,
+            "mode": "sync" if args.sync else "async",
+            "turns_per_level": args.turns,
+            "deadline_s": args.deadline,
+            "workload": str(args.workload or "built-in"),
+            "mock": profile.describe(),
+        },
+        "levels": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    for level in results:
+        print(
+            f"concurrency {level['concurrency']:>3}: {level['turns_per_sec']} turns/s, "
+            f"e2e p50 {level['e2e_p50_s']}s p99 {level['e2e_p99_s']}s, "
+            f"first audio p50 {level['first_audio_p50_s']}s p99 {level['first_audio_p99_s']}s, "
+            f"{level['failed']} failed",
+            file=sys.stderr,
+        )
+
+    # A level without a single successful turn measured nothing
+    broken = [level for level in results if level["turns"] and level["failed"] == level["turns"]]
+    for level in broken:
+        print(f"FAILED concurrency {level['concurrency']}: every turn failed", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = find_regressions(baseline["levels"], results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+    if broken or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
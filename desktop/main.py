@@ -1,19 +1,46 @@
 """Main entry point for desktop AI assistant application."""
 
+import argparse
+import asyncio
 import logging
 import sys
+import threading
 import os
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from config import Config
-from ai.stt import create_stt_provider
-from ai.llm import create_llm_provider
-from ai.tts import create_tts_provider
-from assistant import AIAssistant
-from grpc_client.client import GRPCClient
+from ai.stt import STT_SAMPLE_RATE, create_async_stt_provider, create_stt_provider
+from ai.llm import create_async_llm_provider, create_llm_provider
+from ai.tts import create_async_tts_provider, create_tts_provider
+from ai.context import ContextWindow, context_budget_for_model
+from ai.deadline import Deadline
+from ai.hedging import AsyncHedgedLLM, HedgedLLM
+from ai.llm_cache import AsyncCachedLLM, CachedLLM, ResponseCache
+from ai.scheduler import RateLimits, configure_scheduler_pool, get_scheduler_pool, scheduled
+from ai.speculation import Speculator
+from ai.transport import configure_client_pool
+from ai.tts_cache import AsyncCachedTTS, CachedTTS, TTSCache, load_phrase_bank
+from assistant import AUDIO_ERROR_MESSAGE, TEXT_ERROR_MESSAGE, TIMEOUT_MESSAGE, AIAssistant
+from async_assistant import AsyncAIAssistant
+from audio.formats import OPUS, PCM
+from audio.reassembly import ReassemblyBuffer
+from audio.vad import VoiceActivityDetector
+from conversation import ConversationStore, session_id_for_packet
+from metrics import MetricsServer, get_metrics
+from startup import in_profiled_process, mark_ready, profile_startup, report_phases
+
+# Canned replies of failed turns; synthesize_error renders them as whole clips
+ERROR_MESSAGES = [AUDIO_ERROR_MESSAGE, TEXT_ERROR_MESSAGE, TIMEOUT_MESSAGE]
+
+if TYPE_CHECKING:
+    # grpc and the generated protobuf code load on first connect
+    from grpc_client.client import GRPCClient
+    from grpc_client.aio_client import AsyncGRPCClient
 
 # Configure logging
 logging.basicConfig(
@@ -35,7 +62,10 @@ class DesktopApp:
         """Initialize desktop app."""
         self.config = config
         self.assistant: Optional[AIAssistant] = None
-        self.grpc_client: Optional[GRPCClient] = None
+        self.grpc_client: Optional["GRPCClient"] = None
+        self.async_clients: List["AsyncGRPCClient"] = []
+        self.reassembly: Optional[ReassemblyBuffer] = None
+        self.metrics_server: Optional[MetricsServer] = None
 
     def initialize(self):
         """Initialize all components."""
@@ -52,92 +82,621 @@ class DesktopApp:
         # Initialize AI providers
         logger.info(f"Initializing AI providers: {self.config.ai_provider}")
 
-        try:
-            stt = create_stt_provider(
-                self.config.stt_provider,
-                self.config.openai_api_key
-            )
-
-            llm = create_llm_provider(
-                self.config.ai_provider,
-                self.config.openai_api_key or self.config.anthropic_api_key,
-                self.config.ai_model
-            )
+        self.client_pool = configure_client_pool(
+            max_connections=self.config.http_pool_size,
+            keepalive_expiry=self.config.http_keepalive_expiry,
+            http2=self.config.http2,
+            idle_timeout=self.config.client_idle_timeout,
+        )
+        configure_scheduler_pool(
+            limits={
+                "openai": RateLimits(
+                    self.config.openai_requests_per_minute, self.config.openai_tokens_per_minute
+                ),
+                "anthropic": RateLimits(
+                    self.config.anthropic_requests_per_minute, self.config.anthropic_tokens_per_minute
+                ),
+            },
+            max_concurrency=self.config.provider_max_concurrency,
+            min_concurrency=self.config.provider_min_concurrency,
+            latency_target=self.config.provider_latency_target,
+        )
 
-            tts = create_tts_provider(
-                self.config.tts_provider,
-                self.config.openai_api_key,
-                self.config.openai_tts_model,
-                self.config.openai_tts_voice
-            )
-
-            self.assistant = AIAssistant(stt, llm, tts)
+        try:
+            if self.config.async_mode:
+                self.assistant = self._create_async_assistant()
+            else:
+                self.assistant = self._create_assistant()
 
         except Exception as e:
             logger.error(f"Failed to initialize AI providers: {e}")
             sys.exit(1)
 
-        # Initialize gRPC client
-        logger.info(f"Connecting to backend at {self.config.backend_url}")
+        self.reassembly = ReassemblyBuffer(
+            max_session_bytes=self.config.reassembly_session_mb * 1024 * 1024,
+            max_total_bytes=self.config.reassembly_total_mb * 1024 * 1024,
+            stale_after=self.config.reassembly_timeout,
+            on_expire=self.assistant.discard_utterance,
+        )
+
+        self._start_metrics_server()
+
+        # Initialize gRPC client (async mode opens one client per user in run_async)
+        if not self.config.async_mode:
+            logger.info(f"Backend at {self.config.backend_url}")
+
+            try:
+                from grpc_client.client import GRPCClient
+
+                self.grpc_client = GRPCClient(
+                    self.config.backend_url,
+                    self.config.user_id,
+                    self.config.use_tls,
+                    self.config.chunk_size,
+                    self.config.send_queue_size,
+                )
+
+            except Exception as e:
+                logger.error(f"Failed to create gRPC client: {e}")
+                sys.exit(1)
+
+        logger.info("Desktop application initialized successfully")
+
+    def _start_metrics_server(self):
+        """Serve latency histograms and queue gauges on the local metrics endpoint."""
+        if not self.config.metrics_port:
+            return
+
+        metrics = get_metrics()
+        metrics.gauge(
+            "grpc_send_queue_depth",
+            "Audio/text packets waiting in a user's send queue",
+            ("user",),
+            lambda: [
+                ((client.user_id,), client.send_stats().get("data_depth"))
+                for client in self._clients()
+            ],
+        )
+        metrics.gauge(
+            "provider_scheduler",
+            "Concurrency limit, requests in flight and queued per provider API key",
+            ("scheduler", "stat"),
+            lambda: [
+                ((name, stat), value)
+                for name, stats in get_scheduler_pool().stats().items()
+                for stat, value in stats.items()
+            ],
+        )
+        speculator = getattr(self.assistant, "speculator", None)
+        if speculator is not None:
+            metrics.gauge(
+                "speculation",
+                "Speculative generation counters and rates",
+                ("stat",),
+                lambda: [((name,), value) for name, value in speculator.stats().items()],
+            )
 
         try:
-            self.grpc_client = GRPCClient(
-                self.config.backend_url,
-                self.config.user_id,
-                self.config.use_tls
+            self.metrics_server = MetricsServer(self.config.metrics_port, self.config.metrics_host)
+            self.metrics_server.start()
+        except OSError as e:
+            logger.warning(f"Could not start metrics endpoint: {e}")
+
+    def _clients(self) -> List["GRPCClient"]:
+        """gRPC clients currently serving users."""
+        if self.config.async_mode:
+            return list(self.async_clients)
+        return [self.grpc_client] if self.grpc_client else []
+
+    def warm_up(self):
+        """
+        Build API clients, open their connections and pre-synthesize phrases.
+
+        Runs in the background once the app is up: importing the provider
+        SDKs dominates startup, and turns arriving first wait on the pool.
+        """
+        started = time.perf_counter()
+        self._create_pooled_clients()
+        self.client_pool.prewarm()
+        logger.info(f"API clients ready in {time.perf_counter() - started:.3f}s")
+        if isinstance(self.assistant.tts, CachedTTS):
+            self.assistant.tts.prewarm(
+                self._phrase_bank(), *self._reply_format(), clips=ERROR_MESSAGES
             )
-            # Note: Connection will be established when we have protobuf generated
-            # self.grpc_client.connect()
 
-        except Exception as e:
-            logger.error(f"Failed to connect to backend: {e}")
-            sys.exit(1)
+    async def _warm_up_async(self):
+        """Build API clients off the event loop, then connect and pre-synthesize phrases."""
+        started = time.perf_counter()
+        await asyncio.to_thread(self._create_pooled_clients)
+        await self.client_pool.prewarm_async()
+        logger.info(f"API clients ready in {time.perf_counter() - started:.3f}s")
+        if isinstance(self.assistant.tts, AsyncCachedTTS):
+            await self.assistant.tts.prewarm(
+                self._phrase_bank(), *self._reply_format(), clips=ERROR_MESSAGES
+            )
 
-        logger.info("Desktop application initialized successfully")
+    def _create_pooled_clients(self):
+        """Create the providers' pooled API clients so they can be pre-warmed."""
+        providers = [self.assistant.stt, self.assistant.llm, self.assistant.tts]
+        while providers:
+            provider = providers.pop()
+            # Look through cache, thread and hedging wrappers to the providers holding clients
+            if hasattr(provider, "provider"):
+                providers.append(provider.provider)
+            elif hasattr(provider, "states"):
+                providers.extend(state.provider for state in provider.states)
+            elif getattr(provider, "pool_kind", None):
+                self.client_pool.get(provider.pool_kind, provider.api_key)
+
+    def _create_assistant(self) -> AIAssistant:
+        """Create the blocking assistant and its providers."""
+        stt = create_stt_provider(
+            self.config.stt_provider,
+            self.config.openai_api_key,
+            self.config.stt_local_model,
+            self.config.stt_compute_type,
+            self.config.stt_workers or None
+        )
+        stt = self._schedule(stt, self.config.stt_provider)
+
+        llm = create_llm_provider(
+            self.config.ai_provider,
+            self.config.api_key_for(self.config.ai_provider),
+            self.config.ai_model,
+            self.config.llm_fast_model,
+            self.config.local_llm_n_ctx,
+            self.config.local_llm_cache_mb
+        )
+        llm = self._schedule(llm, self.config.ai_provider)
+
+        if self.config.llm_fallback_provider:
+            fallback = create_llm_provider(
+                self.config.llm_fallback_provider,
+                self.config.api_key_for(self.config.llm_fallback_provider),
+                self.config.llm_fallback_model
+            )
+            fallback = self._schedule(fallback, self.config.llm_fallback_provider)
+            llm = HedgedLLM([llm, fallback], **self._hedge_options())
+
+        tts = create_tts_provider(
+            self.config.tts_provider,
+            self.config.openai_api_key,
+            self.config.openai_tts_model,
+            self.config.openai_tts_voice,
+            self.config.tts_local_voice,
+            self.config.sample_rate
+        )
+        tts = self._schedule(tts, self.config.tts_provider)
+
+        if self.config.llm_cache_enabled:
+            llm = CachedLLM(llm, self._create_response_cache())
+
+        if self.config.tts_cache_enabled:
+            tts = CachedTTS(tts, self._create_tts_cache())
+
+        return AIAssistant(
+            stt,
+            llm,
+            tts,
+            conversations=self._create_conversation_store(),
+            context_window=self._create_context_window(),
+            vad=self._create_vad(),
+        )
+
+    def _create_async_assistant(self) -> AsyncAIAssistant:
+        """Create the asyncio assistant and its providers."""
+        stt = create_async_stt_provider(
+            self.config.stt_provider,
+            self.config.openai_api_key,
+            self.config.stt_local_model,
+            self.config.stt_compute_type,
+            self.config.stt_workers or None
+        )
+        stt = self._schedule(stt, self.config.stt_provider)
+
+        llm = create_async_llm_provider(
+            self.config.ai_provider,
+            self.config.api_key_for(self.config.ai_provider),
+            self.config.ai_model,
+            self.config.llm_fast_model,
+            self.config.local_llm_n_ctx,
+            self.config.local_llm_cache_mb
+        )
+        llm = self._schedule(llm, self.config.ai_provider)
+
+        if self.config.llm_fallback_provider:
+            fallback = create_async_llm_provider(
+                self.config.llm_fallback_provider,
+                self.config.api_key_for(self.config.llm_fallback_provider),
+                self.config.llm_fallback_model
+            )
+            fallback = self._schedule(fallback, self.config.llm_fallback_provider)
+            llm = AsyncHedgedLLM([llm, fallback], **self._hedge_options())
+
+        tts = create_async_tts_provider(
+            self.config.tts_provider,
+            self.config.openai_api_key,
+            self.config.openai_tts_model,
+            self.config.openai_tts_voice,
+            self.config.tts_local_voice,
+            self.config.sample_rate
+        )
+        tts = self._schedule(tts, self.config.tts_provider)
+
+        if self.config.llm_cache_enabled:
+            llm = AsyncCachedLLM(llm, self._create_response_cache())
+
+        if self.config.tts_cache_enabled:
+            tts = AsyncCachedTTS(tts, self._create_tts_cache())
+
+        return AsyncAIAssistant(
+            stt,
+            llm,
+            tts,
+            conversations=self._create_conversation_store(),
+            context_window=self._create_context_window(),
+            vad=self._create_vad(),
+            max_concurrent_turns=self.config.max_concurrent_turns,
+            speculator=self._create_speculator(),
+        )
+
+    def _schedule(self, provider, provider_name: str):
+        """Queue a cloud provider's requests behind its API key's scheduler."""
+        if not self.config.scheduler_enabled or provider_name not in ("openai", "anthropic"):
+            return provider
+        scheduler = get_scheduler_pool().get(provider_name, self.config.api_key_for(provider_name))
+        return scheduled(provider, scheduler)
+
+    def _hedge_options(self) -> dict:
+        """Hedging and circuit breaker settings for the LLM providers."""
+        return {
+            "hedge_quantile": self.config.llm_hedge_quantile,
+            "max_hedge_delay": self.config.llm_hedge_max_delay,
+            "failure_threshold": self.config.llm_circuit_failures,
+            "reset_timeout": self.config.llm_circuit_reset,
+        }
+
+    def _create_response_cache(self) -> ResponseCache:
+        """Create the LLM response cache."""
+        return ResponseCache(
+            ttl=self.config.llm_cache_ttl,
+            max_entries=self.config.llm_cache_max_entries,
+            context_turns=self.config.llm_cache_context_turns,
+        )
+
+    def _create_tts_cache(self) -> TTSCache:
+        """Create the two-tier TTS audio cache."""
+        return TTSCache(
+            max_memory_bytes=self.config.tts_cache_memory_mb * 1024 * 1024,
+            cache_dir=self.config.tts_cache_dir,
+            max_disk_bytes=self.config.tts_cache_disk_mb * 1024 * 1024,
+        )
+
+    def _phrase_bank(self) -> List[str]:
+        """Phrases to pre-render: the configured bank plus the assistant's error replies."""
+        return load_phrase_bank(self.config.tts_phrase_bank) + ERROR_MESSAGES
+
+    def _reply_format(self) -> Tuple[int, int]:
+        """The (AudioFormat, sample_rate) the phone is expected to ask replies in."""
+        audio_format = OPUS if self.config.audio_format.lower() == "opus" else PCM
+        return audio_format, self.config.sample_rate
+
+    def _create_context_window(self) -> ContextWindow:
+        """Create the per-turn history token budget."""
+        budget = self.config.context_token_budget or context_budget_for_model(
+            self.config.ai_model
+        )
+        if self.config.ai_provider == "local":
+            # Leave room in the local model's context for the prompt and reply
+            budget = min(budget, self.config.local_llm_n_ctx // 2)
+        return ContextWindow(budget)
+
+    def _create_vad(self) -> VoiceActivityDetector:
+        """Create the voice activity detector applied before transcription."""
+        return VoiceActivityDetector(
+            STT_SAMPLE_RATE,
+            aggressiveness=self.config.vad_aggressiveness,
+            max_segment_seconds=self.config.vad_max_segment,
+        )
+
+    def _create_speculator(self) -> Optional[Speculator]:
+        """Create the speculative generation policy, or None when disabled."""
+        if not self.config.speculative_llm:
+            return None
+        return Speculator(
+            max_distance=self.config.speculation_max_distance,
+            pause_partial_ms=self.config.speculation_pause_ms,
+        )
+
+    def _create_conversation_store(self) -> ConversationStore:
+        """Create the session-keyed history store."""
+        return ConversationStore(
+            max_messages=self.config.history_max_messages,
+            max_sessions=self.config.max_sessions,
+            max_bytes=self.config.session_memory_mb * 1024 * 1024,
+            idle_timeout=self.config.session_idle_timeout,
+        )
+
+    def _new_deadline(self) -> Optional[Deadline]:
+        """Start the deadline of a turn, or None when deadlines are disabled."""
+        if self.config.turn_deadline <= 0:
+            return None
+        return Deadline(
+            self.config.turn_deadline,
+            degrade_below=self.config.deadline_degrade_at,
+            text_only_below=self.config.deadline_text_only_at,
+            degraded_max_tokens=self.config.degraded_max_tokens,
+        )
 
     def handle_incoming_packet(self, packet):
         """Handle incoming packet from phone."""
-        # TODO: Implement when protobuf is generated
-        logger.info(f"Received packet: {packet}")
-
-        # Check packet type
-        # if packet.type == AUDIO_CHUNK:
-        #     # Process audio
-        #     transcript, response_text, response_audio = self.assistant.process_audio_input(packet.audio.data)
-        #
-        #     # Send transcript back
-        #     self.grpc_client.send_packet(
-        #         self.grpc_client.create_transcript_packet(transcript, is_final=True)
-        #     )
-        #
-        #     # Send audio response
-        #     self.grpc_client.send_packet(
-        #         self.grpc_client.create_audio_packet(response_audio, is_final=True)
-        #     )
-        #
-        # elif packet.type == TEXT_MESSAGE:
-        #     # Process text
-        #     response_text = self.assistant.process_text_input(packet.text.text)
-        #
-        #     # Send text response
-        #     self.grpc_client.send_packet(
-        #         self.grpc_client.create_text_packet(response_text)
-        #     )
+        from grpc_client.client import streaming_pb2
+
+        client = self.grpc_client
+        session_id = session_id_for_packet(packet)
+        deadline = self._new_deadline()
+
+        if packet.type == streaming_pb2.AUDIO_CHUNK:
+            def send_transcript(result):
+                client.send_packet(
+                    client.create_transcript_packet(
+                        result.text, is_final=result.is_final, confidence=result.confidence
+                    )
+                )
+
+            # Chunks may arrive out of order or twice; feed them in order
+            chunks = self.reassembly.add(
+                session_id,
+                packet.packet_id,
+                packet.audio.chunk_index,
+                packet.audio.data,
+                packet.audio.is_final,
+            )
+
+            transcript = None
+            for chunk, is_final in chunks:
+                final_text = self.assistant.feed_audio_chunk(
+                    session_id,
+                    chunk,
+                    is_final,
+                    packet.audio.sample_rate or self.config.sample_rate,
+                    send_transcript,
+                    deadline,
+                    packet.audio.format,
+                    packet.audio.channels or 1,
+                )
+                if final_text is not None:
+                    transcript = final_text
+            if transcript is None:
+                return
+
+            # Reply in the phone's format where the TTS provider can produce it
+            audio_format, sample_rate = self.assistant.tts.output_format(
+                packet.audio.format, packet.audio.sample_rate or self.config.sample_rate
+            )
+
+            # Split into numbered frames; blocks while the send queue is full
+            framer = client.audio_framer(audio_format, sample_rate)
+
+            with self.assistant.turn(session_id) as cancel:
+                # Tagged with the turn, so a CANCEL drops what is still queued
+                def send_audio(audio_chunk, is_final):
+                    for audio_packet in framer.packets(audio_chunk, is_final):
+                        client.send_packet(audio_packet, cancel=cancel)
+
+                def send_text(sentence):
+                    client.send_packet(client.create_text_packet(sentence), cancel=cancel)
+
+                self.assistant.speak_response(
+                    transcript,
+                    send_audio,
+                    session_id,
+                    deadline,
+                    send_text,
+                    audio_format,
+                    sample_rate,
+                    cancel,
+                )
+
+        elif packet.type == streaming_pb2.TEXT_MESSAGE:
+            with self.assistant.turn(session_id):
+                response_text = self.assistant.process_text_input(
+                    packet.text.text, session_id, deadline
+                )
+            client.send_packet(client.create_text_packet(response_text))
+
+        elif packet.type == streaming_pb2.CONTROL:
+            control_type = packet.control.control_type
+            logger.info(
+                f"Control from {session_id}: "
+                f"{streaming_pb2.ControlType.Name(control_type)} {packet.control.message}"
+            )
+
+            # Barge-in: stop generating and drop the reply's queued audio.
+            # Control packets are handled on the receiving thread (see
+            # GRPCClient.start_stream), so this runs while the turn does.
+            if control_type in (streaming_pb2.CANCEL, streaming_pb2.STOP_LISTENING):
+                for cancel in self.assistant.cancel_turn(session_id, "interrupted"):
+                    dropped = client.flush(cancel)
+                    logger.info(f"Dropped {dropped} queued packet(s) of {session_id}")
+                client.send_packet(client.create_control_packet(streaming_pb2.ACK, "cancelled"))
+
+    async def handle_incoming_packet_async(self, client: "AsyncGRPCClient", packet):
+        """Handle incoming packet from phone in async mode."""
+        from grpc_client.client import streaming_pb2
+
+        session_id = session_id_for_packet(packet)
+        deadline = self._new_deadline()
+
+        if packet.type == streaming_pb2.AUDIO_CHUNK:
+            async def send_transcript(result):
+                await client.send_packet(
+                    client.create_transcript_packet(
+                        result.text, is_final=result.is_final, confidence=result.confidence
+                    )
+                )
+
+            # Chunks may arrive out of order or twice; feed them in order
+            chunks = self.reassembly.add(
+                session_id,
+                packet.packet_id,
+                packet.audio.chunk_index,
+                packet.audio.data,
+                packet.audio.is_final,
+            )
+
+            transcript = None
+            for chunk, is_final in chunks:
+                final_text = await self.assistant.feed_audio_chunk(
+                    session_id,
+                    chunk,
+                    is_final,
+                    packet.audio.sample_rate or self.config.sample_rate,
+                    send_transcript,
+                    deadline,
+                    packet.audio.format,
+                    packet.audio.channels or 1,
+                )
+                if final_text is not None:
+                    transcript = final_text
+            if transcript is None:
+                return
+
+            # Reply in the phone's format where the TTS provider can produce it
+            audio_format, sample_rate = self.assistant.tts.output_format(
+                packet.audio.format, packet.audio.sample_rate or self.config.sample_rate
+            )
+
+            # Split into numbered frames; waits while the send queue is full
+            framer = client.audio_framer(audio_format, sample_rate)
+
+            async with self.assistant.turn(session_id) as cancel:
+                # Tagged with the turn, so a CANCEL drops what is still queued
+                async def send_audio(audio_chunk, is_final):
+                    for audio_packet in framer.packets(audio_chunk, is_final):
+                        await client.send_packet(audio_packet, cancel=cancel)
+
+                async def send_text(sentence):
+                    await client.send_packet(client.create_text_packet(sentence), cancel=cancel)
+
+                await self.assistant.speak_response(
+                    transcript,
+                    send_audio,
+                    session_id,
+                    deadline,
+                    send_text,
+                    audio_format,
+                    sample_rate,
+                    cancel,
+                )
+
+        elif packet.type == streaming_pb2.TEXT_MESSAGE:
+            async with self.assistant.turn(session_id):
+                response_text = await self.assistant.process_text_input(
+                    packet.text.text, session_id, deadline
+                )
+            await client.send_packet(client.create_text_packet(response_text))
+
+        elif packet.type == streaming_pb2.CONTROL:
+            control_type = packet.control.control_type
+            logger.info(
+                f"Control from {session_id}: "
+                f"{streaming_pb2.ControlType.Name(control_type)} {packet.control.message}"
+            )
+
+            # Barge-in: stop generating and drop the reply's queued audio
+            if control_type in (streaming_pb2.CANCEL, streaming_pb2.STOP_LISTENING):
+                for cancel in self.assistant.cancel_turn(session_id, "interrupted"):
+                    dropped = await client.flush(cancel)
+                    logger.info(f"Dropped {dropped} queued packet(s) of {session_id}")
+                await client.send_packet(
+                    client.create_control_packet(streaming_pb2.ACK, "cancelled")
+                )
+
+    async def serve_user(self, user_id: str):
+        """Keep a stream open for one user, reconnecting when it drops."""
+        import grpc
+        from grpc_client.aio_client import AsyncGRPCClient
+
+        client = AsyncGRPCClient(
+            self.config.backend_url,
+            user_id,
+            self.config.use_tls,
+            self.config.chunk_size,
+            self.config.send_queue_size,
+        )
+        self.async_clients.append(client)
+
+        try:
+            while True:
+                try:
+                    await client.connect()
+                    await client.start_stream(
+                        lambda packet: self.handle_incoming_packet_async(client, packet)
+                    )
+                except grpc.aio.AioRpcError as e:
+                    logger.error(f"Stream error for user {user_id}: {e.details()}")
+                finally:
+                    await client.disconnect()
+
+                await asyncio.sleep(1)
+        finally:
+            self.async_clients.remove(client)
+
+    async def run_async(self):
+        """Serve every configured user from one event loop."""
+        logger.info(f"Serving {len(self.config.user_ids)} user(s) in async mode")
+
+        warmup_task = asyncio.create_task(self._warm_up_async())
+        warmup_task.add_done_callback(self._warm_up_done)
+
+        try:
+            await asyncio.gather(*(self.serve_user(uid) for uid in self.config.user_ids))
+        finally:
+            warmup_task.cancel()
+
+    @staticmethod
+    def _warm_up_done(task: asyncio.Task):
+        """Log a failed warm-up; turns then create clients and render phrases on demand."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Warm-up failed: {task.exception()!r}")
 
     def run(self):
         """Run the application."""
         logger.info("Starting desktop AI assistant...")
 
-        try:
-            # Start streaming
-            # self.grpc_client.start_stream(self.handle_incoming_packet)
+        if self.config.async_mode:
+            try:
+                asyncio.run(self.run_async())
+            except KeyboardInterrupt:
+                logger.info("Shutting down...")
+            return
+
+        threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+
+        import grpc
+        from grpc_client.client import streaming_pb2
 
+        if streaming_pb2 is None:
+            logger.error(
+                "Protobuf code not generated; run grpc_tools.protoc (see grpc_client/client.py)"
+            )
+            return
+
+        try:
             logger.info("Desktop assistant is running")
             logger.info("Waiting for mobile device to connect...")
 
-            # Keep running
-            import time
+            # Keep a stream open, reconnecting when it drops
             while True:
+                try:
+                    self.grpc_client.connect()
+                    self.grpc_client.start_stream(self.handle_incoming_packet)
+                except grpc.RpcError as e:
+                    logger.error(f"Stream error: {e}")
+                finally:
+                    self.grpc_client.disconnect()
+
                 time.sleep(1)
 
         except KeyboardInterrupt:
@@ -153,10 +712,52 @@ class DesktopApp:
         logger.info("Shutting down desktop application")
         if self.grpc_client:
             self.grpc_client.disconnect()
+        if self.metrics_server:
+            self.metrics_server.stop()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AI Voice Assistant - Desktop Application")
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="start up once under -X importtime, report an import-time breakdown and exit",
+    )
+    parser.add_argument(
+        "--startup-budget", type=float, default=0.5,
+        help="seconds of imports --profile-startup allows before exiting non-zero",
+    )
+    return parser.parse_args()
+
+
+def profile_startup_phases():
+    """Initialize the app as a normal start would, report phase times and exit."""
+    started = time.perf_counter()
+    app = DesktopApp(Config.from_env())
+    app.initialize()
+    initialized = time.perf_counter()
+    # What the first connection loads
+    import grpc_client.aio_client  # noqa: F401
+    ready = time.perf_counter()
+    mark_ready()
+    # Normally in the background after startup
+    app._create_pooled_clients()
+    report_phases({
+        "initialize": initialized - started,
+        "load gRPC client": ready - initialized,
+        "API clients (background)": time.perf_counter() - ready,
+    })
+    app.shutdown()
 
 
 def main():
     """Main entry point."""
+    args = parse_args()
+    if args.profile_startup:
+        sys.exit(profile_startup(Path(__file__), budget=args.startup_budget))
+    if in_profiled_process():
+        profile_startup_phases()
+        return
+
     print("=" * 60)
     print("AI Voice Assistant - Desktop Application")
     print("=" * 60)
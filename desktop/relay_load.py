@@ -0,0 +1,110 @@
+"""Load test of the backend relay with paired phone/desktop streams."""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from bench.relay_load import Cadence, RelayLoad
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Open N paired MOBILE/DESKTOP streams against the relay (e.g. "
+            "backend/cmd/testserver), stream audio at a realistic cadence and "
+            "report hop latency, throughput and registration latency as JSON."
+        )
+    )
+    parser.add_argument("--target", default="localhost:50051", help="relay host:port")
+    parser.add_argument("--pairs", default="1,10,50,100", help="comma-separated pair counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--format", choices=("opus", "pcm"), default="opus", dest="audio_format")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=20, help="phone audio frame length")
+    parser.add_argument("--utterance", type=float, default=3.0, help="seconds of speech per turn")
+    parser.add_argument("--reply", type=float, default=4.0, help="seconds of reply audio per turn")
+    parser.add_argument(
+        "--reply-speedup", type=float, default=4.0,
+        help="how much faster than realtime the desktop streams replies",
+    )
+    parser.add_argument("--pause", type=float, default=1.0, help="seconds between turns")
+    parser.add_argument("--streams-per-channel", type=int, default=10)
+    parser.add_argument(
+        "--stalled-readers", type=int, default=0,
+        help="desktops that stop reading halfway through each level",
+    )
+    parser.add_argument("--probe-interval", type=float, default=0.5)
+    parser.add_argument("--output", type=Path, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    """Run the load levels and print or save the report."""
+    args = parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+
+    cadence = Cadence(
+        audio_format=args.audio_format,
+        sample_rate=args.sample_rate,
+        frame_ms=args.frame_ms,
+        utterance_s=args.utterance,
+        reply_s=args.reply,
+        reply_speedup=args.reply_speedup,
+        pause_s=args.pause,
+    )
+    levels = [int(level) for level in args.pairs.split(",") if level.strip()]
+    load = RelayLoad(
+        args.target,
+        cadence,
+        duration=args.duration,
+        streams_per_channel=args.streams_per_channel,
+        stalled_readers=args.stalled_readers,
+        probe_interval=args.probe_interval,
+    )
+    results = asyncio.run(load.run(levels))
+
+    report = {
+        "config": {
+            "target": args.target,
+            "duration_s": args.duration,
+            "format": args.audio_format,
+            "frame_ms": args.frame_ms,
+            "frame_bytes": cadence.frame_bytes,
+            "utterance_s": args.utterance,
+            "reply_s": args.reply,
+            "reply_speedup": args.reply_speedup,
+            "stalled_readers": args.stalled_readers,
+        },
+        "levels": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    for level in results:
+        print(
+            f"pairs {level['pairs']:>4}: {level['packets_per_sec']} pkt/s, "
+            f"uplink p50 {level['uplink_ms']['p50']}ms p99 {level['uplink_ms']['p99']}ms, "
+            f"register p99 {level['register_probe_ms']['p99']}ms, "
+            f"{level['lost']} lost, {level['route_errors']} errors",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
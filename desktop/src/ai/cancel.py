@@ -0,0 +1,126 @@
+"""Cancellation of in-flight turns (barge-in)."""
+
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TurnCancelled(Exception):
+    """Raised when a turn is cancelled, e.g. because the user interrupted it."""
+
+
+class CancelToken:
+    """
+    Cancellation state of one turn.
+
+    Created with the turn and handed to every stage alongside its deadline.
+    Stages call check() between chunks of work (LLM deltas, TTS frames);
+    asyncio stages can also await waiter() to abandon a pending step the
+    moment the turn is cancelled. Callbacks registered with on_cancel run
+    once, on the thread that cancels.
+    """
+
+    __slots__ = ("event", "reason", "callbacks", "future", "lock")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.reason = ""
+        self.callbacks: List[Callable[[], None]] = []
+        self.future: Optional[asyncio.Future] = None
+        self.lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self, reason: str = "cancelled"):
+        """Cancel the turn; later calls have no effect."""
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.reason = reason
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in cancel callback: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Call callback when the turn is cancelled (now, if it already is)."""
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def discard(self, callback: Callable[[], None]):
+        """Unregister a callback that is no longer needed."""
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+    def check(self, stage: str):
+        """Raise TurnCancelled if the turn has been cancelled."""
+        if self.event.is_set():
+            raise TurnCancelled(f"Turn {self.reason} during {stage}")
+
+    def waiter(self) -> asyncio.Future:
+        """Future of the running loop that completes when the turn is cancelled."""
+        if self.future is None:
+            loop = asyncio.get_running_loop()
+            self.future = future = loop.create_future()
+
+            def wake():
+                if not future.done():
+                    future.set_result(None)
+
+            self.on_cancel(lambda: loop.call_soon_threadsafe(wake))
+        return self.future
+
+
+# Token of the turn running in this context, for provider code that gets no token
+_current: ContextVar[Optional[CancelToken]] = ContextVar("turn_cancel", default=None)
+
+
+@contextmanager
+def cancel_scope(cancel: Optional[CancelToken]) -> Iterator[None]:
+    """Make cancel the current turn's token (inherited by copied contexts)."""
+    reset = _current.set(cancel)
+    try:
+        yield
+    finally:
+        _current.reset(reset)
+
+
+def turn_cancelled() -> bool:
+    """Whether the current turn has been cancelled."""
+    cancel = _current.get()
+    return cancel is not None and cancel.cancelled
+
+
+@contextmanager
+def abort_on_cancel(close: Callable[[], None]) -> Iterator[None]:
+    """
+    Call close if the current turn is cancelled while the block runs.
+
+    Providers wrap reads of an open response with it: closing the response
+    from the cancelling thread aborts the request even while a read is
+    blocked waiting for the first token or byte.
+    """
+    cancel = _current.get()
+    if cancel is None:
+        yield
+        return
+    cancel.on_cancel(close)
+    try:
+        yield
+    finally:
+        cancel.discard(close)
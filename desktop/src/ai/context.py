@@ -0,0 +1,140 @@
+"""Token-budgeted context windows with rolling summaries."""
+
+import logging
+import threading
+from typing import List, Sequence, Set, Tuple
+from ai.llm import Message
+
+logger = logging.getLogger(__name__)
+
+# Input token budget for conversation history, by model name prefix
+MODEL_CONTEXT_BUDGETS = {
+    "gpt-4o": 6000,
+    "gpt-4-turbo": 6000,
+    "gpt-4": 3000,
+    "gpt-3.5": 3000,
+    "claude": 6000,
+}
+DEFAULT_CONTEXT_BUDGET = 3000
+
+# Per-message overhead for role and formatting tokens
+MESSAGE_TOKEN_OVERHEAD = 4
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a voice conversation between a user "
+    "and an AI assistant. Merge the previous summary with the new messages "
+    "into a few concise sentences. Keep facts, names, numbers, decisions and "
+    "user preferences needed to continue the conversation. Reply with the "
+    "summary only."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: Message) -> int:
+    """Estimated tokens of a message, including formatting overhead."""
+    return estimate_tokens(message.content) + MESSAGE_TOKEN_OVERHEAD
+
+
+def context_budget_for_model(model: str) -> int:
+    """Default history token budget for a model."""
+    for prefix, budget in MODEL_CONTEXT_BUDGETS.items():
+        if model.startswith(prefix):
+            return budget
+    return DEFAULT_CONTEXT_BUDGET
+
+
+class SystemPrompt(str):
+    """
+    System prompt made of stable segments (base prompt, then summary).
+
+    Behaves as the joined string everywhere; providers that support prompt
+    caching can mark each segment as a cache breakpoint instead.
+    """
+
+    segments: Tuple[str, ...]
+
+    def __new__(cls, *segments: str):
+        segments = tuple(segment for segment in segments if segment)
+        prompt = super().__new__(cls, "\n\n".join(segments))
+        prompt.segments = segments
+        return prompt
+
+
+def build_summary_request(summary: str, messages: Sequence[Message]) -> List[Message]:
+    """Messages asking the LLM to fold older turns into the running summary."""
+    transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in messages)
+    content = f"Previous summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+    return [Message("user", content)]
+
+
+class ContextWindow:
+    """
+    Selects the newest messages that fit a token budget.
+
+    Messages that no longer fit are reported as overflow so the caller can
+    fold them into the session's rolling summary off the hot path.
+    """
+
+    def __init__(self, budget_tokens: int, summary_tokens: int = 400):
+        """
+        Initialize context window.
+
+        Args:
+            budget_tokens: Token budget for summary plus history
+            summary_tokens: Budget reserved for the rolling summary
+        """
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizing: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def build(
+        self, base_prompt: str, summary: str, messages: Sequence[Message]
+    ) -> Tuple[List[Message], SystemPrompt, List[Message]]:
+        """
+        Build the prompt for a turn.
+
+        Args:
+            base_prompt: Stable system prompt
+            summary: Rolling summary of older turns
+            messages: Stored history, oldest first
+
+        Returns:
+            Tuple of (window_messages, system_prompt, overflow_messages)
+        """
+        budget = self.budget_tokens - min(estimate_tokens(summary), self.summary_tokens)
+        used = 0
+        start = len(messages)
+
+        for i in range(len(messages) - 1, -1, -1):
+            cost = message_tokens(messages[i])
+            # Always keep the newest message, even when it alone exceeds the budget
+            if used + cost > budget and start < len(messages):
+                break
+            used += cost
+            start = i
+
+        # Never start the window on an assistant reply
+        while start < len(messages) - 1 and messages[start].role != "user":
+            start += 1
+
+        summary_segment = f"Summary of the conversation so far:\n{summary}" if summary else ""
+        system_prompt = SystemPrompt(base_prompt, summary_segment)
+        return list(messages[start:]), system_prompt, list(messages[:start])
+
+    def begin_summary(self, session_id: str) -> bool:
+        """Claim the session for summarization; False if one is already running."""
+        with self.lock:
+            if session_id in self.summarizing:
+                return False
+            self.summarizing.add(session_id)
+            return True
+
+    def end_summary(self, session_id: str):
+        """Release the session after summarization finished or failed."""
+        with self.lock:
+            self.summarizing.discard(session_id)
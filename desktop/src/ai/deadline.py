@@ -0,0 +1,117 @@
+"""Per-turn latency deadlines."""
+
+import time
+from typing import Any, Dict, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a turn runs past its deadline."""
+
+
+class Deadline:
+    """
+    Latency budget of one turn.
+
+    Created when the turn starts (the user stops talking) and handed to
+    every stage. Each stage gets the time that remains as its timeout, and
+    degrades once less than a fraction of the budget is left: lower
+    max_tokens and faster models first, then a text-only reply.
+    """
+
+    __slots__ = ("budget", "expires_at", "degrade_below", "text_only_below", "degraded_max_tokens")
+
+    def __init__(
+        self,
+        budget: float,
+        degrade_below: float = 0.5,
+        text_only_below: float = 0.2,
+        degraded_max_tokens: int = 150,
+    ):
+        """
+        Initialize deadline.
+
+        Args:
+            budget: Seconds from now until the turn must be done
+            degrade_below: Fraction of the budget left below which stages
+                switch to faster models and shorter replies
+            text_only_below: Fraction left below which speech is skipped
+            degraded_max_tokens: max_tokens used once degraded
+        """
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+        self.degrade_below = degrade_below
+        self.text_only_below = text_only_below
+        self.degraded_max_tokens = degraded_max_tokens
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    @property
+    def degraded(self) -> bool:
+        """Whether stages should trade quality for speed."""
+        return self.remaining() < self.budget * self.degrade_below
+
+    @property
+    def text_only(self) -> bool:
+        """Whether there is no time left to synthesize speech."""
+        return self.remaining() < self.budget * self.text_only_below
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded(f"Turn deadline of {self.budget:g}s exceeded during {stage}")
+
+    def timeout(self, stage: str) -> float:
+        """Time left for a stage, raising DeadlineExceeded if there is none."""
+        self.check(stage)
+        return self.remaining()
+
+    def model(self, model: str, fast_model: Optional[str]) -> str:
+        """The model to use now: the fast one once degraded."""
+        if fast_model and self.degraded:
+            return fast_model
+        return model
+
+    def max_tokens(self, max_tokens: Optional[int]) -> Optional[int]:
+        """The token limit to use now: a short reply once degraded."""
+        if not self.degraded:
+            return max_tokens
+        return min(max_tokens or self.degraded_max_tokens, self.degraded_max_tokens)
+
+
+def request_options(
+    deadline: Optional[Deadline],
+    stage: str,
+    model: str,
+    fast_model: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    SDK request arguments (model, max_tokens, timeout) under an optional deadline.
+
+    max_tokens is omitted when there is no limit.
+    """
+    if deadline is None:
+        options: Dict[str, Any] = {"model": model}
+    else:
+        options = {
+            "model": deadline.model(model, fast_model),
+            "timeout": deadline.timeout(stage),
+        }
+        max_tokens = deadline.max_tokens(max_tokens)
+
+    if max_tokens is not None:
+        options["max_tokens"] = max_tokens
+    return options
+
+
+def client_for(client, deadline: Optional[Deadline]):
+    """The SDK client to call under a deadline: retries would overrun it."""
+    if deadline is None:
+        return client
+    return client.with_options(max_retries=0)
@@ -0,0 +1,464 @@
+"""Hedged requests and circuit breaking across LLM providers."""
+
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
+from ai.cancel import TurnCancelled, turn_cancelled
+from ai.deadline import Deadline
+from ai.llm import AsyncLLMProvider, LLMProvider, Message
+from metrics import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of an attempt's stream in the event queue
+DONE = object()
+
+
+class CircuitBreaker:
+    """
+    Skips a provider after repeated failures.
+
+    After failure_threshold consecutive failures the circuit opens and the
+    provider is skipped for reset_timeout seconds. Then a single probe
+    request is let through: success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures before the circuit opens
+            reset_timeout: Seconds the circuit stays open before a probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probing = False
+            # Half open: let exactly one probe through
+            if self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        """Close the circuit after a successful request."""
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        """Count a failure, opening the circuit when the threshold is reached."""
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a probe that ended without an outcome (e.g. it was hedged away)."""
+        with self.lock:
+            self.probing = False
+
+
+class ProviderState:
+    """A provider with its circuit breaker and first-token latency history."""
+
+    __slots__ = ("provider", "name", "breaker", "latency")
+
+    def __init__(self, provider, breaker: CircuitBreaker):
+        self.provider = provider
+        self.name = getattr(provider, "model", type(provider).__name__)
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+
+
+class Attempt:
+    """One provider's in-flight share of a hedged request."""
+
+    __slots__ = ("state", "started", "failed", "settled", "cancelled", "task")
+
+    def __init__(self, state: ProviderState):
+        self.state = state
+        self.started = time.monotonic()
+        self.failed = False
+        # Whether its outcome (success, failure or release) reached the breaker
+        self.settled = False
+        self.cancelled = threading.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class HedgePolicy:
+    """Shared configuration of the sync and async hedged providers."""
+
+    def __init__(
+        self,
+        providers: Sequence,
+        hedge_quantile: float = 0.95,
+        min_hedge_delay: float = 0.3,
+        max_hedge_delay: float = 3.0,
+        min_samples: int = 20,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+    ):
+        """
+        Initialize hedged provider.
+
+        Args:
+            providers: Providers in order of preference
+            hedge_quantile: Quantile of the primary's time to first token
+                after which the request is hedged to the next provider
+            min_hedge_delay: Lower bound of the hedge delay in seconds
+            max_hedge_delay: Upper bound (and the delay until min_samples
+                latencies have been observed)
+            min_samples: Latency samples needed before the quantile is used
+            failure_threshold: Consecutive failures that open a provider's circuit
+            reset_timeout: Seconds before an open circuit is probed again
+        """
+        if not providers:
+            raise ValueError("At least one LLM provider required")
+
+        self.states = [
+            ProviderState(provider, CircuitBreaker(failure_threshold, reset_timeout))
+            for provider in providers
+        ]
+        self.model = self.states[0].name
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+
+    def hedge_delay(self, state: ProviderState) -> float:
+        """Seconds to wait for a provider's first token before hedging."""
+        if len(state.latency.samples) < self.min_samples:
+            return self.max_hedge_delay
+        delay = state.latency.percentile(self.hedge_quantile)
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, delay))
+
+    def _wait_timeout(
+        self, hedge_at: Optional[float], deadline: Optional[Deadline]
+    ) -> Optional[float]:
+        """How long to wait for the next stream event before hedging or giving up."""
+        timeout = None
+        if hedge_at is not None:
+            timeout = max(0.0, hedge_at - time.monotonic())
+        if deadline is not None:
+            remaining = deadline.timeout("llm")
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _won(self, attempt: Attempt, attempts: List[Attempt]):
+        """
+        Record the winning provider's time to first token.
+
+        Attempts that lost the race without failing record their elapsed
+        time: a lower bound of their time to first token. Dropping them
+        would leave only fast samples, shrinking the hedge delay each time
+        a slow primary is hedged away.
+        """
+        now = time.monotonic()
+        latency = now - attempt.started
+        attempt.state.latency.record(latency)
+        logger.info(f"LLM first token from {attempt.state.name} after {latency:.3f}s")
+        for other in attempts:
+            if other is not attempt and not other.failed:
+                other.state.latency.record(now - other.started)
+
+    def _failed(self, attempt: Attempt, error: Exception):
+        """Record a provider failure against its circuit."""
+        attempt.failed = True
+        attempt.settled = True
+        attempt.state.breaker.record_failure()
+        logger.warning(f"LLM provider {attempt.state.name} failed: {error}")
+
+    def _succeeded(self, attempt: Attempt):
+        """Record a completed reply against the provider's circuit."""
+        attempt.settled = True
+        attempt.state.breaker.record_success()
+
+    def _release(self, attempts: List[Attempt]):
+        """
+        Give back the breaker claims of attempts that ended without an outcome.
+
+        Covers losers of the race and every attempt of a request that
+        stopped early (consumer closed the stream, deadline, garbage
+        collection); otherwise a half-open probe would stay claimed and the
+        provider would be skipped for good.
+        """
+        for attempt in attempts:
+            if not attempt.settled:
+                attempt.settled = True
+                attempt.state.breaker.release()
+
+    def next_state(self, tried: List[ProviderState]) -> Optional[ProviderState]:
+        """Next untried provider whose circuit allows a request."""
+        for state in self.states:
+            if state not in tried and state.breaker.allow():
+                return state
+        return None
+
+
+class HedgedLLM(HedgePolicy, LLMProvider):
+    """
+    LLM provider that races providers for the first token.
+
+    The request goes to the first available provider. If it has not
+    produced a token within the hedge delay (derived from its recent
+    time-to-first-token quantile), or fails, the next provider is started
+    too, and whichever produces a token first streams the reply.
+    Providers whose circuit is open are skipped.
+    """
+
+    def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response from whichever provider answers first."""
+        return "".join(self.generate_response_stream(messages, system_prompt, deadline))
+
+    def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """Stream response from whichever provider produces a token first."""
+        events: "queue.Queue" = queue.Queue()
+        attempts: List[Attempt] = []
+        winner: Optional[Attempt] = None
+
+        def start(state: ProviderState) -> Attempt:
+            attempt = Attempt(state)
+            attempts.append(attempt)
+            # Attempts inherit the caller's context (request priority, trace)
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._pump, attempt, events, list(messages), system_prompt, deadline),
+                name="llm-hedge",
+                daemon=True,
+            ).start()
+            return attempt
+
+        state = self.next_state([])
+        if state is None:
+            raise RuntimeError("All LLM providers are unavailable (circuits open)")
+        hedge_at = start(state).started + self.hedge_delay(state)
+        running = 1
+
+        try:
+            while True:
+                timeout = self._wait_timeout(hedge_at, deadline)
+                try:
+                    attempt, item = events.get(timeout=timeout)
+                except queue.Empty:
+                    if deadline is not None:
+                        deadline.check("llm")
+                    if hedge_at is None or time.monotonic() < hedge_at:
+                        continue
+                    state = self.next_state([a.state for a in attempts])
+                    if state is not None:
+                        logger.info(f"Hedging LLM request to {state.name}")
+                        start(state)
+                        running += 1
+                    hedge_at = None
+                    continue
+
+                if winner is not None and attempt is not winner:
+                    continue
+
+                if isinstance(item, Exception):
+                    if turn_cancelled():
+                        # Barge-in closed the attempt's response: not a provider failure
+                        raise TurnCancelled("Turn cancelled during llm") from item
+                    running -= 1
+                    self._failed(attempt, item)
+                    if winner is not None:
+                        raise item
+                    state = self.next_state([a.state for a in attempts])
+                    if state is not None:
+                        logger.info(f"Falling back to {state.name}")
+                        start(state)
+                        running += 1
+                    elif running == 0:
+                        raise item
+                    continue
+
+                if winner is None:
+                    winner = attempt
+                    hedge_at = None
+                    self._won(winner, attempts)
+                    for other in attempts:
+                        if other is not winner:
+                            other.cancelled.set()
+                    self._release([other for other in attempts if other is not winner])
+
+                if item is DONE:
+                    self._succeeded(winner)
+                    return
+                yield item
+        finally:
+            for attempt in attempts:
+                attempt.cancelled.set()
+            self._release(attempts)
+
+    def _pump(
+        self,
+        attempt: Attempt,
+        events: "queue.Queue",
+        messages: List[Message],
+        system_prompt: Optional[str],
+        deadline: Optional[Deadline],
+    ):
+        """Forward one provider's stream to the shared event queue."""
+        stream = attempt.state.provider.generate_response_stream(messages, system_prompt, deadline)
+        try:
+            for delta in stream:
+                if attempt.cancelled.is_set():
+                    return
+                events.put((attempt, delta))
+            events.put((attempt, DONE))
+        except Exception as e:
+            events.put((attempt, e))
+        finally:
+            # Close the provider's HTTP response now rather than on garbage collection
+            stream.close()
+
+
+class AsyncHedgedLLM(HedgePolicy, AsyncLLMProvider):
+    """Async LLM provider that races providers for the first token (see HedgedLLM)."""
+
+    async def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response from whichever provider answers first."""
+        parts = []
+        async for delta in self.generate_response_stream(messages, system_prompt, deadline):
+            parts.append(delta)
+        return "".join(parts)
+
+    async def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[str]:
+        """Stream response from whichever provider produces a token first."""
+        events: asyncio.Queue = asyncio.Queue()
+        attempts: List[Attempt] = []
+        winner: Optional[Attempt] = None
+
+        def start(state: ProviderState) -> Attempt:
+            attempt = Attempt(state)
+            attempt.task = asyncio.create_task(
+                self._pump(attempt, events, list(messages), system_prompt, deadline)
+            )
+            attempts.append(attempt)
+            return attempt
+
+        state = self.next_state([])
+        if state is None:
+            raise RuntimeError("All LLM providers are unavailable (circuits open)")
+        hedge_at = start(state).started + self.hedge_delay(state)
+        running = 1
+
+        try:
+            while True:
+                timeout = self._wait_timeout(hedge_at, deadline)
+                try:
+                    attempt, item = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    if deadline is not None:
+                        deadline.check("llm")
+                    if hedge_at is None or time.monotonic() < hedge_at:
+                        continue
+                    state = self.next_state([a.state for a in attempts])
+                    if state is not None:
+                        logger.info(f"Hedging LLM request to {state.name}")
+                        start(state)
+                        running += 1
+                    hedge_at = None
+                    continue
+
+                if winner is not None and attempt is not winner:
+                    continue
+
+                if isinstance(item, Exception):
+                    running -= 1
+                    self._failed(attempt, item)
+                    if winner is not None:
+                        raise item
+                    state = self.next_state([a.state for a in attempts])
+                    if state is not None:
+                        logger.info(f"Falling back to {state.name}")
+                        start(state)
+                        running += 1
+                    elif running == 0:
+                        raise item
+                    continue
+
+                if winner is None:
+                    winner = attempt
+                    hedge_at = None
+                    self._won(winner, attempts)
+                    for other in attempts:
+                        if other is not winner:
+                            other.task.cancel()
+                    self._release([other for other in attempts if other is not winner])
+
+                if item is DONE:
+                    self._succeeded(winner)
+                    return
+                yield item
+        finally:
+            for attempt in attempts:
+                attempt.task.cancel()
+            self._release(attempts)
+
+    async def _pump(
+        self,
+        attempt: Attempt,
+        events: asyncio.Queue,
+        messages: List[Message],
+        system_prompt: Optional[str],
+        deadline: Optional[Deadline],
+    ):
+        """Forward one provider's stream to the shared event queue."""
+        stream = attempt.state.provider.generate_response_stream(messages, system_prompt, deadline)
+        try:
+            async for delta in stream:
+                events.put_nowait((attempt, delta))
+            events.put_nowait((attempt, DONE))
+        except Exception as e:
+            events.put_nowait((attempt, e))
+        finally:
+            # Close the provider's HTTP response now rather than on garbage collection
+            await stream.aclose()
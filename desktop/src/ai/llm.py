@@ -1,23 +1,45 @@
 """LLM module supporting multiple AI providers."""
 
+import asyncio
 import logging
+import os
+import queue
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
-from openai import OpenAI
-from anthropic import Anthropic
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Iterator, Optional
+from ai.cancel import abort_on_cancel
+from ai.deadline import Deadline, client_for, request_options
+from ai.transport import get_client_pool
+
+if TYPE_CHECKING:
+    # Imported by the client pool when a provider first needs its SDK
+    from anthropic import Anthropic, AsyncAnthropic
+    from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger(__name__)
 
+# Faster models each provider degrades to when a turn is short on time
+FAST_MODELS = {
+    "openai": "gpt-3.5-turbo",
+    "anthropic": "claude-3-haiku-20240307",
+}
+
 
 class Message:
     """Represents a conversation message."""
 
+    __slots__ = ("role", "content", "_api_dict")
+
     def __init__(self, role: str, content: str):
         self.role = role  # 'user' or 'assistant'
         self.content = content
+        self._api_dict: Optional[Dict[str, str]] = None
 
     def to_dict(self) -> Dict[str, str]:
-        return {"role": self.role, "content": self.content}
+        # Messages are not edited after creation, so the API dict is built once
+        if self._api_dict is None:
+            self._api_dict = {"role": self.role, "content": self.content}
+        return self._api_dict
 
 
 class LLMProvider(ABC):
@@ -25,7 +47,10 @@ class LLMProvider(ABC):
 
     @abstractmethod
     def generate_response(
-        self, messages: List[Message], system_prompt: Optional[str] = None
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """
         Generate AI response.
@@ -33,44 +58,116 @@ class LLMProvider(ABC):
         Args:
             messages: Conversation history
             system_prompt: Optional system prompt
+            deadline: Optional turn deadline; sets the request timeout and
+                may switch to a faster model or shorter reply
 
         Returns:
             AI response text
         """
         pass
 
+    def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """
+        Generate AI response incrementally.
+
+        Providers without native streaming yield the whole response at once.
+
+        Args:
+            messages: Conversation history
+            system_prompt: Optional system prompt
+            deadline: Optional turn deadline
+
+        Yields:
+            Text deltas of the AI response
+        """
+        yield self.generate_response(messages, system_prompt, deadline)
+
+
+def build_openai_messages(
+    messages: List[Message], system_prompt: Optional[str]
+) -> List[Dict[str, str]]:
+    """Build the OpenAI chat messages list."""
+    api_messages = []
+
+    if system_prompt:
+        api_messages.append({"role": "system", "content": system_prompt})
+
+    api_messages.extend([msg.to_dict() for msg in messages])
+    return api_messages
+
+
+def build_anthropic_system(system_prompt: Optional[str]):
+    """
+    Build the Anthropic system parameter.
+
+    Prompts made of stable segments (see ai.context.SystemPrompt) become
+    text blocks marked for prompt caching, so the base prompt and rolling
+    summary are served from Anthropic's cache on later turns.
+    """
+    system_prompt = system_prompt or "You are a helpful AI assistant."
+    segments = getattr(system_prompt, "segments", None)
+    if not segments:
+        return system_prompt
+
+    return [
+        {"type": "text", "text": segment, "cache_control": {"type": "ephemeral"}}
+        for segment in segments
+    ]
+
 
 class OpenAILLM(LLMProvider):
     """OpenAI GPT for AI responses."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4-turbo-preview"):
+    pool_kind = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4-turbo-preview",
+        fast_model: Optional[str] = FAST_MODELS["openai"],
+        max_tokens: Optional[int] = None,
+    ):
         """
         Initialize OpenAI LLM.
 
         Args:
             api_key: OpenAI API key
             model: GPT model to use
+            fast_model: Model used when a turn is short on time
+            max_tokens: Response token limit (None = model default)
         """
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
         self.model = model
+        self.fast_model = fast_model
+        self.max_tokens = max_tokens
         logger.info(f"Initialized OpenAI LLM with model {model}")
 
+    @property
+    def client(self) -> "OpenAI":
+        """Shared pooled OpenAI client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
     def generate_response(
-        self, messages: List[Message], system_prompt: Optional[str] = None
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """Generate response using OpenAI GPT."""
         try:
-            # Build messages list
-            api_messages = []
-
-            if system_prompt:
-                api_messages.append({"role": "system", "content": system_prompt})
-
-            api_messages.extend([msg.to_dict() for msg in messages])
+            api_messages = build_openai_messages(messages, system_prompt)
 
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model, messages=api_messages, temperature=0.7
+            options = request_options(
+                deadline, "llm", self.model, self.fast_model, self.max_tokens
+            )
+            response = client_for(self.client, deadline).chat.completions.create(
+                messages=api_messages, temperature=0.7, **options
             )
 
             text = response.choices[0].message.content
@@ -81,24 +178,77 @@ class OpenAILLM(LLMProvider):
             logger.error(f"LLM error: {e}")
             raise
 
+    def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """Stream response tokens using OpenAI GPT."""
+        try:
+            api_messages = build_openai_messages(messages, system_prompt)
+
+            options = request_options(
+                deadline, "llm", self.model, self.fast_model, self.max_tokens
+            )
+            stream = client_for(self.client, deadline).chat.completions.create(
+                messages=api_messages, temperature=0.7, stream=True, **options
+            )
+
+            try:
+                with abort_on_cancel(stream.response.close):
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            yield delta
+            finally:
+                # Abort the request when the consumer stops early (e.g. barge-in)
+                stream.response.close()
+
+        except Exception as e:
+            logger.error(f"LLM stream error: {e}")
+            raise
+
 
 class AnthropicLLM(LLMProvider):
     """Anthropic Claude for AI responses."""
 
-    def __init__(self, api_key: str, model: str = "claude-3-opus-20240229"):
+    pool_kind = "anthropic"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-3-opus-20240229",
+        fast_model: Optional[str] = FAST_MODELS["anthropic"],
+        max_tokens: int = 1024,
+    ):
         """
         Initialize Anthropic LLM.
 
         Args:
             api_key: Anthropic API key
             model: Claude model to use
+            fast_model: Model used when a turn is short on time
+            max_tokens: Response token limit
         """
-        self.client = Anthropic(api_key=api_key)
+        self.api_key = api_key
         self.model = model
+        self.fast_model = fast_model
+        self.max_tokens = max_tokens
         logger.info(f"Initialized Anthropic LLM with model {model}")
 
+    @property
+    def client(self) -> "Anthropic":
+        """Shared pooled Anthropic client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
     def generate_response(
-        self, messages: List[Message], system_prompt: Optional[str] = None
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """Generate response using Anthropic Claude."""
         try:
@@ -106,11 +256,12 @@ class AnthropicLLM(LLMProvider):
             api_messages = [msg.to_dict() for msg in messages]
 
             # Call Claude API
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1024,
-                system=system_prompt or "You are a helpful AI assistant.",
+            response = client_for(self.client, deadline).messages.create(
+                system=build_anthropic_system(system_prompt),
                 messages=api_messages,
+                **request_options(
+                    deadline, "llm", self.model, self.fast_model, self.max_tokens
+                ),
             )
 
             text = response.content[0].text
@@ -121,26 +272,422 @@ class AnthropicLLM(LLMProvider):
             logger.error(f"LLM error: {e}")
             raise
 
+    def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """Stream response tokens using Anthropic Claude."""
+        try:
+            api_messages = [msg.to_dict() for msg in messages]
+
+            with client_for(self.client, deadline).messages.stream(
+                system=build_anthropic_system(system_prompt),
+                messages=api_messages,
+                **request_options(
+                    deadline, "llm", self.model, self.fast_model, self.max_tokens
+                ),
+            ) as stream, abort_on_cancel(stream.close):
+                for text in stream.text_stream:
+                    yield text
+
+        except Exception as e:
+            logger.error(f"LLM stream error: {e}")
+            raise
+
 
 class LocalLLM(LLMProvider):
-    """Local LLM (placeholder for local models)."""
+    """
+    Local GGUF model run in-process by llama.cpp (llama-cpp-python).
+
+    Each conversation's evaluated prompt state is kept in a RAM cache keyed
+    by its tokens, so a new turn restores the longest cached prefix and
+    only evaluates the tokens added since. The least recently used states
+    are evicted once the cache exceeds its memory budget.
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        n_ctx: int = 4096,
+        n_threads: Optional[int] = None,
+        cache_mb: int = 1024,
+        max_tokens: int = 512,
+    ):
+        """
+        Initialize local LLM.
+
+        Args:
+            model_path: Path to a GGUF model file
+            n_ctx: Context window in tokens
+            n_threads: CPU threads for inference (None = llama.cpp default)
+            cache_mb: Memory budget for cached conversation KV states
+            max_tokens: Response token limit
+        """
+        if not model_path:
+            raise ValueError("Local LLM model path required (set AI_MODEL)")
 
-    def __init__(self, model_path: Optional[str] = None):
-        """Initialize local LLM."""
-        logger.info("Initialized Local LLM (not implemented)")
-        # TODO: Implement local model (e.g., llama.cpp, Ollama)
+        from llama_cpp import Llama, LlamaRAMCache  # needs llama-cpp-python
+
+        self.model = os.path.basename(model_path)
+        self.max_tokens = max_tokens
+        self.llama = Llama(
+            model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False
+        )
+        self.llama.set_cache(LlamaRAMCache(capacity_bytes=cache_mb * 1024 * 1024))
+        # llama.cpp contexts are not thread-safe; generate one reply at a time
+        self.lock = threading.Lock()
+        logger.info(f"Initialized Local LLM {self.model} (n_ctx={n_ctx}, cache={cache_mb}MB)")
 
     def generate_response(
-        self, messages: List[Message], system_prompt: Optional[str] = None
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response using the local model."""
+        text = "".join(self.generate_response_stream(messages, system_prompt, deadline))
+        logger.info(f"Generated response: {text[:100]}...")
+        return text
+
+    def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """
+        Stream response tokens from the local model.
+
+        Generation runs on its own thread, which holds the model lock only
+        while generating. A consumer that stops early (barge-in) or abandons
+        the stream does not keep other sessions waiting on the lock.
+        """
+        max_tokens = deadline.max_tokens(self.max_tokens) if deadline else self.max_tokens
+        events: "queue.Queue" = queue.Queue()
+        stop = threading.Event()
+        threading.Thread(
+            target=self._generate,
+            args=(messages, system_prompt, max_tokens, deadline, events, stop),
+            name="local-llm",
+            daemon=True,
+        ).start()
+
+        try:
+            while True:
+                item = events.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def _generate(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str],
+        max_tokens: int,
+        deadline: Optional[Deadline],
+        events: "queue.Queue",
+        stop: threading.Event,
+    ):
+        """Generate under the model lock, queueing deltas, then None or the error."""
+        try:
+            with self.lock:
+                stream = self.llama.create_chat_completion(
+                    build_openai_messages(messages, system_prompt),
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+                try:
+                    for chunk in stream:
+                        if stop.is_set():
+                            return
+                        delta = chunk["choices"][0]["delta"].get("content")
+                        if delta:
+                            events.put(delta)
+                        if deadline is not None:
+                            deadline.check("llm")
+                finally:
+                    stream.close()
+            events.put(None)
+
+        except Exception as e:
+            logger.error(f"LLM stream error: {e}")
+            events.put(e)
+
+
+class AsyncLLMProvider(ABC):
+    """Abstract base class for asyncio LLM providers."""
+
+    @abstractmethod
+    async def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
-        """Generate response using local LLM."""
-        # TODO: Implement local generation
-        logger.warning("Local LLM not implemented, returning placeholder")
-        return "Local LLM not implemented yet. Please configure a cloud provider."
+        """
+        Generate AI response.
+
+        Args:
+            messages: Conversation history
+            system_prompt: Optional system prompt
+            deadline: Optional turn deadline; sets the request timeout and
+                may switch to a faster model or shorter reply
+
+        Returns:
+            AI response text
+        """
+        pass
+
+    async def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Generate AI response incrementally.
+
+        Args:
+            messages: Conversation history
+            system_prompt: Optional system prompt
+            deadline: Optional turn deadline
+
+        Yields:
+            Text deltas of the AI response
+        """
+        yield await self.generate_response(messages, system_prompt, deadline)
+
+
+class AsyncOpenAILLM(AsyncLLMProvider):
+    """OpenAI GPT using the SDK's asyncio client."""
+
+    pool_kind = "async_openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4-turbo-preview",
+        fast_model: Optional[str] = FAST_MODELS["openai"],
+        max_tokens: Optional[int] = None,
+    ):
+        """
+        Initialize async OpenAI LLM.
+
+        Args:
+            api_key: OpenAI API key
+            model: GPT model to use
+            fast_model: Model used when a turn is short on time
+            max_tokens: Response token limit (None = model default)
+        """
+        self.api_key = api_key
+        self.model = model
+        self.fast_model = fast_model
+        self.max_tokens = max_tokens
+        logger.info(f"Initialized async OpenAI LLM with model {model}")
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """Shared pooled asyncio OpenAI client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
+    async def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response using OpenAI GPT."""
+        try:
+            response = await client_for(self.client, deadline).chat.completions.create(
+                messages=build_openai_messages(messages, system_prompt),
+                temperature=0.7,
+                **request_options(
+                    deadline, "llm", self.model, self.fast_model, self.max_tokens
+                ),
+            )
+
+            text = response.choices[0].message.content
+            logger.info(f"Generated response: {text[:100]}...")
+            return text
+
+        except Exception as e:
+            logger.error(f"LLM error: {e}")
+            raise
+
+    async def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[str]:
+        """Stream response tokens using OpenAI GPT."""
+        try:
+            stream = await client_for(self.client, deadline).chat.completions.create(
+                messages=build_openai_messages(messages, system_prompt),
+                temperature=0.7,
+                stream=True,
+                **request_options(
+                    deadline, "llm", self.model, self.fast_model, self.max_tokens
+                ),
+            )
+
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                # Abort the request when the consumer stops early (e.g. barge-in)
+                await stream.response.aclose()
+
+        except Exception as e:
+            logger.error(f"LLM stream error: {e}")
+            raise
+
+
+class AsyncAnthropicLLM(AsyncLLMProvider):
+    """Anthropic Claude using the SDK's asyncio client."""
+
+    pool_kind = "async_anthropic"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-3-opus-20240229",
+        fast_model: Optional[str] = FAST_MODELS["anthropic"],
+        max_tokens: int = 1024,
+    ):
+        """
+        Initialize async Anthropic LLM.
+
+        Args:
+            api_key: Anthropic API key
+            model: Claude model to use
+            fast_model: Model used when a turn is short on time
+            max_tokens: Response token limit
+        """
+        self.api_key = api_key
+        self.model = model
+        self.fast_model = fast_model
+        self.max_tokens = max_tokens
+        logger.info(f"Initialized async Anthropic LLM with model {model}")
+
+    @property
+    def client(self) -> "AsyncAnthropic":
+        """Shared pooled asyncio Anthropic client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
+    async def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response using Anthropic Claude."""
+        try:
+            response = await client_for(self.client, deadline).messages.create(
+                system=build_anthropic_system(system_prompt),
+                messages=[msg.to_dict() for msg in messages],
+                **request_options(
+                    deadline, "llm", self.model, self.fast_model, self.max_tokens
+                ),
+            )
+
+            text = response.content[0].text
+            logger.info(f"Generated response: {text[:100]}...")
+            return text
+
+        except Exception as e:
+            logger.error(f"LLM error: {e}")
+            raise
+
+    async def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[str]:
+        """Stream response tokens using Anthropic Claude."""
+        try:
+            async with client_for(self.client, deadline).messages.stream(
+                system=build_anthropic_system(system_prompt),
+                messages=[msg.to_dict() for msg in messages],
+                **request_options(
+                    deadline, "llm", self.model, self.fast_model, self.max_tokens
+                ),
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+
+        except Exception as e:
+            logger.error(f"LLM stream error: {e}")
+            raise
+
+
+class ThreadedLLM(AsyncLLMProvider):
+    """Runs a blocking LLM provider on worker threads."""
+
+    def __init__(self, provider: LLMProvider):
+        """
+        Initialize threaded LLM.
+
+        Args:
+            provider: Blocking provider to wrap (e.g. LocalLLM)
+        """
+        self.provider = provider
+
+    async def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response on a worker thread."""
+        return await asyncio.to_thread(
+            self.provider.generate_response, list(messages), system_prompt, deadline
+        )
+
+    async def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[str]:
+        """Stream response, pulling each delta on a worker thread."""
+        iterator = self.provider.generate_response_stream(
+            list(messages), system_prompt, deadline
+        )
+        try:
+            while True:
+                delta = await asyncio.to_thread(next, iterator, None)
+                if delta is None:
+                    break
+                yield delta
+        finally:
+            try:
+                iterator.close()
+            except ValueError:
+                # Cancelled while a worker thread is still inside next(); the
+                # generator is closed when that call returns and drops it
+                pass
 
 
 def create_llm_provider(
-    provider: str, api_key: Optional[str] = None, model: Optional[str] = None
+    provider: str,
+    api_key: Optional[str] = None,
+    model: Optional[str] = None,
+    fast_model: Optional[str] = None,
+    n_ctx: int = 4096,
+    cache_mb: int = 1024,
 ) -> LLMProvider:
     """
     Factory function to create LLM provider.
@@ -149,6 +696,9 @@ def create_llm_provider(
         provider: Provider name ('openai', 'anthropic', or 'local')
         api_key: API key for cloud providers
         model: Model name
+        fast_model: Model used when a turn is short on time (default per provider)
+        n_ctx: Context window of the local model
+        cache_mb: KV-cache memory budget of the local model
 
     Returns:
         LLM provider instance
@@ -156,12 +706,59 @@ def create_llm_provider(
     if provider == "openai":
         if not api_key:
             raise ValueError("OpenAI API key required")
-        return OpenAILLM(api_key, model or "gpt-4-turbo-preview")
+        return OpenAILLM(
+            api_key, model or "gpt-4-turbo-preview", fast_model or FAST_MODELS["openai"]
+        )
     elif provider == "anthropic":
         if not api_key:
             raise ValueError("Anthropic API key required")
-        return AnthropicLLM(api_key, model or "claude-3-opus-20240229")
+        return AnthropicLLM(
+            api_key, model or "claude-3-opus-20240229", fast_model or FAST_MODELS["anthropic"]
+        )
     elif provider == "local":
-        return LocalLLM()
+        return LocalLLM(model, n_ctx=n_ctx, cache_mb=cache_mb)
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def create_async_llm_provider(
+    provider: str,
+    api_key: Optional[str] = None,
+    model: Optional[str] = None,
+    fast_model: Optional[str] = None,
+    n_ctx: int = 4096,
+    cache_mb: int = 1024,
+) -> AsyncLLMProvider:
+    """
+    Factory function to create asyncio LLM provider.
+
+    Cloud providers use the SDKs' async clients; anything else runs the
+    blocking provider on worker threads.
+
+    Args:
+        provider: Provider name ('openai', 'anthropic', or 'local')
+        api_key: API key for cloud providers
+        model: Model name
+        fast_model: Model used when a turn is short on time (default per provider)
+        n_ctx: Context window of the local model
+        cache_mb: KV-cache memory budget of the local model
+
+    Returns:
+        Async LLM provider instance
+    """
+    if provider == "openai":
+        if not api_key:
+            raise ValueError("OpenAI API key required")
+        return AsyncOpenAILLM(
+            api_key, model or "gpt-4-turbo-preview", fast_model or FAST_MODELS["openai"]
+        )
+    elif provider == "anthropic":
+        if not api_key:
+            raise ValueError("Anthropic API key required")
+        return AsyncAnthropicLLM(
+            api_key, model or "claude-3-opus-20240229", fast_model or FAST_MODELS["anthropic"]
+        )
+    else:
+        return ThreadedLLM(
+            create_llm_provider(provider, api_key, model, fast_model, n_ctx, cache_mb)
+        )
@@ -0,0 +1,365 @@
+"""Response cache for LLM providers."""
+
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from ai.deadline import Deadline
+from ai.llm import AsyncLLMProvider, LLMProvider, Message
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+TRAILING_PUNCTUATION = re.compile(r"[\s.!?,;:]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different phrasings share a cache entry."""
+    text = WHITESPACE.sub(" ", text.strip().lower())
+    return TRAILING_PUNCTUATION.sub("", text)
+
+
+def leader_error(error: BaseException) -> Exception:
+    """Error handed to waiters when the leading request did not complete."""
+    if isinstance(error, Exception):
+        return error
+    return RuntimeError("Leading request was abandoned")
+
+
+class ResponseCache:
+    """
+    TTL + LRU store of LLM responses keyed on normalized context.
+
+    Only conversations whose whole history fits in the last context_turns
+    messages are cached by default, so a hit never ignores earlier context.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entries: int = 1000,
+        context_turns: int = 3,
+        full_context_only: bool = True,
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            ttl: Seconds an entry stays valid
+            max_entries: Entries kept before least recently used are evicted
+            context_turns: Trailing messages included in the key
+            full_context_only: Skip caching when the history is longer than
+                context_turns (otherwise older messages are ignored)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.context_turns = context_turns
+        self.full_context_only = full_context_only
+
+        self.entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def key(
+        self, model: str, messages: List[Message], system_prompt: Optional[str]
+    ) -> Optional[str]:
+        """Cache key for a request, or None if it should not be cached."""
+        if not messages or messages[-1].role != "user":
+            return None
+        if self.full_context_only and len(messages) > self.context_turns:
+            return None
+
+        parts = [model, normalize_text(system_prompt or "")]
+        for msg in messages[-self.context_turns:]:
+            parts.append(f"{msg.role}:{normalize_text(msg.content)}")
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a live entry."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str):
+        """Store a response."""
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, text)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def record(self, hit: bool = False, coalesced: bool = False):
+        """Update hit/miss counters."""
+        with self.lock:
+            if coalesced:
+                self.coalesced += 1
+            if hit or coalesced:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self.entries),
+            }
+
+
+class CachedLLM(LLMProvider):
+    """
+    LLM provider wrapper that serves repeated requests from a ResponseCache.
+
+    Identical requests that arrive while one is in flight wait for it and
+    share its result instead of calling the provider again.
+    """
+
+    def __init__(self, provider: LLMProvider, cache: Optional[ResponseCache] = None):
+        """
+        Initialize cached LLM.
+
+        Args:
+            provider: Provider used on cache misses
+            cache: Response cache
+        """
+        self.provider = provider
+        self.cache = cache or ResponseCache()
+        self.model = getattr(provider, "model", type(provider).__name__)
+        self.in_flight: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+
+    def _lookup(self, key: str) -> Tuple[Optional[str], Optional[Future], bool]:
+        """Return (cached_text, future, is_leader) for a cacheable request."""
+        text = self.cache.get(key)
+        if text is not None:
+            self.cache.record(hit=True)
+            return text, None, False
+
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.cache.record(coalesced=True)
+                return None, future, False
+            future = Future()
+            self.in_flight[key] = future
+
+        self.cache.record()
+        return None, future, True
+
+    def _finish(
+        self,
+        key: str,
+        future: Future,
+        text: Optional[str],
+        error: Optional[Exception],
+        full_quality: bool = True,
+    ):
+        """
+        Publish the leader's result to the cache and any waiters.
+
+        Replies generated for a degraded deadline (faster model, fewer
+        tokens) are handed to waiters but not cached under the full-quality key.
+        """
+        with self.lock:
+            self.in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            if full_quality:
+                self.cache.put(key, text)
+            future.set_result(text)
+
+    def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response, using the cache when possible."""
+        key = self.cache.key(self.model, messages, system_prompt)
+        if key is None:
+            return self.provider.generate_response(messages, system_prompt, deadline)
+
+        text, future, is_leader = self._lookup(key)
+        if text is not None:
+            logger.info("LLM cache hit")
+            return text
+        if not is_leader:
+            return future.result()
+
+        full_quality = deadline is None or not deadline.degraded
+        try:
+            text = self.provider.generate_response(messages, system_prompt, deadline)
+        except Exception as e:
+            self._finish(key, future, None, e)
+            raise
+        self._finish(key, future, text, None, full_quality)
+        return text
+
+    def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """Stream response, using the cache when possible."""
+        key = self.cache.key(self.model, messages, system_prompt)
+        if key is None:
+            yield from self.provider.generate_response_stream(messages, system_prompt, deadline)
+            return
+
+        text, future, is_leader = self._lookup(key)
+        if text is not None:
+            logger.info("LLM cache hit")
+            yield text
+            return
+        if not is_leader:
+            yield future.result()
+            return
+
+        full_quality = deadline is None or not deadline.degraded
+        parts: List[str] = []
+        try:
+            for delta in self.provider.generate_response_stream(messages, system_prompt, deadline):
+                parts.append(delta)
+                yield delta
+        except BaseException as e:
+            # BaseException also covers GeneratorExit when the consumer stops early
+            self._finish(key, future, None, leader_error(e))
+            raise
+        self._finish(key, future, "".join(parts), None, full_quality)
+
+
+class AsyncCachedLLM(AsyncLLMProvider):
+    """Async LLM provider wrapper that serves repeated requests from a ResponseCache."""
+
+    def __init__(self, provider: AsyncLLMProvider, cache: Optional[ResponseCache] = None):
+        """
+        Initialize async cached LLM.
+
+        Args:
+            provider: Provider used on cache misses
+            cache: Response cache
+        """
+        self.provider = provider
+        self.cache = cache or ResponseCache()
+        self.model = getattr(provider, "model", type(provider).__name__)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
+    def _lookup(self, key: str) -> Tuple[Optional[str], Optional[asyncio.Future], bool]:
+        """Return (cached_text, future, is_leader) for a cacheable request."""
+        text = self.cache.get(key)
+        if text is not None:
+            self.cache.record(hit=True)
+            return text, None, False
+
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.cache.record(coalesced=True)
+            return None, future, False
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        self.cache.record()
+        return None, future, True
+
+    def _finish(
+        self,
+        key: str,
+        future: asyncio.Future,
+        text: Optional[str],
+        error: Optional[Exception],
+        full_quality: bool = True,
+    ):
+        """
+        Publish the leader's result to the cache and any waiters.
+
+        Replies generated for a degraded deadline (faster model, fewer
+        tokens) are handed to waiters but not cached under the full-quality key.
+        """
+        self.in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+            # Nobody may be waiting; don't warn about an unretrieved exception
+            future.exception()
+        else:
+            if full_quality:
+                self.cache.put(key, text)
+            future.set_result(text)
+
+    async def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response, using the cache when possible."""
+        key = self.cache.key(self.model, messages, system_prompt)
+        if key is None:
+            return await self.provider.generate_response(messages, system_prompt, deadline)
+
+        text, future, is_leader = self._lookup(key)
+        if text is not None:
+            logger.info("LLM cache hit")
+            return text
+        if not is_leader:
+            return await asyncio.shield(future)
+
+        full_quality = deadline is None or not deadline.degraded
+        try:
+            text = await self.provider.generate_response(messages, system_prompt, deadline)
+        except BaseException as e:
+            self._finish(key, future, None, leader_error(e))
+            raise
+        self._finish(key, future, text, None, full_quality)
+        return text
+
+    async def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[str]:
+        """Stream response, using the cache when possible."""
+        key = self.cache.key(self.model, messages, system_prompt)
+        if key is None:
+            async for delta in self.provider.generate_response_stream(messages, system_prompt, deadline):
+                yield delta
+            return
+
+        text, future, is_leader = self._lookup(key)
+        if text is not None:
+            logger.info("LLM cache hit")
+            yield text
+            return
+        if not is_leader:
+            yield await asyncio.shield(future)
+            return
+
+        full_quality = deadline is None or not deadline.degraded
+        parts: List[str] = []
+        try:
+            async for delta in self.provider.generate_response_stream(messages, system_prompt, deadline):
+                parts.append(delta)
+                yield delta
+        except BaseException as e:
+            self._finish(key, future, None, leader_error(e))
+            raise
+        self._finish(key, future, "".join(parts), None, full_quality)
@@ -0,0 +1,282 @@
+"""Offline Whisper transcription on a pool of warm worker processes."""
+
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from audio.convert import pcm16_to_float, resample
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SAMPLE_RATE = 16000
+
+# Utterances up to this length are decoded together in one batched pass;
+# longer audio goes through faster-whisper's segmenting transcribe()
+MAX_BATCHED_SECONDS = 30
+
+# (audio, sample_rate or None for an encoded file, language)
+Request = Tuple[bytes, Optional[int], Optional[str]]
+
+# Model loaded once per worker process by load_worker_model()
+_model = None
+
+
+def load_worker_model(model_name: str, compute_type: str, cpu_threads: int):
+    """Process pool initializer: load the quantized model into this worker."""
+    global _model
+    from faster_whisper import WhisperModel
+
+    _model = WhisperModel(
+        model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads
+    )
+
+
+def worker_ready() -> int:
+    """No-op task used to wait for a worker's model to load."""
+    return os.getpid()
+
+
+def pcm_to_float(pcm: bytes, sample_rate: int) -> np.ndarray:
+    """16-bit mono PCM as float32 samples at Whisper's 16 kHz."""
+    return resample(pcm16_to_float(pcm), sample_rate, WHISPER_SAMPLE_RATE)
+
+
+def transcribe_batch(requests: List[Request]) -> List[Union[str, Exception]]:
+    """
+    Transcribe a batch of utterances in a worker process.
+
+    Short utterances share one batched encoder and decoder pass; the
+    result for a failed item is an exception instead of text.
+    """
+    from faster_whisper.audio import decode_audio, pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+
+    results: List[Union[str, Exception]] = [""] * len(requests)
+    batch: List[int] = []
+    features = []
+
+    for i, (audio, sample_rate, language) in enumerate(requests):
+        try:
+            if sample_rate is None:
+                samples = decode_audio(io.BytesIO(audio), sampling_rate=WHISPER_SAMPLE_RATE)
+            else:
+                samples = pcm_to_float(audio, sample_rate)
+
+            if len(samples) > MAX_BATCHED_SECONDS * WHISPER_SAMPLE_RATE:
+                segments, _ = _model.transcribe(
+                    samples, language=language, beam_size=1, condition_on_previous_text=False
+                )
+                results[i] = "".join(segment.text for segment in segments).strip()
+            elif len(samples):
+                batch.append(i)
+                features.append(pad_or_trim(_model.feature_extractor(samples)))
+        except Exception as e:
+            results[i] = worker_error(e)
+
+    if not batch:
+        return results
+
+    try:
+        encoder_output = _model.encode(np.stack(features))
+        languages = [requests[i][2] for i in batch]
+        if _model.model.is_multilingual and None in languages:
+            detected = _model.model.detect_language(encoder_output)
+            languages = [
+                language or candidates[0][0][2:-2]
+                for language, candidates in zip(languages, detected)
+            ]
+
+        tokenizers = [
+            Tokenizer(
+                _model.hf_tokenizer,
+                _model.model.is_multilingual,
+                task="transcribe",
+                language=language or "en",
+            )
+            for language in languages
+        ]
+        prompts = [
+            list(tokenizer.sot_sequence) + [tokenizer.no_timestamps] for tokenizer in tokenizers
+        ]
+        generated = _model.model.generate(
+            encoder_output, prompts, beam_size=1, suppress_blank=True
+        )
+        for i, tokenizer, result in zip(batch, tokenizers, generated):
+            results[i] = tokenizer.decode(result.sequences_ids[0]).strip()
+    except Exception as e:
+        for i in batch:
+            results[i] = worker_error(e)
+
+    return results
+
+
+def worker_error(error: Exception) -> Exception:
+    """An exception that survives pickling back to the parent process."""
+    return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+class WhisperPool:
+    """
+    Whisper transcription on a pool of worker processes, one per core.
+
+    Each worker loads the quantized model once at startup. Requests that
+    arrive within batch_window of each other (e.g. several sessions ending
+    utterances at once) are grouped into batches spread over the workers,
+    each decoded in a single batched pass.
+    """
+
+    def __init__(
+        self,
+        model: str = "base",
+        compute_type: str = "int8",
+        workers: Optional[int] = None,
+        batch_window: float = 0.01,
+        max_batch: int = 8,
+    ):
+        """
+        Initialize Whisper pool.
+
+        Args:
+            model: faster-whisper model name or path (e.g. 'base.en', 'small')
+            compute_type: Weight quantization ('int8', 'int8_float32', 'float32')
+            workers: Worker processes (None = number of CPU cores)
+            batch_window: Seconds to wait for more requests before dispatching
+            max_batch: Largest batch sent to one worker
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.model = model
+        self.compute_type = compute_type
+        self.executor = self._create_executor()
+        # Set once batches can no longer be dispatched; later submits fail with it
+        self.error: Optional[Exception] = None
+
+        self.pending: List[Tuple[Request, Future]] = []
+        self.ready = threading.Condition()
+        self.dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="whisper-batcher", daemon=True
+        )
+        self.dispatcher.start()
+        logger.info(f"Whisper pool: model {model} ({compute_type}), {self.workers} worker(s)")
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Start a pool of worker processes that each load the model."""
+        # Spawn rather than fork: the parent runs gRPC and HTTP threads
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_worker_model,
+            initargs=(self.model, self.compute_type, 1),
+        )
+
+    def warm(self):
+        """Start every worker and wait until each has loaded the model."""
+        tasks = [self.executor.submit(worker_ready) for _ in range(self.workers)]
+        pids = {task.result() for task in tasks}
+        logger.info(f"Whisper model loaded in {len(pids)} worker(s)")
+
+    def submit(
+        self, audio: bytes, sample_rate: Optional[int], language: Optional[str] = None
+    ) -> Future:
+        """
+        Queue an utterance for transcription.
+
+        Args:
+            audio: 16-bit mono PCM, or an encoded audio file if sample_rate is None
+            sample_rate: Sample rate of the PCM
+            language: Optional language code (e.g., 'en')
+
+        Returns:
+            Future resolving to the transcript
+        """
+        future: Future = Future()
+        with self.ready:
+            if self.error is not None:
+                future.set_exception(self.error)
+                return future
+            self.pending.append(((audio, sample_rate, language), future))
+            self.ready.notify()
+        return future
+
+    def _dispatch_loop(self):
+        """Group queued requests into batches and hand them to the workers."""
+        while True:
+            with self.ready:
+                while not self.pending:
+                    self.ready.wait()
+
+            # Give utterances ending at the same moment a chance to join
+            time.sleep(self.batch_window)
+            with self.ready:
+                pending, self.pending = self.pending, []
+
+            for batch in self._split(pending):
+                requests = [request for request, _ in batch]
+                futures = [future for _, future in batch]
+                try:
+                    task = self.executor.submit(transcribe_batch, requests)
+                except Exception as e:
+                    self._failed_dispatch(e)
+                    task = Future()
+                    task.set_exception(e)
+                task.add_done_callback(lambda task, futures=futures: self._resolve(task, futures))
+
+    def _failed_dispatch(self, error: Exception):
+        """
+        Handle a pool that refused a batch.
+
+        A broken pool (a worker died, e.g. OOM-killed) is replaced so later
+        requests get fresh workers. Any other error (e.g. after shutdown)
+        fails every later request instead of leaving it queued forever.
+        """
+        if isinstance(error, BrokenProcessPool) and self.error is None:
+            logger.error(f"Whisper worker died ({error}); restarting the pool")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._create_executor()
+            return
+
+        logger.error(f"Whisper pool unavailable: {error}")
+        with self.ready:
+            self.error = error
+            pending, self.pending = self.pending, []
+        for _, future in pending:
+            if not future.cancelled():
+                future.set_exception(error)
+
+    def _split(
+        self, pending: List[Tuple[Request, Future]]
+    ) -> List[List[Tuple[Request, Future]]]:
+        """Spread requests evenly over the workers, at most max_batch per batch."""
+        batches = max(min(len(pending), self.workers), -(-len(pending) // self.max_batch))
+        return [pending[i::batches] for i in range(batches)]
+
+    @staticmethod
+    def _resolve(task: Future, futures: List[Future]):
+        """Publish a batch's results to the callers' futures."""
+        try:
+            results = task.result()
+        except Exception as e:
+            results = [e] * len(futures)
+
+        for future, result in zip(futures, results):
+            if future.cancelled():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def shutdown(self):
+        """Stop the worker processes; later requests fail."""
+        with self.ready:
+            self.error = RuntimeError("Whisper pool is shut down")
+        self.executor.shutdown(wait=False, cancel_futures=True)
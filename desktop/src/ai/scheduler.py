@@ -0,0 +1,690 @@
+"""Scheduling of provider requests: per-key rate limits, priorities and adaptive concurrency."""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ai.context import estimate_tokens, message_tokens
+from ai.deadline import Deadline
+from ai.llm import AsyncLLMProvider, LLMProvider, Message
+from ai.stt import AsyncSTTProvider, STTProvider
+from ai.tts import AsyncTTSProvider, TTSProvider
+from audio.formats import PCM
+from metrics import QUEUE_WAIT_SECONDS, RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# Request priorities, most urgent first
+VOICE = 0  # a user is waiting for the reply
+SPECULATIVE = 1  # a reply the user may be about to wait for
+BACKGROUND = 2  # summaries, pre-rendered phrases
+
+PRIORITY_NAMES = {VOICE: "voice", SPECULATIVE: "speculative", BACKGROUND: "background"}
+
+# Longest Retry-After honoured from a 429, in seconds
+MAX_RETRY_AFTER = 30.0
+
+_current_priority: ContextVar[int] = ContextVar("request_priority", default=VOICE)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Give provider requests made in this context (and tasks it starts) a priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an SDK error is an HTTP 429 (OpenAI and Anthropic both set status_code)."""
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after(error: BaseException) -> float:
+    """Seconds the provider asked us to back off for, from the Retry-After header."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(headers.get("retry-after", 0))))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    """Allows per_minute units a minute, in bursts of up to a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available_in(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (amounts over capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit.
+
+    Every success adds 1/limit, so the limit grows by about one per
+    window of requests. A 429, or a first response slower than
+    latency_target, cuts it by backoff, at most once per cooldown so a
+    burst of failures from the same moment counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 16,
+        latency_target: float = 0.0,
+        backoff: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        """
+        Initialize adaptive concurrency.
+
+        Args:
+            initial: Starting limit
+            minimum: Lowest limit
+            maximum: Highest limit
+            latency_target: Seconds to a stream's first token or frame treated as
+                overload (0 disables)
+            backoff: Factor applied to the limit on overload
+            cooldown: Seconds between decreases
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.limit = float(min(maximum, max(minimum, initial)))
+        self.decreased_at = 0.0
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def on_success(self, latency: Optional[float], now: float, saturated: bool):
+        """
+        Record a completed request.
+
+        Args:
+            latency: Seconds to its first response (None if not measured)
+            now: Current monotonic time
+            saturated: Whether requests were using most of the limit, so a
+                larger one could have been used
+        """
+        if self.latency_target and latency is not None and latency > self.latency_target:
+            self.on_overload(now, f"first response after {latency:.2f}s")
+        elif saturated:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_overload(self, now: float, reason: str):
+        if now - self.decreased_at < self.cooldown:
+            return
+        self.decreased_at = now
+        previous = self.current
+        self.limit = max(float(self.minimum), self.limit * self.backoff)
+        if self.current != previous:
+            logger.info(f"Concurrency limit {previous} -> {self.current} ({reason})")
+
+
+@dataclass
+class RateLimits:
+    """Rate limits of one provider's API key; 0 means unlimited."""
+
+    requests_per_minute: float = 0.0
+    tokens_per_minute: float = 0.0
+
+
+class Waiter:
+    """A request queued for a slot."""
+
+    __slots__ = ("priority", "tokens", "enqueued", "granted", "wake")
+
+    def __init__(self, priority: int, tokens: int, wake: Callable[[], None]):
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.wake = wake
+
+
+class Ticket:
+    """A granted slot; released when the request ends."""
+
+    __slots__ = ("scheduler", "started", "latency", "released")
+
+    def __init__(self, scheduler: "ProviderScheduler"):
+        self.scheduler = scheduler
+        self.started = time.monotonic()
+        self.latency: Optional[float] = None
+        self.released = False
+
+    def first_response(self):
+        """
+        Mark a stream's first token or frame; its latency drives the concurrency limit.
+
+        Only streamed calls mark it. A unary call's duration grows with its
+        input or output (a long utterance, a whole clip), so it says nothing
+        about provider overload and leaves latency unset.
+        """
+        if self.latency is None:
+            self.latency = time.monotonic() - self.started
+
+    def release(self, error: Optional[BaseException] = None):
+        """
+        Give the slot back.
+
+        Args:
+            error: What the request raised. 429s cut the concurrency limit;
+                other errors (and cancellation) leave it as it is
+        """
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self, error)
+
+
+class ProviderScheduler:
+    """
+    Admits the requests made with one provider's API key.
+
+    Requests queue by priority (FIFO within one), and the head of the queue
+    is admitted once a concurrency slot is free and the request and token
+    buckets allow it. The concurrency limit adapts (AdaptiveConcurrency),
+    and a 429's Retry-After pauses admission for the whole key. Both
+    threads and asyncio tasks can wait; a deadline bounds the wait.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limits: Optional[RateLimits] = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        latency_target: float = 0.0,
+    ):
+        """
+        Initialize provider scheduler.
+
+        Args:
+            name: Label in logs and metrics
+            limits: Request and token rate limits of the key
+            max_concurrency: Upper bound of the adaptive concurrency limit
+            min_concurrency: Lower bound of the adaptive concurrency limit
+            latency_target: Seconds to a stream's first token or frame treated as
+                overload (0 disables)
+        """
+        limits = limits or RateLimits()
+        self.name = name
+        self.requests = TokenBucket(limits.requests_per_minute) if limits.requests_per_minute else None
+        self.tokens = TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(
+            max(min_concurrency, max_concurrency // 2),
+            min_concurrency,
+            max_concurrency,
+            latency_target,
+        )
+        self.queue: List[Tuple[int, int, Waiter]] = []
+        self.sequence = itertools.count()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.retry_at: Optional[float] = None
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0, deadline: Optional[Deadline] = None, stage: str = "") -> Ticket:
+        """Wait for a slot on this thread."""
+        event = threading.Event()
+        waiter = Waiter(current_priority(), tokens, event.set)
+        self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                event.wait(self._timeout(deadline))
+                event.clear()
+                self._retry(waiter, deadline, stage)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        return Ticket(self)
+
+    async def acquire_async(
+        self, tokens: int = 0, deadline: Optional[Deadline] = None, stage: str = ""
+    ) -> Ticket:
+        """Wait for a slot without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        # Slots may be freed (and granted) from other threads
+        waiter = Waiter(current_priority(), tokens, lambda: loop.call_soon_threadsafe(event.set))
+        self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                try:
+                    await asyncio.wait_for(event.wait(), self._timeout(deadline))
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+                self._retry(waiter, deadline, stage)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        return Ticket(self)
+
+    @contextmanager
+    def slot(self, tokens: int = 0, deadline: Optional[Deadline] = None, stage: str = "") -> Iterator[Ticket]:
+        """Hold a slot for the duration of a blocking request."""
+        ticket = self.acquire(tokens, deadline, stage)
+        try:
+            yield ticket
+        except BaseException as e:
+            ticket.release(e)
+            raise
+        ticket.release()
+
+    @asynccontextmanager
+    async def slot_async(
+        self, tokens: int = 0, deadline: Optional[Deadline] = None, stage: str = ""
+    ) -> AsyncIterator[Ticket]:
+        """Hold a slot for the duration of an asyncio request."""
+        ticket = await self.acquire_async(tokens, deadline, stage)
+        try:
+            yield ticket
+        except BaseException as e:
+            ticket.release(e)
+            raise
+        ticket.release()
+
+    def _enqueue(self, waiter: Waiter):
+        with self.lock:
+            heapq.heappush(self.queue, (waiter.priority, next(self.sequence), waiter))
+            self._dispatch()
+
+    def _timeout(self, deadline: Optional[Deadline]) -> Optional[float]:
+        """How long a waiter sleeps before retrying: until buckets refill or the deadline."""
+        with self.lock:
+            timeout = None if self.retry_at is None else max(0.0, self.retry_at - time.monotonic())
+        if deadline is not None:
+            remaining = deadline.remaining()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _retry(self, waiter: Waiter, deadline: Optional[Deadline], stage: str):
+        """After a wake-up: admit what the buckets now allow, or give up at the deadline."""
+        with self.lock:
+            if not waiter.granted:
+                self._dispatch()
+        if not waiter.granted and deadline is not None:
+            deadline.check(f"{stage} (queued for {self.name})")
+
+    def _dispatch(self):
+        """Admit queued requests in priority order while limits allow (lock held)."""
+        now = time.monotonic()
+        self.retry_at = None
+        while self.queue and self.in_flight < self.concurrency.current:
+            waiter = self.queue[0][2]
+            wait = self.paused_until - now
+            if self.requests is not None:
+                wait = max(wait, self.requests.available_in(1, now))
+            if self.tokens is not None and waiter.tokens:
+                wait = max(wait, self.tokens.available_in(waiter.tokens, now))
+            if wait > 0:
+                self.retry_at = now + wait
+                return
+
+            heapq.heappop(self.queue)
+            if self.requests is not None:
+                self.requests.take(1, now)
+            if self.tokens is not None and waiter.tokens:
+                self.tokens.take(waiter.tokens, now)
+            self.in_flight += 1
+            waiter.granted = True
+            QUEUE_WAIT_SECONDS.observe(
+                now - waiter.enqueued, self.name, PRIORITY_NAMES.get(waiter.priority, str(waiter.priority))
+            )
+            waiter.wake()
+
+    def _abandon(self, waiter: Waiter):
+        """Drop a waiter that gave up (deadline, cancellation), returning its slot if granted."""
+        with self.lock:
+            if waiter.granted:
+                self.in_flight -= 1
+            else:
+                self.queue = [entry for entry in self.queue if entry[2] is not waiter]
+                heapq.heapify(self.queue)
+            self._dispatch()
+
+    def _release(self, ticket: Ticket, error: Optional[BaseException]):
+        now = time.monotonic()
+        with self.lock:
+            saturated = self.in_flight * 2 >= self.concurrency.current
+            self.in_flight -= 1
+            if error is None:
+                self.concurrency.on_success(ticket.latency, now, saturated)
+            elif is_rate_limited(error):
+                self.rate_limited += 1
+                RATE_LIMITED.inc(self.name)
+                self.paused_until = max(self.paused_until, now + retry_after(error))
+                self.concurrency.on_overload(now, "rate limited")
+            self._dispatch()
+
+    def stats(self) -> Dict[str, float]:
+        """Current limit, requests in flight and queued, and 429s seen."""
+        with self.lock:
+            return {
+                "limit": self.concurrency.current,
+                "in_flight": self.in_flight,
+                "queued": len(self.queue),
+                "rate_limited": self.rate_limited,
+            }
+
+
+class SchedulerPool:
+    """One ProviderScheduler per provider and API key, shared by all providers using it."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimits]] = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        latency_target: float = 0.0,
+    ):
+        """
+        Initialize scheduler pool.
+
+        Args:
+            limits: Rate limits per provider ('openai', 'anthropic')
+            max_concurrency: Upper bound of each key's concurrency limit
+            min_concurrency: Lower bound of each key's concurrency limit
+            latency_target: Seconds to a stream's first token or frame treated as
+                overload (0 disables)
+        """
+        self.limits = limits or {}
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_target = latency_target
+        self.schedulers: Dict[Tuple[str, str], ProviderScheduler] = {}
+        self.lock = threading.Lock()
+
+    def get(self, provider: str, api_key: str) -> ProviderScheduler:
+        """The scheduler of a provider's API key, creating it if needed."""
+        fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        with self.lock:
+            scheduler = self.schedulers.get((provider, fingerprint))
+            if scheduler is None:
+                scheduler = ProviderScheduler(
+                    f"{provider}:{fingerprint[:6]}",
+                    self.limits.get(provider),
+                    self.max_concurrency,
+                    self.min_concurrency,
+                    self.latency_target,
+                )
+                self.schedulers[(provider, fingerprint)] = scheduler
+            return scheduler
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Stats of every scheduler, by name."""
+        with self.lock:
+            schedulers = list(self.schedulers.values())
+        return {scheduler.name: scheduler.stats() for scheduler in schedulers}
+
+
+_scheduler_pool: Optional[SchedulerPool] = None
+
+
+def get_scheduler_pool() -> SchedulerPool:
+    """The process-wide scheduler pool."""
+    global _scheduler_pool
+    if _scheduler_pool is None:
+        _scheduler_pool = SchedulerPool()
+    return _scheduler_pool
+
+
+def configure_scheduler_pool(**kwargs) -> SchedulerPool:
+    """Replace the process-wide scheduler pool (call before creating providers)."""
+    global _scheduler_pool
+    _scheduler_pool = SchedulerPool(**kwargs)
+    return _scheduler_pool
+
+
+def request_tokens(provider, messages: List[Message], system_prompt: Optional[str]) -> int:
+    """Tokens an LLM request counts against a limit: prompt estimate plus max_tokens."""
+    prompt = sum(message_tokens(message) for message in messages)
+    if system_prompt:
+        prompt += estimate_tokens(system_prompt)
+    return prompt + (getattr(provider, "max_tokens", None) or 0)
+
+
+class ScheduledLLM(LLMProvider):
+    """LLM provider wrapper whose requests wait for a ProviderScheduler slot."""
+
+    def __init__(self, provider: LLMProvider, scheduler: ProviderScheduler):
+        """
+        Initialize scheduled LLM.
+
+        Args:
+            provider: Provider making the requests
+            scheduler: Scheduler of the provider's API key
+        """
+        self.provider = provider
+        self.scheduler = scheduler
+        self.model = getattr(provider, "model", type(provider).__name__)
+
+    def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response once admitted."""
+        tokens = request_tokens(self.provider, messages, system_prompt)
+        with self.scheduler.slot(tokens, deadline, "llm"):
+            return self.provider.generate_response(messages, system_prompt, deadline)
+
+    def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        """Stream response once admitted, holding the slot until the stream ends."""
+        tokens = request_tokens(self.provider, messages, system_prompt)
+        with self.scheduler.slot(tokens, deadline, "llm") as ticket:
+            for delta in self.provider.generate_response_stream(messages, system_prompt, deadline):
+                ticket.first_response()
+                yield delta
+
+
+class AsyncScheduledLLM(AsyncLLMProvider):
+    """Async LLM provider wrapper whose requests wait for a ProviderScheduler slot."""
+
+    def __init__(self, provider: AsyncLLMProvider, scheduler: ProviderScheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+        self.model = getattr(provider, "model", type(provider).__name__)
+
+    async def generate_response(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Generate response once admitted."""
+        tokens = request_tokens(self.provider, messages, system_prompt)
+        async with self.scheduler.slot_async(tokens, deadline, "llm"):
+            return await self.provider.generate_response(messages, system_prompt, deadline)
+
+    async def generate_response_stream(
+        self,
+        messages: List[Message],
+        system_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[str]:
+        """Stream response once admitted, holding the slot until the stream ends."""
+        tokens = request_tokens(self.provider, messages, system_prompt)
+        async with self.scheduler.slot_async(tokens, deadline, "llm") as ticket:
+            async for delta in self.provider.generate_response_stream(messages, system_prompt, deadline):
+                ticket.first_response()
+                yield delta
+
+
+class ScheduledSTT(STTProvider):
+    """STT provider wrapper whose requests wait for a ProviderScheduler slot."""
+
+    def __init__(self, provider: STTProvider, scheduler: ProviderScheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe once admitted."""
+        with self.scheduler.slot(0, deadline, "stt"):
+            return self.provider.transcribe(audio_bytes, language, deadline)
+
+    def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw PCM once admitted."""
+        with self.scheduler.slot(0, deadline, "stt"):
+            return self.provider.transcribe_pcm(pcm, sample_rate, language, deadline)
+
+
+class AsyncScheduledSTT(AsyncSTTProvider):
+    """Async STT provider wrapper whose requests wait for a ProviderScheduler slot."""
+
+    def __init__(self, provider: AsyncSTTProvider, scheduler: ProviderScheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+
+    async def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe once admitted."""
+        async with self.scheduler.slot_async(0, deadline, "stt"):
+            return await self.provider.transcribe(audio_bytes, language, deadline)
+
+    async def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw PCM once admitted."""
+        async with self.scheduler.slot_async(0, deadline, "stt"):
+            return await self.provider.transcribe_pcm(pcm, sample_rate, language, deadline)
+
+
+class ScheduledTTS(TTSProvider):
+    """TTS provider wrapper whose requests wait for a ProviderScheduler slot."""
+
+    def __init__(self, provider: TTSProvider, scheduler: ProviderScheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+
+    def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Synthesize speech once admitted."""
+        with self.scheduler.slot(0, deadline, "tts"):
+            return self.provider.synthesize(text, deadline)
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The wrapped provider's output format."""
+        return self.provider.output_format(audio_format, sample_rate)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[bytes]:
+        """Stream speech once admitted, holding the slot until the stream ends."""
+        with self.scheduler.slot(0, deadline, "tts") as ticket:
+            for frame in self.provider.synthesize_stream(text, audio_format, sample_rate, deadline):
+                ticket.first_response()
+                yield frame
+
+
+class AsyncScheduledTTS(AsyncTTSProvider):
+    """Async TTS provider wrapper whose requests wait for a ProviderScheduler slot."""
+
+    def __init__(self, provider: AsyncTTSProvider, scheduler: ProviderScheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+
+    async def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Synthesize speech once admitted."""
+        async with self.scheduler.slot_async(0, deadline, "tts"):
+            return await self.provider.synthesize(text, deadline)
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The wrapped provider's output format."""
+        return self.provider.output_format(audio_format, sample_rate)
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[bytes]:
+        """Stream speech once admitted, holding the slot until the stream ends."""
+        async with self.scheduler.slot_async(0, deadline, "tts") as ticket:
+            async for frame in self.provider.synthesize_stream(text, audio_format, sample_rate, deadline):
+                ticket.first_response()
+                yield frame
+
+
+# Wrapper of each provider interface
+SCHEDULED_WRAPPERS = (
+    (LLMProvider, ScheduledLLM),
+    (AsyncLLMProvider, AsyncScheduledLLM),
+    (STTProvider, ScheduledSTT),
+    (AsyncSTTProvider, AsyncScheduledSTT),
+    (TTSProvider, ScheduledTTS),
+    (AsyncTTSProvider, AsyncScheduledTTS),
+)
+
+
+def scheduled(provider, scheduler: ProviderScheduler):
+    """Wrap an LLM, STT or TTS provider (sync or async) so its requests are scheduled."""
+    for interface, wrapper in SCHEDULED_WRAPPERS:
+        if isinstance(provider, interface):
+            return wrapper(provider, scheduler)
+    raise TypeError(f"Cannot schedule {type(provider).__name__}")
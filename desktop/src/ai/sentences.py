@@ -0,0 +1,71 @@
+"""Sentence segmentation for streaming LLM output."""
+
+import re
+from typing import List, Optional
+
+# Sentence terminator, optional closing quotes/brackets, then whitespace
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+
+# Abbreviations that end with a period but do not end a sentence
+ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e."}
+
+
+class SentenceChunker:
+    """Accumulates streamed text deltas and emits complete sentences."""
+
+    def __init__(self, min_chars: int = 8, max_chars: int = 250):
+        """
+        Initialize sentence chunker.
+
+        Args:
+            min_chars: Shortest sentence emitted on its own; shorter ones
+                are merged with the following sentence
+            max_chars: Longest buffered text before forcing a split at the
+                last comma or space
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Add a text delta.
+
+        Args:
+            delta: Newly generated text
+
+        Returns:
+            Sentences completed by this delta
+        """
+        self.buffer += delta
+        sentences = []
+        start = 0
+
+        for match in SENTENCE_END.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            words = candidate.split()
+            if words and words[-1].lower() in ABBREVIATIONS:
+                continue
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+
+        self.buffer = self.buffer[start:]
+
+        if len(self.buffer) > self.max_chars:
+            # Prefer a clause boundary; fall back to the last word boundary
+            split = self.buffer.rfind(", ", 0, self.max_chars)
+            if split < self.min_chars:
+                split = self.buffer.rfind(" ", 0, self.max_chars)
+            if split > 0:
+                sentences.append(self.buffer[:split + 1].strip())
+                self.buffer = self.buffer[split + 1:]
+
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return any remaining buffered text as a final sentence."""
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return remainder or None
@@ -0,0 +1,262 @@
+"""Speculative LLM generation from stable partial transcripts."""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Everything but letters, digits, apostrophes and whitespace
+PUNCTUATION = re.compile(r"[^\w\s']+")
+
+# Words whose presence doesn't change what the user asked for
+FILLER_WORDS = {
+    "um", "umm", "uh", "uhm", "er", "erm", "ah", "hmm", "mm", "oh",
+    "okay", "ok", "so", "well", "like", "just", "actually", "please",
+}
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercase text without punctuation or repeated whitespace."""
+    return " ".join(PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def word_distance(a: Sequence[str], b: Sequence[str]) -> int:
+    """Levenshtein distance between two word sequences."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, word in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other))
+            )
+        previous = current
+    return previous[-1]
+
+
+def transcripts_match(speculated: str, final: str, max_distance: float) -> bool:
+    """
+    Whether a response to speculated also answers final.
+
+    Both are normalized first; they match when equal. With max_distance
+    above 0 they also match when they differ only by filler words added
+    or removed (see FILLER_WORDS), up to max_distance of the longer one's
+    words. A substituted word never matches: "turn on the lights" and
+    "turn off the lights" are one word apart but ask for opposite things.
+    """
+    a = normalize_transcript(speculated).split()
+    b = normalize_transcript(final).split()
+    if a == b:
+        return True
+    if not a or not b or not max_distance:
+        return False
+    if [word for word in a if word not in FILLER_WORDS] != [
+        word for word in b if word not in FILLER_WORDS
+    ]:
+        return False
+    return word_distance(a, b) <= max_distance * max(len(a), len(b))
+
+
+class Speculation:
+    """
+    One speculative LLM stream.
+
+    Deltas are buffered by a background task from the moment it starts, so
+    a committed speculation replays what was generated while the user was
+    still finishing and then continues live.
+    """
+
+    __slots__ = ("text", "deltas", "done", "error", "changed", "task", "started")
+
+    def __init__(self, text: str, stream: AsyncIterator[str]):
+        """
+        Initialize speculation and start consuming its stream.
+
+        Args:
+            text: Partial transcript the response is generated for
+            stream: LLM response stream for that transcript
+        """
+        self.text = text
+        self.deltas: List[str] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.changed = asyncio.Event()
+        self.started = time.monotonic()
+        self.task = asyncio.create_task(self._pump(stream))
+
+    @property
+    def chars(self) -> int:
+        """Characters generated so far."""
+        return sum(len(delta) for delta in self.deltas)
+
+    async def _pump(self, stream: AsyncIterator[str]):
+        try:
+            async for delta in stream:
+                self.deltas.append(delta)
+                self.changed.set()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.changed.set()
+            await stream.aclose()
+
+    async def replay(self) -> AsyncIterator[str]:
+        """The buffered deltas, then the rest of the stream as it arrives."""
+        sent = 0
+        try:
+            while True:
+                while sent < len(self.deltas):
+                    yield self.deltas[sent]
+                    sent += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                self.changed.clear()
+                await self.changed.wait()
+        finally:
+            # Stopped early (deadline or barge-in): abort the request
+            self.cancel()
+
+    def cancel(self):
+        """Abort the LLM request if it is still running."""
+        if not self.done:
+            self.task.cancel()
+
+
+class Speculator:
+    """
+    Starts LLM responses from stable partial transcripts of each session.
+
+    A speculation starts when the transcriber reports a partial taken while
+    the user pauses. When the final transcript arrives it is committed if
+    the two match (see transcripts_match), hiding the LLM's time to first
+    token behind the end of the user's speech; otherwise it is cancelled and
+    the turn starts over. A newer stable partial that no longer matches
+    replaces the running speculation.
+    """
+
+    def __init__(self, max_distance: float = 0.0, pause_partial_ms: int = 250):
+        """
+        Initialize speculator.
+
+        Args:
+            max_distance: Filler words added or removed, as a fraction of
+                the transcript's words, up to which a speculation is
+                committed (0: only identical normalized transcripts)
+            pause_partial_ms: Pause after which the transcriber takes the
+                stable partial that speculation starts from
+        """
+        self.max_distance = max_distance
+        self.pause_partial_ms = pause_partial_ms
+        self.speculations: Dict[str, Speculation] = {}
+        self.lock = threading.Lock()
+
+        self.turns = 0
+        self.speculated_turns = 0
+        self.started = 0
+        self.committed = 0
+        self.discarded = 0
+        self.wasted_chars = 0
+        self.wasted_seconds = 0.0
+
+    def start(
+        self,
+        session_id: str,
+        text: str,
+        stream_factory: Callable[[], AsyncIterator[str]],
+    ) -> bool:
+        """
+        Speculate on a stable partial transcript.
+
+        Args:
+            session_id: Session the partial belongs to
+            text: The partial transcript
+            stream_factory: Starts the LLM stream for a user message of text
+
+        Returns:
+            Whether a new speculation was started (not when the running one
+            still matches)
+        """
+        current = self.speculations.get(session_id)
+        if current is not None:
+            if transcripts_match(current.text, text, self.max_distance):
+                return False
+            self._discard(session_id, "partial transcript changed")
+
+        self.speculations[session_id] = Speculation(text, stream_factory())
+        with self.lock:
+            self.started += 1
+        logger.info(f"Speculating on partial transcript of {session_id}: {text}")
+        return True
+
+    def claim(self, session_id: str, text: str) -> Optional[Speculation]:
+        """
+        The session's speculation if it matches the final transcript.
+
+        A speculation that does not match is cancelled; either way the
+        session has none afterwards.
+        """
+        with self.lock:
+            self.turns += 1
+        speculation = self.speculations.get(session_id)
+        if speculation is None:
+            return None
+
+        with self.lock:
+            self.speculated_turns += 1
+        if speculation.error is None and transcripts_match(
+            speculation.text, text, self.max_distance
+        ):
+            del self.speculations[session_id]
+            with self.lock:
+                self.committed += 1
+            logger.info(
+                f"Committed speculation for {session_id} "
+                f"({time.monotonic() - speculation.started:.2f}s ahead)"
+            )
+            return speculation
+
+        self._discard(session_id, "final transcript differs")
+        return None
+
+    def abandon(self, session_id: str, reason: str):
+        """Cancel the session's speculation, if any (e.g. no final transcript)."""
+        if session_id in self.speculations:
+            self._discard(session_id, reason)
+
+    def _discard(self, session_id: str, reason: str):
+        speculation = self.speculations.pop(session_id)
+        speculation.cancel()
+        with self.lock:
+            self.discarded += 1
+            self.wasted_chars += speculation.chars
+            self.wasted_seconds += time.monotonic() - speculation.started
+        logger.info(f"Discarded speculation for {session_id}: {reason}")
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """
+        Speculation rate and waste.
+
+        speculation_rate is the share of turns that were speculated on and
+        hit_rate the share of speculations committed (a turn can start
+        several); waste is what discarded speculations generated
+        (characters) and how long they ran (seconds).
+        """
+        with self.lock:
+            return {
+                "turns": self.turns,
+                "started": self.started,
+                "committed": self.committed,
+                "discarded": self.discarded,
+                "speculation_rate": self.speculated_turns / self.turns if self.turns else None,
+                "hit_rate": self.committed / self.started if self.started else None,
+                "wasted_chars": self.wasted_chars,
+                "wasted_seconds": self.wasted_seconds,
+            }
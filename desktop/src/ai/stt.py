@@ -1,35 +1,313 @@
 """Speech-to-Text module supporting multiple providers."""
 
+import asyncio
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional
-from openai import OpenAI
-import io
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional
+
+from ai.deadline import Deadline, client_for
+from ai.transport import get_client_pool
+
+from audio.buffer import AudioBuffer
+from audio.convert import pcm_to_wav
+from audio.decoder import AudioDecoder
+from audio.formats import audio_filename
+from audio.vad import Endpointer, Segment, VoiceActivityDetector
+from metrics import span
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger(__name__)
 
+# Whisper (API and local) works on 16 kHz mono; inbound audio is converted
+# to it once, as it arrives
+STT_SAMPLE_RATE = 16000
+
 
 class STTProvider(ABC):
     """Abstract base class for STT providers."""
 
     @abstractmethod
-    def transcribe(self, audio_bytes: bytes, language: Optional[str] = None) -> str:
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
         """
         Transcribe audio to text.
 
         Args:
             audio_bytes: Audio data in bytes
             language: Optional language code (e.g., 'en')
+            deadline: Optional turn deadline; sets the request timeout
 
         Returns:
             Transcribed text
         """
         pass
 
+    def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """
+        Transcribe raw 16-bit mono PCM audio.
+
+        Args:
+            pcm: 16-bit little-endian mono PCM (bytes or a memoryview)
+            sample_rate: Sample rate of the PCM data
+            language: Optional language code (e.g., 'en')
+            deadline: Optional turn deadline; sets the request timeout
+
+        Returns:
+            Transcribed text
+        """
+        return self.transcribe(pcm_to_wav(pcm, sample_rate), language, deadline)
+
+
+def timeout_option(deadline: Optional[Deadline]) -> dict:
+    """Request timeout for a transcription under an optional deadline."""
+    if deadline is None:
+        return {}
+    return {"timeout": deadline.timeout("stt")}
+
+
+@dataclass
+class TranscriptResult:
+    """A partial or final transcript of an utterance."""
+
+    text: str
+    is_final: bool
+    confidence: float = 1.0
+    stable: bool = False  # Partial covering all speech so far, taken in a pause
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of a chunked PCM utterance.
+
+    Audio is transcribed in the background as it arrives, producing partial
+    transcripts. An endpointer decides when the user has stopped talking; if
+    the latest partial already covers all detected speech it becomes the
+    final transcript without another provider call. Otherwise only the
+    speech found by the VAD is uploaded, and silence-only utterances are
+    never sent.
+
+    With pause_partial_ms set, a partial is also taken as soon as the user
+    pauses that long; it covers all speech so far, so it is reported as
+    stable and often becomes the final transcript as is.
+    """
+
+    # Shared by all streams so partials never block the receive path
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stt-partial")
+
+    def __init__(
+        self,
+        provider: STTProvider,
+        sample_rate: int = 16000,
+        language: Optional[str] = None,
+        partial_interval: float = 1.0,
+        endpointer: Optional[Endpointer] = None,
+        decoder: Optional[AudioDecoder] = None,
+        vad: Optional[VoiceActivityDetector] = None,
+        pause_partial_ms: int = 0,
+    ):
+        """
+        Initialize streaming transcriber.
+
+        Args:
+            provider: STT provider used for partial and final transcripts
+            sample_rate: Sample rate of the 16-bit mono PCM being transcribed
+            language: Optional language code (e.g., 'en')
+            partial_interval: Seconds of new audio between partial transcripts
+            endpointer: Endpointer to detect end of speech
+            decoder: Converts incoming chunks to 16-bit mono PCM at
+                sample_rate (None if they already are)
+            vad: Detector that trims silence from the final transcription,
+                splits long utterances and skips silence-only ones
+            pause_partial_ms: Silence after speech that triggers an early,
+                stable partial (0 disables)
+        """
+        self.provider = provider
+        self.sample_rate = sample_rate
+        self.language = language
+        self.partial_bytes = int(partial_interval * sample_rate) * 2
+        self.pause_partial_samples = sample_rate * pause_partial_ms // 1000
+        self.vad = vad or VoiceActivityDetector(sample_rate)
+        self.endpointer = endpointer or self.vad.endpointer()
+        self.decoder = decoder
+
+        self.audio = AudioBuffer(sample_rate * 2 * 10)
+        self.last_partial_text = ""
+        self.last_partial_bytes = 0
+        self.pending: Optional[Future] = None
+        self.pending_bytes = 0
+        self.final: Optional[TranscriptResult] = None
+
+    @property
+    def endpointed(self) -> bool:
+        """Whether the end of the utterance has been detected."""
+        return self.endpointer.endpointed
+
+    def feed(
+        self, chunk: bytes, is_final: bool = False, deadline: Optional[Deadline] = None
+    ) -> List[TranscriptResult]:
+        """
+        Add an audio chunk.
+
+        Args:
+            chunk: Audio as sent by the phone, decoded by the decoder if set,
+                otherwise 16-bit little-endian mono PCM
+            is_final: Whether the sender marked this as the last chunk
+            deadline: Deadline of the turn this chunk would end, bounding
+                the final transcription
+
+        Returns:
+            New partial transcripts, followed by the final transcript once
+            the utterance has ended
+        """
+        if self.final:
+            return []
+
+        if self.decoder is not None:
+            chunk = self.decoder.decode(chunk)
+        self.audio.append(chunk)
+        endpointed = self.endpointer.process(chunk)
+        results = self._collect_partial()
+
+        if endpointed or is_final:
+            results.append(self.finalize(deadline))
+            return results
+
+        if (
+            self.pending is None
+            and self.endpointer.speech_detected
+            and (
+                len(self.audio) - self.last_partial_bytes >= self.partial_bytes
+                or self._paused_after_unheard_speech()
+            )
+        ):
+            self.pending_bytes = len(self.audio)
+            self.pending = self.executor.submit(
+                self.provider.transcribe_pcm,
+                self.audio.view(self._speech_start_bytes()),
+                self.sample_rate,
+                self.language,
+            )
+
+        return results
+
+    def finalize(self, deadline: Optional[Deadline] = None) -> TranscriptResult:
+        """Produce the final transcript, reusing a partial when it suffices."""
+        if self.final:
+            return self.final
+
+        with span("stt", self.provider):
+            speech_end = self.endpointer.speech_end_sample
+            speech_end_bytes = len(self.audio) if speech_end is None else speech_end * 2
+
+            if self.pending is not None and self.pending_bytes >= speech_end_bytes:
+                # The in-flight partial already covers all speech
+                self._collect_partial(wait=True, deadline=deadline)
+
+            if self.last_partial_text and self.last_partial_bytes >= speech_end_bytes:
+                text = self.last_partial_text
+            elif not self.endpointer.speech_detected:
+                text = ""
+            else:
+                text = self._transcribe_speech(deadline)
+
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+
+        self.final = TranscriptResult(text=text, is_final=True)
+        logger.info(f"Final transcript: {text}")
+        return self.final
+
+    def _paused_after_unheard_speech(self) -> bool:
+        """Whether the user has paused after speech no partial has covered yet."""
+        if not self.pause_partial_samples or self.endpointer.speech_end_sample is None:
+            return False
+        silence = self.endpointer.silence_run * self.endpointer.frame_len
+        return (
+            silence >= self.pause_partial_samples
+            and self.endpointer.speech_end_sample * 2 > self.last_partial_bytes
+        )
+
+    def _speech_start_bytes(self) -> int:
+        """Offset of the first speech, less the VAD's padding."""
+        start = self.endpointer.speech_start_sample or 0
+        return max(0, start - self.vad.padding_frames * self.vad.frame_len) * 2
+
+    def _transcribe_speech(self, deadline: Optional[Deadline]) -> str:
+        """Transcribe only the utterance's speech, in parallel uploads if it is long."""
+        groups = self.vad.group(self.vad.segments(self.audio.samples()))
+        if not groups:
+            logger.info("No speech in utterance, skipping transcription")
+            return ""
+
+        uploads = [self._speech_audio(group) for group in groups]
+        if len(uploads) == 1:
+            return self.provider.transcribe_pcm(
+                uploads[0], self.sample_rate, self.language, deadline
+            )
+
+        futures = [
+            self.executor.submit(
+                self.provider.transcribe_pcm, audio, self.sample_rate, self.language, deadline
+            )
+            for audio in uploads
+        ]
+        texts = [future.result().strip() for future in futures]
+        return " ".join(text for text in texts if text)
+
+    def _speech_audio(self, segments: List[Segment]):
+        """Audio of consecutive segments: a view of one, or the silence-free join of several."""
+        if len(segments) == 1:
+            start, end = segments[0]
+            return self.audio.view(start * 2, end * 2)
+        return b"".join(self.audio.view(start * 2, end * 2) for start, end in segments)
+
+    def _collect_partial(
+        self, wait: bool = False, deadline: Optional[Deadline] = None
+    ) -> List[TranscriptResult]:
+        """Harvest a completed background partial transcript."""
+        if self.pending is None or not (wait or self.pending.done()):
+            return []
+
+        future, self.pending = self.pending, None
+        try:
+            text = future.result(timeout=deadline.timeout("stt") if deadline else None)
+        except Exception as e:
+            logger.warning(f"Partial transcription failed: {e}")
+            return []
+
+        self.last_partial_bytes = self.pending_bytes
+        # No speech since the partial was requested
+        speech_end = self.endpointer.speech_end_sample
+        stable = speech_end is not None and self.pending_bytes >= speech_end * 2
+        if text == self.last_partial_text and not stable:
+            return []
+
+        self.last_partial_text = text
+        return [TranscriptResult(text=text, is_final=False, stable=stable)]
+
 
 class OpenAISTT(STTProvider):
     """OpenAI Whisper API for speech-to-text."""
 
+    pool_kind = "openai"
+
     def __init__(self, api_key: str, model: str = "whisper-1"):
         """
         Initialize OpenAI STT.
@@ -38,22 +316,51 @@ class OpenAISTT(STTProvider):
             api_key: OpenAI API key
             model: Whisper model to use
         """
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
         self.model = model
         logger.info(f"Initialized OpenAI STT with model {model}")
 
-    def transcribe(self, audio_bytes: bytes, language: Optional[str] = None) -> str:
+    @property
+    def client(self) -> "OpenAI":
+        """Shared pooled OpenAI client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
         """Transcribe audio using OpenAI Whisper API."""
-        try:
-            # Create a file-like object from bytes
-            audio_file = io.BytesIO(audio_bytes)
-            audio_file.name = "audio.opus"  # Whisper expects a filename
+        return self._transcribe_file(audio_bytes, audio_filename(audio_bytes), language, deadline)
 
-            # Call Whisper API
-            transcript = self.client.audio.transcriptions.create(
+    def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw PCM using OpenAI Whisper API."""
+        return self._transcribe_file(
+            pcm_to_wav(pcm, sample_rate), "audio.wav", language, deadline
+        )
+
+    def _transcribe_file(
+        self,
+        audio_bytes: bytes,
+        filename: str,
+        language: Optional[str],
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Upload an audio file to the Whisper API."""
+        try:
+            # Whisper detects the format from the filename
+            transcript = client_for(self.client, deadline).audio.transcriptions.create(
                 model=self.model,
-                file=audio_file,
+                file=(filename, audio_bytes),
                 language=language,
+                **timeout_option(deadline),
             )
 
             text = transcript.text
@@ -66,29 +373,268 @@ class OpenAISTT(STTProvider):
 
 
 class LocalSTT(STTProvider):
-    """Local speech-to-text (placeholder for local Whisper)."""
+    """
+    Offline Whisper on CPU (faster-whisper with quantized weights).
+
+    Transcription runs in a pool of worker processes, one per core by
+    default, each holding a warm copy of the model; utterances finishing
+    at the same time are decoded in batches.
+    """
+
+    def __init__(
+        self, model: str = "base", compute_type: str = "int8", workers: Optional[int] = None
+    ):
+        """
+        Initialize local STT.
+
+        Args:
+            model: faster-whisper model name or path (e.g. 'base.en', 'small')
+            compute_type: Weight quantization ('int8', 'int8_float32', 'float32')
+            workers: Worker processes (None = number of CPU cores)
+        """
+        from ai.local_stt import WhisperPool  # needs faster-whisper
+
+        self.model = model
+        self.pool = WhisperPool(model, compute_type, workers)
+        # Load the model in every worker now rather than on the first utterance
+        threading.Thread(target=self.pool.warm, name="whisper-warm", daemon=True).start()
+        logger.info(f"Initialized Local STT with model {model} ({compute_type})")
+
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe an encoded audio file with the local model."""
+        return self._wait(self.pool.submit(audio_bytes, None, language), deadline)
+
+    def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw PCM with the local model."""
+        # Copied once here to cross into the worker process
+        return self._wait(self.pool.submit(bytes(pcm), sample_rate, language), deadline)
+
+    def _wait(self, future: Future, deadline: Optional[Deadline]) -> str:
+        """Wait for a pooled transcription, giving up at the deadline."""
+        try:
+            text = future.result(timeout=deadline.timeout("stt") if deadline else None)
+        except FutureTimeoutError:
+            future.cancel()
+            deadline.check("stt")
+            raise
+        except Exception as e:
+            logger.error(f"STT error: {e}")
+            raise
+
+        logger.info(f"Transcribed: {text}")
+        return text
+
+
+class AsyncSTTProvider(ABC):
+    """Abstract base class for asyncio STT providers."""
+
+    @abstractmethod
+    async def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """
+        Transcribe audio to text.
+
+        Args:
+            audio_bytes: Audio data in bytes
+            language: Optional language code (e.g., 'en')
+            deadline: Optional turn deadline; sets the request timeout
+
+        Returns:
+            Transcribed text
+        """
+        pass
+
+    async def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw 16-bit mono PCM audio."""
+        return await self.transcribe(pcm_to_wav(pcm, sample_rate), language, deadline)
+
+
+class AsyncOpenAISTT(AsyncSTTProvider):
+    """OpenAI Whisper API using the SDK's asyncio client."""
+
+    pool_kind = "async_openai"
+
+    def __init__(self, api_key: str, model: str = "whisper-1"):
+        """
+        Initialize async OpenAI STT.
+
+        Args:
+            api_key: OpenAI API key
+            model: Whisper model to use
+        """
+        self.api_key = api_key
+        self.model = model
+        logger.info(f"Initialized async OpenAI STT with model {model}")
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """Shared pooled asyncio OpenAI client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
+    async def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe audio using OpenAI Whisper API."""
+        return await self._transcribe_file(
+            audio_bytes, audio_filename(audio_bytes), language, deadline
+        )
+
+    async def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw PCM using OpenAI Whisper API."""
+        return await self._transcribe_file(
+            pcm_to_wav(pcm, sample_rate), "audio.wav", language, deadline
+        )
+
+    async def _transcribe_file(
+        self,
+        audio_bytes: bytes,
+        filename: str,
+        language: Optional[str],
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Upload an audio file to the Whisper API."""
+        try:
+            transcript = await client_for(self.client, deadline).audio.transcriptions.create(
+                model=self.model,
+                file=(filename, audio_bytes),
+                language=language,
+                **timeout_option(deadline),
+            )
+
+            text = transcript.text
+            logger.info(f"Transcribed: {text}")
+            return text
+
+        except Exception as e:
+            logger.error(f"STT error: {e}")
+            raise
+
+
+class ThreadedSTT(AsyncSTTProvider):
+    """Runs a blocking STT provider on worker threads."""
+
+    def __init__(self, provider: STTProvider):
+        """
+        Initialize threaded STT.
+
+        Args:
+            provider: Blocking provider to wrap (e.g. LocalSTT)
+        """
+        self.provider = provider
+
+    async def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe on a worker thread."""
+        return await asyncio.to_thread(
+            self.provider.transcribe, audio_bytes, language, deadline
+        )
+
+    async def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw PCM on a worker thread."""
+        return await asyncio.to_thread(
+            self.provider.transcribe_pcm, pcm, sample_rate, language, deadline
+        )
+
+
+class BlockingSTT(STTProvider):
+    """
+    Blocking facade over an asyncio STT provider.
 
-    def __init__(self):
-        """Initialize local STT."""
-        logger.info("Initialized Local STT (not implemented)")
-        # TODO: Implement local Whisper model
-        # import whisper
-        # self.model = whisper.load_model("base")
+    Lets thread-based helpers such as StreamingTranscriber call an async
+    provider; calls must come from threads other than the event loop's.
+    """
+
+    def __init__(self, provider: AsyncSTTProvider, loop: asyncio.AbstractEventLoop):
+        """
+        Initialize blocking STT facade.
+
+        Args:
+            provider: Async provider to call
+            loop: Event loop the provider runs on
+        """
+        self.provider = provider
+        self.loop = loop
 
-    def transcribe(self, audio_bytes: bytes, language: Optional[str] = None) -> str:
-        """Transcribe audio using local Whisper model."""
-        # TODO: Implement local transcription
-        logger.warning("Local STT not implemented, returning placeholder")
-        return "[Local STT not implemented yet]"
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe on the event loop and wait for the result."""
+        return asyncio.run_coroutine_threadsafe(
+            self.provider.transcribe(audio_bytes, language, deadline), self.loop
+        ).result()
 
+    def transcribe_pcm(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Transcribe raw PCM on the event loop and wait for the result."""
+        return asyncio.run_coroutine_threadsafe(
+            self.provider.transcribe_pcm(pcm, sample_rate, language, deadline), self.loop
+        ).result()
 
-def create_stt_provider(provider: str, api_key: Optional[str] = None) -> STTProvider:
+
+def create_stt_provider(
+    provider: str,
+    api_key: Optional[str] = None,
+    local_model: str = "base",
+    compute_type: str = "int8",
+    workers: Optional[int] = None,
+) -> STTProvider:
     """
     Factory function to create STT provider.
 
     Args:
         provider: Provider name ('openai' or 'local')
         api_key: API key for cloud providers
+        local_model: Whisper model for the local provider
+        compute_type: Weight quantization for the local provider
+        workers: Worker processes for the local provider (None = CPU cores)
 
     Returns:
         STT provider instance
@@ -98,6 +644,36 @@ def create_stt_provider(provider: str, api_key: Optional[str] = None) -> STTProv
             raise ValueError("OpenAI API key required")
         return OpenAISTT(api_key)
     elif provider == "local":
-        return LocalSTT()
+        return LocalSTT(local_model, compute_type, workers)
     else:
         raise ValueError(f"Unknown STT provider: {provider}")
+
+
+def create_async_stt_provider(
+    provider: str,
+    api_key: Optional[str] = None,
+    local_model: str = "base",
+    compute_type: str = "int8",
+    workers: Optional[int] = None,
+) -> AsyncSTTProvider:
+    """
+    Factory function to create asyncio STT provider.
+
+    Args:
+        provider: Provider name ('openai' or 'local')
+        api_key: API key for cloud providers
+        local_model: Whisper model for the local provider
+        compute_type: Weight quantization for the local provider
+        workers: Worker processes for the local provider (None = CPU cores)
+
+    Returns:
+        Async STT provider instance
+    """
+    if provider == "openai":
+        if not api_key:
+            raise ValueError("OpenAI API key required")
+        return AsyncOpenAISTT(api_key)
+    else:
+        return ThreadedSTT(
+            create_stt_provider(provider, api_key, local_model, compute_type, workers)
+        )
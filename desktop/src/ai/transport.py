@@ -0,0 +1,220 @@
+"""Shared, pooled HTTP transport for the OpenAI and Anthropic SDK clients."""
+
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SDK client classes (module, class) by pool kind. The SDKs take most of
+# the process's import time, so each is imported when its first client is built.
+CLIENT_CLASSES: Dict[str, Tuple[str, str]] = {
+    "openai": ("openai", "OpenAI"),
+    "async_openai": ("openai", "AsyncOpenAI"),
+    "anthropic": ("anthropic", "Anthropic"),
+    "async_anthropic": ("anthropic", "AsyncAnthropic"),
+}
+
+
+def client_class(kind: str) -> Any:
+    """The SDK client class of a pool kind, importing its SDK on first use."""
+    module, name = CLIENT_CLASSES[kind]
+    return getattr(importlib.import_module(module), name)
+
+
+def http2_available() -> bool:
+    """Whether httpx can negotiate HTTP/2 (needs the h2 package)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class PooledClient:
+    """An SDK client, its HTTP client and when (and on which loop) it was last used."""
+
+    __slots__ = ("client", "http_client", "is_async", "last_used", "loop")
+
+    def __init__(self, client: Any, http_client: Any, is_async: bool):
+        self.client = client
+        self.http_client = http_client
+        self.is_async = is_async
+        self.last_used = time.monotonic()
+        # Event loop an async client's connections belong to
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class ClientPool:
+    """
+    SDK clients shared by all providers, keyed by provider and API key.
+
+    Every provider using the same key shares one client and therefore one
+    keep-alive connection pool. Clients not used for idle_timeout seconds
+    are closed; providers look their client up on each call, so an evicted
+    client is transparently rebuilt on next use.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        keepalive_expiry: float = 120.0,
+        http2: Optional[bool] = None,
+        idle_timeout: float = 600.0,
+        base_urls: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Initialize client pool.
+
+        Args:
+            max_connections: Connection pool size per client
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Use HTTP/2 (None = when the h2 package is installed)
+            idle_timeout: Seconds after which an unused client is closed
+            base_urls: Optional API base URL per provider ('openai', 'anthropic')
+        """
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2_available() if http2 is None else http2
+        self.idle_timeout = idle_timeout
+        self.base_urls = base_urls or {}
+        self.clients: Dict[Tuple[str, str], PooledClient] = {}
+        self.closing: Set[asyncio.Task] = set()
+        self.lock = threading.Lock()
+
+    def get(self, kind: str, api_key: str) -> Any:
+        """
+        Return the pooled client of a kind for an API key, creating it if needed.
+
+        Args:
+            kind: Client kind, a key of CLIENT_CLASSES (e.g. 'async_openai')
+            api_key: API key the client authenticates with
+        """
+        key = (kind, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+        now = time.monotonic()
+
+        with self.lock:
+            self._evict_idle(now)
+            pooled = self.clients.get(key)
+            if pooled is None:
+                pooled = self._create(kind, api_key)
+                self.clients[key] = pooled
+                logger.info(
+                    f"Created pooled {kind} client "
+                    f"(http2={self.http2}, pool={self.max_connections})"
+                )
+            pooled.last_used = now
+            if pooled.is_async:
+                loop = _running_loop()
+                if loop is not None:
+                    pooled.loop = loop
+            return pooled.client
+
+    def _create(self, kind: str, api_key: str) -> PooledClient:
+        """Build an SDK client over a dedicated pooled HTTP client."""
+        import httpx
+
+        is_async = kind.startswith("async_")
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        http_client_class = httpx.AsyncClient if is_async else httpx.Client
+        http_client = http_client_class(limits=limits, http2=self.http2)
+
+        kwargs = {"api_key": api_key, "http_client": http_client}
+        base_url = self.base_urls.get(kind.replace("async_", ""))
+        if base_url:
+            kwargs["base_url"] = base_url
+
+        client = client_class(kind)(**kwargs)
+        return PooledClient(client, http_client, is_async)
+
+    def _evict_idle(self, now: float):
+        """Close clients that have not been used for idle_timeout seconds."""
+        for key, pooled in list(self.clients.items()):
+            if now - pooled.last_used < self.idle_timeout:
+                continue
+            del self.clients[key]
+            logger.info(f"Evicting idle {key[0]} client")
+            if pooled.is_async:
+                self._close_async(pooled)
+            else:
+                pooled.http_client.close()
+
+    def _close_async(self, pooled: PooledClient):
+        """Close an async client on the event loop its connections belong to."""
+        loop = pooled.loop
+        if loop is None:
+            # Never used on a loop, so it has no connections to close
+            return
+
+        def close():
+            task = loop.create_task(pooled.http_client.aclose())
+            self.closing.add(task)
+            task.add_done_callback(self.closing.discard)
+
+        try:
+            loop.call_soon_threadsafe(close)
+        except RuntimeError:
+            # The loop is closed; its connections went with it
+            pass
+
+    def prewarm(self):
+        """Open connections (DNS, TCP, TLS) for every blocking client in the pool."""
+        import httpx
+
+        with self.lock:
+            pooled_clients = [p for p in self.clients.values() if not p.is_async]
+
+        for pooled in pooled_clients:
+            url = str(pooled.client.base_url)
+            started = time.perf_counter()
+            try:
+                pooled.http_client.head(url)
+                logger.info(f"Warmed connection to {url} in {time.perf_counter() - started:.3f}s")
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not warm connection to {url}: {e}")
+
+    async def prewarm_async(self):
+        """Open connections for every asyncio client in the pool."""
+        import httpx
+
+        with self.lock:
+            pooled_clients = [p for p in self.clients.values() if p.is_async]
+
+        for pooled in pooled_clients:
+            url = str(pooled.client.base_url)
+            started = time.perf_counter()
+            try:
+                await pooled.http_client.head(url)
+                logger.info(f"Warmed connection to {url} in {time.perf_counter() - started:.3f}s")
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not warm connection to {url}: {e}")
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+_client_pool: Optional[ClientPool] = None
+
+
+def get_client_pool() -> ClientPool:
+    """The process-wide client pool."""
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = ClientPool()
+    return _client_pool
+
+
+def configure_client_pool(**kwargs) -> ClientPool:
+    """Replace the process-wide client pool (call before creating providers)."""
+    global _client_pool
+    _client_pool = ClientPool(**kwargs)
+    return _client_pool
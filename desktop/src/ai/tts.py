@@ -1,35 +1,102 @@
 """Text-to-Speech module supporting multiple providers."""
 
+import asyncio
 import logging
+import os
+import re
 from abc import ABC, abstractmethod
-from typing import Optional
-from openai import OpenAI
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Optional, Tuple
+from ai.cancel import abort_on_cancel
+from ai.deadline import Deadline, client_for
+from ai.transport import get_client_pool
+from audio.convert import resample_pcm
+from audio.encoder import frame_encoder
+from audio.formats import AAC, OPUS, PCM, UNKNOWN_FORMAT, negotiate
+from audio.ogg import OggOpusDemuxer
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger(__name__)
 
+# Model used when a turn is short on time
+FAST_TTS_MODEL = "tts-1"
+
+# AudioFormat -> (OpenAI response_format, sample rate of the stream). Opus
+# arrives in Ogg pages and is unwrapped into raw packets (always 48 kHz)
+OPENAI_STREAM_FORMATS = {
+    PCM: ("pcm", 24000),
+    OPUS: ("opus", 48000),
+    AAC: ("aac", 24000),
+}
+
+# Bytes read from a streaming TTS response at a time (50 ms of 24 kHz PCM)
+STREAM_CHUNK_BYTES = 2400
+
+# Clause boundaries where local synthesis may split a long sentence
+CLAUSE_BREAK = re.compile(r"(?<=[,;:])\s+")
+
 
 class TTSProvider(ABC):
     """Abstract base class for TTS providers."""
 
     @abstractmethod
-    def synthesize(self, text: str) -> bytes:
+    def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
         """
         Convert text to speech.
 
         Args:
             text: Text to convert to speech
+            deadline: Optional turn deadline; sets the request timeout and
+                may switch to a faster model
 
         Returns:
             Audio data in bytes
         """
         pass
 
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """
+        The (AudioFormat, sample_rate) synthesize_stream produces for a request.
+
+        Providers that only return encoded clips (e.g. MP3) report
+        UNKNOWN_FORMAT and rate 0.
+        """
+        return UNKNOWN_FORMAT, 0
+
+    def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[bytes]:
+        """
+        Convert text to speech, yielding audio as it is produced.
+
+        Args:
+            text: Text to convert to speech
+            audio_format: Requested AudioFormat (PCM or OPUS)
+            sample_rate: Requested sample rate (0 = provider default)
+            deadline: Optional turn deadline
+
+        Yields:
+            Audio chunks in the format reported by output_format()
+        """
+        yield self.synthesize(text, deadline)
+
 
 class OpenAITTS(TTSProvider):
     """OpenAI TTS for text-to-speech."""
 
+    pool_kind = "openai"
+
     def __init__(
-        self, api_key: str, model: str = "tts-1", voice: str = "alloy"
+        self,
+        api_key: str,
+        model: str = "tts-1",
+        voice: str = "alloy",
+        fast_model: str = FAST_TTS_MODEL,
     ):
         """
         Initialize OpenAI TTS.
@@ -38,19 +105,35 @@ class OpenAITTS(TTSProvider):
             api_key: OpenAI API key
             model: TTS model ('tts-1' or 'tts-1-hd')
             voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            fast_model: Model used when a turn is short on time
         """
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
         self.model = model
         self.voice = voice
+        self.fast_model = fast_model
         logger.info(f"Initialized OpenAI TTS with model {model}, voice {voice}")
 
-    def synthesize(self, text: str) -> bytes:
+    @property
+    def client(self) -> "OpenAI":
+        """Shared pooled OpenAI client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
+    def _request_options(self, deadline: Optional[Deadline]) -> dict:
+        """Model and timeout for a request under an optional deadline."""
+        if deadline is None:
+            return {"model": self.model}
+        return {
+            "model": deadline.model(self.model, self.fast_model),
+            "timeout": deadline.timeout("tts"),
+        }
+
+    def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
         """Synthesize speech using OpenAI TTS API."""
         try:
             logger.info(f"Synthesizing: {text[:100]}...")
 
-            response = self.client.audio.speech.create(
-                model=self.model, voice=self.voice, input=text
+            response = client_for(self.client, deadline).audio.speech.create(
+                voice=self.voice, input=text, **self._request_options(deadline)
             )
 
             # Get audio bytes
@@ -62,20 +145,327 @@ class OpenAITTS(TTSProvider):
             logger.error(f"TTS error: {e}")
             raise
 
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The requested format at OpenAI's fixed rate, or MP3 clips (UNKNOWN_FORMAT)."""
+        if audio_format in OPENAI_STREAM_FORMATS:
+            return audio_format, OPENAI_STREAM_FORMATS[audio_format][1]
+        return UNKNOWN_FORMAT, 0
+
+    def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[bytes]:
+        """Stream the response body in the requested codec as it arrives."""
+        if audio_format not in OPENAI_STREAM_FORMATS:
+            yield self.synthesize(text, deadline)
+            return
+
+        response_format = OPENAI_STREAM_FORMATS[audio_format][0]
+        demuxer = OggOpusDemuxer() if audio_format == OPUS else None
+        try:
+            logger.info(f"Streaming {response_format} speech: {text[:100]}...")
+
+            speech = client_for(self.client, deadline).audio.speech
+            with speech.with_streaming_response.create(
+                voice=self.voice,
+                input=text,
+                response_format=response_format,
+                **self._request_options(deadline),
+            ) as response, abort_on_cancel(response.close):
+                for chunk in response.iter_bytes(STREAM_CHUNK_BYTES):
+                    if deadline is not None:
+                        deadline.check("tts")
+                    if demuxer is None:
+                        yield chunk
+                    else:
+                        yield from demuxer.feed(chunk)
+
+        except Exception as e:
+            logger.error(f"TTS error: {e}")
+            raise
+
 
 class LocalTTS(TTSProvider):
-    """Local text-to-speech (placeholder)."""
+    """
+    Offline text-to-speech with a Piper voice.
+
+    The ONNX voice model is loaded and warmed up once, then reused for
+    every request. Audio is yielded clause by clause as raw PCM or as
+    Opus packets, resampled to the requested rate.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        sample_rate: int = 16000,
+        min_clause_chars: int = 40,
+    ):
+        """
+        Initialize local TTS.
+
+        Args:
+            model_path: Path to a Piper voice (.onnx, with its .onnx.json
+                config next to it)
+            sample_rate: Output rate used when a request does not set one
+            min_clause_chars: Shortest clause synthesized on its own; long
+                sentences are split at commas so the first audio is ready
+                sooner
+        """
+        if not model_path:
+            raise ValueError("Local TTS requires a Piper voice model (TTS_LOCAL_VOICE)")
+
+        # Optional dependency, only needed for local synthesis
+        from piper import PiperVoice
+
+        self.piper = PiperVoice.load(model_path)
+        self.model = "piper"
+        self.voice = os.path.basename(model_path)
+        self.response_format = "pcm"
+        self.native_rate = self.piper.config.sample_rate
+        self.sample_rate = sample_rate
+        self.min_clause_chars = min_clause_chars
+
+        # The first inference pays for ONNX graph setup; do it now
+        for _ in self.piper.synthesize_stream_raw("Ready."):
+            pass
+        logger.info(f"Initialized Local TTS with voice {self.voice} ({self.native_rate} Hz)")
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """PCM or Opus at the requested (or nearest Opus-supported) rate."""
+        return negotiate(audio_format, sample_rate, self.sample_rate)
+
+    def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Synthesize speech as 16-bit mono PCM at the default sample rate."""
+        return b"".join(self.synthesize_stream(text, PCM, self.sample_rate, deadline))
+
+    def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[bytes]:
+        """Synthesize clause by clause, yielding PCM chunks or Opus packets."""
+        audio_format, sample_rate = self.output_format(audio_format, sample_rate)
+        encoder = frame_encoder(audio_format, sample_rate)
+
+        for clause in self._clauses(text):
+            for pcm in self.piper.synthesize_stream_raw(clause):
+                if deadline is not None:
+                    deadline.check("tts")
+                yield from encoder.encode(resample_pcm(pcm, self.native_rate, sample_rate))
+        yield from encoder.flush()
+
+    def _clauses(self, text: str) -> List[str]:
+        """Split text at clause boundaries into pieces of at least min_clause_chars."""
+        clauses: List[str] = []
+        current = ""
+        for piece in CLAUSE_BREAK.split(text.strip()):
+            current = f"{current} {piece}" if current else piece
+            if len(current) >= self.min_clause_chars:
+                clauses.append(current)
+                current = ""
+
+        if current:
+            if clauses and len(current) < self.min_clause_chars // 2:
+                clauses[-1] = f"{clauses[-1]} {current}"
+            else:
+                clauses.append(current)
+        return clauses
+
+
+class AsyncTTSProvider(ABC):
+    """Abstract base class for asyncio TTS providers."""
+
+    @abstractmethod
+    async def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """
+        Convert text to speech.
+
+        Args:
+            text: Text to convert to speech
+            deadline: Optional turn deadline; sets the request timeout and
+                may switch to a faster model
+
+        Returns:
+            Audio data in bytes
+        """
+        pass
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The (AudioFormat, sample_rate) synthesize_stream produces for a request."""
+        return UNKNOWN_FORMAT, 0
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Convert text to speech, yielding audio as it is produced.
+
+        Args:
+            text: Text to convert to speech
+            audio_format: Requested AudioFormat (PCM or OPUS)
+            sample_rate: Requested sample rate (0 = provider default)
+            deadline: Optional turn deadline
+
+        Yields:
+            Audio chunks in the format reported by output_format()
+        """
+        yield await self.synthesize(text, deadline)
 
-    def __init__(self):
-        """Initialize local TTS."""
-        logger.info("Initialized Local TTS (not implemented)")
-        # TODO: Implement local TTS (e.g., pyttsx3, Coqui TTS)
 
-    def synthesize(self, text: str) -> bytes:
-        """Synthesize speech using local TTS."""
-        # TODO: Implement local TTS
-        logger.warning("Local TTS not implemented, returning empty audio")
-        return b""
+class AsyncOpenAITTS(AsyncTTSProvider):
+    """OpenAI TTS using the SDK's asyncio client."""
+
+    pool_kind = "async_openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "tts-1",
+        voice: str = "alloy",
+        fast_model: str = FAST_TTS_MODEL,
+    ):
+        """
+        Initialize async OpenAI TTS.
+
+        Args:
+            api_key: OpenAI API key
+            model: TTS model ('tts-1' or 'tts-1-hd')
+            voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            fast_model: Model used when a turn is short on time
+        """
+        self.api_key = api_key
+        self.model = model
+        self.voice = voice
+        self.fast_model = fast_model
+        logger.info(f"Initialized async OpenAI TTS with model {model}, voice {voice}")
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """Shared pooled asyncio OpenAI client."""
+        return get_client_pool().get(self.pool_kind, self.api_key)
+
+    def _request_options(self, deadline: Optional[Deadline]) -> dict:
+        """Model and timeout for a request under an optional deadline."""
+        if deadline is None:
+            return {"model": self.model}
+        return {
+            "model": deadline.model(self.model, self.fast_model),
+            "timeout": deadline.timeout("tts"),
+        }
+
+    async def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Synthesize speech using OpenAI TTS API."""
+        try:
+            logger.info(f"Synthesizing: {text[:100]}...")
+
+            response = await client_for(self.client, deadline).audio.speech.create(
+                voice=self.voice, input=text, **self._request_options(deadline)
+            )
+
+            audio_bytes = response.content
+            logger.info(f"Synthesized {len(audio_bytes)} bytes of audio")
+            return audio_bytes
+
+        except Exception as e:
+            logger.error(f"TTS error: {e}")
+            raise
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The requested format at OpenAI's fixed rate, or MP3 clips (UNKNOWN_FORMAT)."""
+        if audio_format in OPENAI_STREAM_FORMATS:
+            return audio_format, OPENAI_STREAM_FORMATS[audio_format][1]
+        return UNKNOWN_FORMAT, 0
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[bytes]:
+        """Stream the response body in the requested codec as it arrives."""
+        if audio_format not in OPENAI_STREAM_FORMATS:
+            yield await self.synthesize(text, deadline)
+            return
+
+        response_format = OPENAI_STREAM_FORMATS[audio_format][0]
+        demuxer = OggOpusDemuxer() if audio_format == OPUS else None
+        try:
+            logger.info(f"Streaming {response_format} speech: {text[:100]}...")
+
+            speech = client_for(self.client, deadline).audio.speech
+            async with speech.with_streaming_response.create(
+                voice=self.voice,
+                input=text,
+                response_format=response_format,
+                **self._request_options(deadline),
+            ) as response:
+                async for chunk in response.iter_bytes(STREAM_CHUNK_BYTES):
+                    if deadline is not None:
+                        deadline.check("tts")
+                    if demuxer is None:
+                        yield chunk
+                    else:
+                        for packet in demuxer.feed(chunk):
+                            yield packet
+
+        except Exception as e:
+            logger.error(f"TTS error: {e}")
+            raise
+
+
+class ThreadedTTS(AsyncTTSProvider):
+    """Runs a blocking TTS provider on worker threads."""
+
+    def __init__(self, provider: TTSProvider):
+        """
+        Initialize threaded TTS.
+
+        Args:
+            provider: Blocking provider to wrap (e.g. LocalTTS)
+        """
+        self.provider = provider
+
+    async def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Synthesize on a worker thread."""
+        return await asyncio.to_thread(self.provider.synthesize, text, deadline)
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The wrapped provider's output format."""
+        return self.provider.output_format(audio_format, sample_rate)
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[bytes]:
+        """Synthesize on a worker thread, handing over each chunk as it is ready."""
+        chunks = self.provider.synthesize_stream(text, audio_format, sample_rate, deadline)
+        done = object()
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, done)
+                if chunk is done:
+                    return
+                yield chunk
+        finally:
+            try:
+                chunks.close()
+            except ValueError:
+                # Cancelled while a worker thread is still inside next(); the
+                # generator stops at its next deadline check instead
+                pass
 
 
 def create_tts_provider(
@@ -83,6 +473,8 @@ def create_tts_provider(
     api_key: Optional[str] = None,
     model: Optional[str] = None,
     voice: Optional[str] = None,
+    local_voice: Optional[str] = None,
+    sample_rate: int = 16000,
 ) -> TTSProvider:
     """
     Factory function to create TTS provider.
@@ -92,6 +484,8 @@ def create_tts_provider(
         api_key: API key for cloud providers
         model: Model name for cloud providers
         voice: Voice name for cloud providers
+        local_voice: Piper voice model path for the local provider
+        sample_rate: Default output rate of the local provider
 
     Returns:
         TTS provider instance
@@ -101,6 +495,38 @@ def create_tts_provider(
             raise ValueError("OpenAI API key required")
         return OpenAITTS(api_key, model or "tts-1", voice or "alloy")
     elif provider == "local":
-        return LocalTTS()
+        return LocalTTS(local_voice, sample_rate)
     else:
         raise ValueError(f"Unknown TTS provider: {provider}")
+
+
+def create_async_tts_provider(
+    provider: str,
+    api_key: Optional[str] = None,
+    model: Optional[str] = None,
+    voice: Optional[str] = None,
+    local_voice: Optional[str] = None,
+    sample_rate: int = 16000,
+) -> AsyncTTSProvider:
+    """
+    Factory function to create asyncio TTS provider.
+
+    Args:
+        provider: Provider name ('openai' or 'local')
+        api_key: API key for cloud providers
+        model: Model name for cloud providers
+        voice: Voice name for cloud providers
+        local_voice: Piper voice model path for the local provider
+        sample_rate: Default output rate of the local provider
+
+    Returns:
+        Async TTS provider instance
+    """
+    if provider == "openai":
+        if not api_key:
+            raise ValueError("OpenAI API key required")
+        return AsyncOpenAITTS(api_key, model or "tts-1", voice or "alloy")
+    else:
+        return ThreadedTTS(
+            create_tts_provider(provider, api_key, model, voice, local_voice, sample_rate)
+        )
@@ -0,0 +1,448 @@
+"""Content-addressed cache for synthesized speech."""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+from ai.deadline import Deadline
+from ai.scheduler import BACKGROUND, request_priority
+from ai.tts import AsyncTTSProvider, TTSProvider
+from audio.formats import PCM, UNKNOWN_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Phrases rendered at startup so canned replies never wait on the network
+DEFAULT_PHRASES = [
+    "Hello! How can I help you?",
+    "Hi there, what can I do for you?",
+    "Okay.",
+    "Sure.",
+    "Got it.",
+    "One moment.",
+    "Let me check on that.",
+    "Sorry, I didn't catch that. Could you say it again?",
+    "I'm having trouble connecting right now. Please try again in a moment.",
+]
+
+
+def cache_key(text: str, model: str, voice: str, audio_format: str) -> str:
+    """Content address of a synthesized clip."""
+    identity = "\x00".join((model, voice, audio_format, text.strip()))
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def provider_cache_key(provider, text: str, stream_format: Optional[str] = None) -> str:
+    """
+    Content address of text rendered by a (sync or async) TTS provider.
+
+    stream_format identifies streamed frames (format and rate) and replaces
+    the provider's whole-clip response format in the key.
+    """
+    # Look through wrappers such as ThreadedTTS to the provider doing the work
+    while hasattr(provider, "provider"):
+        provider = provider.provider
+
+    return cache_key(
+        text,
+        getattr(provider, "model", type(provider).__name__),
+        getattr(provider, "voice", ""),
+        stream_format or getattr(provider, "response_format", "mp3"),
+    )
+
+
+def stream_cache_key(provider, text: str, output_format: Tuple[int, int]) -> str:
+    """
+    Content address of text streamed in a negotiated (format, sample_rate).
+
+    Providers that only produce whole clips (UNKNOWN_FORMAT) share the
+    whole-clip key, as synthesize_stream falls back to synthesize for them.
+    """
+    audio_format, sample_rate = output_format
+    if audio_format == UNKNOWN_FORMAT:
+        return provider_cache_key(provider, text)
+    return provider_cache_key(provider, text, f"{audio_format}@{sample_rate}")
+
+
+def pack_frames(frames: List[bytes]) -> bytes:
+    """Join streamed frames into one clip, keeping their boundaries."""
+    return b"".join(len(frame).to_bytes(4, "big") + frame for frame in frames)
+
+
+def unpack_frames(clip: bytes) -> Iterator[bytes]:
+    """Split a clip written by pack_frames back into frames."""
+    offset = 0
+    while offset < len(clip):
+        length = int.from_bytes(clip[offset : offset + 4], "big")
+        yield clip[offset + 4 : offset + 4 + length]
+        offset += 4 + length
+
+
+def load_phrase_bank(path: Optional[str]) -> List[str]:
+    """Load phrases (one per line) to pre-render, falling back to the defaults."""
+    if not path:
+        return list(DEFAULT_PHRASES)
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError as e:
+        logger.warning(f"Could not read phrase bank {path}: {e}")
+        return list(DEFAULT_PHRASES)
+
+
+class TTSCache:
+    """
+    Two-tier audio cache: an in-memory LRU in front of a size-bounded
+    directory of clips named by their content address.
+
+    Disk hits are read into memory and promoted to the memory tier.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        Initialize TTS cache.
+
+        Args:
+            max_memory_bytes: Memory tier budget
+            cache_dir: Directory for the disk tier (None disables it)
+            max_disk_bytes: Disk tier budget
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.disk_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.audio"))
+            logger.info(f"TTS disk cache at {self.cache_dir}: {self.disk_bytes} bytes")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up a clip, promoting disk hits to memory."""
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        audio = self._read_disk(key)
+        with self.lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._put_memory(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        """Store a clip in both tiers."""
+        if not audio:
+            return
+        with self.lock:
+            self._put_memory(key, audio)
+        self._write_disk(key, audio)
+
+    def _put_memory(self, key: str, audio: bytes):
+        """Insert into the memory tier and evict least recently used clips."""
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= len(previous)
+        if len(audio) > self.max_memory_bytes:
+            return
+
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.audio"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        """Read a clip from the disk tier."""
+        if not self.cache_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path)  # Mark as recently used for disk eviction
+            return audio or None
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"TTS cache read failed for {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, audio: bytes):
+        """Write a clip to the disk tier and enforce its budget."""
+        if not self.cache_dir or len(audio) > self.max_disk_bytes:
+            return
+
+        path = self._path(key)
+        if path.exists():
+            return
+
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed for {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self.lock:
+            self.disk_bytes += len(audio)
+            if self.disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete least recently used clips until the disk tier fits its budget."""
+        entries = []
+        for p in self.cache_dir.glob("*.audio"):
+            try:
+                stat = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+
+        entries.sort()
+        self.disk_bytes = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if self.disk_bytes <= self.max_disk_bytes * 0.9:
+                break
+            p.unlink(missing_ok=True)
+            self.disk_bytes -= size
+
+
+class CachedTTS(TTSProvider):
+    """TTS provider wrapper that serves repeated text from a TTSCache."""
+
+    def __init__(self, provider: TTSProvider, cache: TTSCache):
+        """
+        Initialize cached TTS.
+
+        Args:
+            provider: Provider used on cache misses
+            cache: Audio cache
+        """
+        self.provider = provider
+        self.cache = cache
+
+    def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Synthesize speech, using the cache when possible."""
+        key = provider_cache_key(self.provider, text)
+        audio = self.cache.get(key)
+        if audio is not None:
+            logger.info(f"TTS cache hit: {text[:100]}")
+            return audio
+
+        # Clips rendered with a degraded (faster) model are not cached under
+        # the full-quality key
+        full_quality = deadline is None or not deadline.degraded
+        audio = self.provider.synthesize(text, deadline)
+        if full_quality:
+            self.cache.put(key, audio)
+        return audio
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The wrapped provider's output format."""
+        return self.provider.output_format(audio_format, sample_rate)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[bytes]:
+        """Stream speech, replaying cached frames when possible."""
+        audio_format, sample_rate = self.output_format(audio_format, sample_rate)
+        if audio_format == UNKNOWN_FORMAT:
+            yield self.synthesize(text, deadline)
+            return
+
+        key = stream_cache_key(self.provider, text, (audio_format, sample_rate))
+        clip = self.cache.get(key)
+        if clip is not None:
+            logger.info(f"TTS cache hit: {text[:100]}")
+            yield from unpack_frames(clip)
+            return
+
+        full_quality = deadline is None or not deadline.degraded
+        frames: List[bytes] = []
+        for frame in self.provider.synthesize_stream(text, audio_format, sample_rate, deadline):
+            frames.append(frame)
+            yield frame
+        if full_quality:
+            self.cache.put(key, pack_frames(frames))
+
+    def stream_key(self, text: str, audio_format: int, sample_rate: int) -> str:
+        """Cache key synthesize_stream uses for text in a requested format."""
+        return stream_cache_key(self.provider, text, self.output_format(audio_format, sample_rate))
+
+    def prewarm(
+        self,
+        phrases: Iterable[str],
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        clips: Iterable[str] = (),
+    ):
+        """
+        Render phrases that are not cached yet, as synthesize_stream serves them.
+
+        Args:
+            phrases: Phrases to render
+            audio_format: Requested AudioFormat of replies
+            sample_rate: Requested sample rate of replies (0 = provider default)
+            clips: Phrases also rendered as whole clips, as synthesize serves
+                them (e.g. error replies of the non-streaming turn paths)
+        """
+        rendered = 0
+        for phrase in clips:
+            if self.cache.get(provider_cache_key(self.provider, phrase)) is not None:
+                continue
+            try:
+                with request_priority(BACKGROUND):
+                    self.synthesize(phrase)
+                rendered += 1
+            except Exception as e:
+                logger.warning(f"Could not pre-render phrase '{phrase}': {e}")
+
+        for phrase in phrases:
+            if self.cache.get(self.stream_key(phrase, audio_format, sample_rate)) is not None:
+                continue
+            try:
+                with request_priority(BACKGROUND):
+                    for _ in self.synthesize_stream(phrase, audio_format, sample_rate):
+                        pass
+                rendered += 1
+            except Exception as e:
+                logger.warning(f"Could not pre-render phrase '{phrase}': {e}")
+        logger.info(f"Phrase bank ready ({rendered} newly rendered)")
+
+
+class AsyncCachedTTS(AsyncTTSProvider):
+    """Async TTS provider wrapper that serves repeated text from a TTSCache."""
+
+    def __init__(self, provider: AsyncTTSProvider, cache: TTSCache):
+        """
+        Initialize async cached TTS.
+
+        Args:
+            provider: Provider used on cache misses
+            cache: Audio cache
+        """
+        self.provider = provider
+        self.cache = cache
+
+    async def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Synthesize speech, using the cache when possible."""
+        key = provider_cache_key(self.provider, text)
+        audio = self.cache.get(key)
+        if audio is not None:
+            logger.info(f"TTS cache hit: {text[:100]}")
+            return audio
+
+        # Clips rendered with a degraded (faster) model are not cached under
+        # the full-quality key
+        full_quality = deadline is None or not deadline.degraded
+        audio = await self.provider.synthesize(text, deadline)
+        if full_quality:
+            self.cache.put(key, audio)
+        return audio
+
+    def output_format(self, audio_format: int, sample_rate: int) -> Tuple[int, int]:
+        """The wrapped provider's output format."""
+        return self.provider.output_format(audio_format, sample_rate)
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[bytes]:
+        """Stream speech, replaying cached frames when possible."""
+        audio_format, sample_rate = self.output_format(audio_format, sample_rate)
+        if audio_format == UNKNOWN_FORMAT:
+            yield await self.synthesize(text, deadline)
+            return
+
+        key = stream_cache_key(self.provider, text, (audio_format, sample_rate))
+        clip = self.cache.get(key)
+        if clip is not None:
+            logger.info(f"TTS cache hit: {text[:100]}")
+            for frame in unpack_frames(clip):
+                yield frame
+            return
+
+        full_quality = deadline is None or not deadline.degraded
+        frames: List[bytes] = []
+        async for frame in self.provider.synthesize_stream(
+            text, audio_format, sample_rate, deadline
+        ):
+            frames.append(frame)
+            yield frame
+        if full_quality:
+            self.cache.put(key, pack_frames(frames))
+
+    def stream_key(self, text: str, audio_format: int, sample_rate: int) -> str:
+        """Cache key synthesize_stream uses for text in a requested format."""
+        return stream_cache_key(self.provider, text, self.output_format(audio_format, sample_rate))
+
+    async def prewarm(
+        self,
+        phrases: Iterable[str],
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        clips: Iterable[str] = (),
+    ):
+        """
+        Render phrases that are not cached yet, as synthesize_stream serves them.
+
+        Args:
+            phrases: Phrases to render
+            audio_format: Requested AudioFormat of replies
+            sample_rate: Requested sample rate of replies (0 = provider default)
+            clips: Phrases also rendered as whole clips, as synthesize serves
+                them (e.g. error replies of the non-streaming turn paths)
+        """
+        rendered = 0
+        for phrase in clips:
+            if self.cache.get(provider_cache_key(self.provider, phrase)) is not None:
+                continue
+            try:
+                with request_priority(BACKGROUND):
+                    await self.synthesize(phrase)
+                rendered += 1
+            except Exception as e:
+                logger.warning(f"Could not pre-render phrase '{phrase}': {e}")
+
+        for phrase in phrases:
+            if self.cache.get(self.stream_key(phrase, audio_format, sample_rate)) is not None:
+                continue
+            try:
+                with request_priority(BACKGROUND):
+                    async for _ in self.synthesize_stream(phrase, audio_format, sample_rate):
+                        pass
+                rendered += 1
+            except Exception as e:
+                logger.warning(f"Could not pre-render phrase '{phrase}': {e}")
+        logger.info(f"Phrase bank ready ({rendered} newly rendered)")
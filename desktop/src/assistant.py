@@ -1,13 +1,41 @@
 """Main AI Assistant logic."""
 
+import contextvars
 import logging
-from typing import List, Optional
-from ai.stt import STTProvider
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set
+from ai.cancel import CancelToken, TurnCancelled, cancel_scope
+from ai.context import (
+    SUMMARY_INSTRUCTIONS,
+    ContextWindow,
+    build_summary_request,
+    context_budget_for_model,
+)
+from ai.deadline import Deadline, DeadlineExceeded
+from ai.scheduler import BACKGROUND, request_priority
+from ai.stt import STT_SAMPLE_RATE, STTProvider, StreamingTranscriber, TranscriptResult
 from ai.llm import LLMProvider, Message
+from ai.sentences import SentenceChunker
 from ai.tts import TTSProvider
+from audio.decoder import AudioDecoder
+from audio.formats import PCM
+from audio.vad import VoiceActivityDetector
+from conversation import DEFAULT_SESSION, ConversationStore
+from metrics import StreamTimer, record_stage, span
 
 logger = logging.getLogger(__name__)
 
+AUDIO_ERROR_MESSAGE = "I'm sorry, I encountered an error processing your request."
+TEXT_ERROR_MESSAGE = "I'm sorry, I encountered an error generating a response."
+TIMEOUT_MESSAGE = "Sorry, that took too long. Please try again."
+
+# Appended to the recorded part of a response the user interrupted
+INTERRUPTED_MARKER = "[interrupted]"
+
 
 class AIAssistant:
     """Core AI assistant that processes input and generates responses."""
@@ -18,6 +46,9 @@ class AIAssistant:
         llm_provider: LLMProvider,
         tts_provider: TTSProvider,
         system_prompt: Optional[str] = None,
+        conversations: Optional[ConversationStore] = None,
+        context_window: Optional[ContextWindow] = None,
+        vad: Optional[VoiceActivityDetector] = None,
     ):
         """
         Initialize AI Assistant.
@@ -27,12 +58,24 @@ class AIAssistant:
             llm_provider: LLM provider
             tts_provider: Text-to-speech provider
             system_prompt: System prompt for the LLM
+            conversations: Session-keyed history store
+            context_window: Token budget applied to history on every turn
+            vad: Voice activity detector applied to utterances before
+                transcription
         """
         self.stt = stt_provider
         self.llm = llm_provider
         self.tts = tts_provider
         self.system_prompt = system_prompt or self.default_system_prompt()
-        self.conversation_history: List[Message] = []
+        self.conversations = conversations or ConversationStore()
+        self.context = context_window or ContextWindow(
+            context_budget_for_model(getattr(llm_provider, "model", ""))
+        )
+        self.vad = vad or VoiceActivityDetector(STT_SAMPLE_RATE)
+        self.transcribers: Dict[str, StreamingTranscriber] = {}
+        self.turn_tokens: Dict[str, Set[CancelToken]] = {}
+        self.turn_tokens_lock = threading.Lock()
+        self.background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
 
         logger.info("AI Assistant initialized")
 
@@ -44,12 +87,55 @@ Keep your responses concise and conversational, as they will be converted to spe
 Avoid long lists or complex formatting.
 Be friendly, clear, and helpful."""
 
-    def process_audio_input(self, audio_bytes: bytes) -> tuple[str, str, bytes]:
+    @contextmanager
+    def turn(self, session_id: str):
+        """
+        Track a turn of the session so cancel_turn can interrupt it.
+
+        Yields:
+            The turn's CancelToken, to be handed to its stages
+        """
+        cancel = CancelToken()
+        with self.turn_tokens_lock:
+            self.turn_tokens.setdefault(session_id, set()).add(cancel)
+        try:
+            yield cancel
+        finally:
+            with self.turn_tokens_lock:
+                tokens = self.turn_tokens.get(session_id)
+                if tokens is not None:
+                    tokens.discard(cancel)
+                    if not tokens:
+                        del self.turn_tokens[session_id]
+
+    def cancel_turn(self, session_id: str, reason: str = "cancelled") -> List[CancelToken]:
+        """
+        Interrupt the session's turns in progress (barge-in).
+
+        Returns:
+            Tokens of the cancelled turns, e.g. to flush their queued output
+        """
+        with self.turn_tokens_lock:
+            tokens = list(self.turn_tokens.pop(session_id, ()))
+        for cancel in tokens:
+            cancel.cancel(reason)
+        if tokens:
+            logger.info(f"Cancelled {len(tokens)} turn(s) of {session_id}: {reason}")
+        return tokens
+
+    def process_audio_input(
+        self,
+        audio_bytes: bytes,
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+    ) -> tuple[str, str, bytes]:
         """
         Process audio input and return transcript, response text, and response audio.
 
         Args:
             audio_bytes: Input audio from user
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline shared by all stages
 
         Returns:
             Tuple of (transcript, response_text, response_audio)
@@ -57,66 +143,476 @@ Be friendly, clear, and helpful."""
         try:
             # 1. Speech to Text
             logger.info("Transcribing audio...")
-            transcript = self.stt.transcribe(audio_bytes)
+            with span("stt", self.stt):
+                transcript = self.stt.transcribe(audio_bytes, deadline=deadline)
             logger.info(f"User said: {transcript}")
 
             # 2. Generate AI response
-            response_text = self.process_text_input(transcript)
+            response_text = self.process_text_input(transcript, session_id, deadline)
 
             # 3. Text to Speech
             logger.info("Synthesizing speech...")
-            response_audio = self.tts.synthesize(response_text)
+            with span("tts", self.tts):
+                response_audio = self.tts.synthesize(response_text, deadline)
 
             return transcript, response_text, response_audio
 
         except Exception as e:
             logger.error(f"Error processing audio input: {e}")
-            error_msg = "I'm sorry, I encountered an error processing your request."
-            error_audio = self.tts.synthesize(error_msg)
-            return "", error_msg, error_audio
+            error_audio = self.synthesize_error(AUDIO_ERROR_MESSAGE)
+            return "", AUDIO_ERROR_MESSAGE, error_audio
+
+    def synthesize_error(self, message: str) -> bytes:
+        """Synthesize an error message, returning no audio if TTS itself fails."""
+        try:
+            return self.tts.synthesize(message)
+        except Exception as e:
+            logger.error(f"Error synthesizing error message: {e}")
+            return b""
+
+    def process_audio_input_streaming(
+        self,
+        audio_bytes: bytes,
+        on_audio: Callable[[bytes, bool], None],
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> tuple[str, str]:
+        """
+        Process audio input, sending response audio sentence by sentence.
+
+        Each sentence is synthesized as soon as the LLM finishes it, while
+        later sentences are still being generated.
+
+        Args:
+            audio_bytes: Input audio from user
+            on_audio: Called with (audio_chunk, is_final) for every
+                synthesized sentence, then once with (b"", True)
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline shared by all stages
+            on_text: Called with sentences sent as text once there is no
+                time left for speech
+            cancel: Cancels the turn when the user interrupts it
+
+        Returns:
+            Tuple of (transcript, response_text)
+        """
+        try:
+            logger.info("Transcribing audio...")
+            with span("stt", self.stt):
+                transcript = self.stt.transcribe(audio_bytes, deadline=deadline)
+            logger.info(f"User said: {transcript}")
+        except Exception as e:
+            logger.error(f"Error processing audio input: {e}")
+            error_msg = AUDIO_ERROR_MESSAGE
+            self.speak_sentences(iter([error_msg]), on_audio)
+            return "", error_msg
+
+        response_text = self.speak_response(
+            transcript, on_audio, session_id, deadline, on_text, cancel=cancel
+        )
+        return transcript, response_text
+
+    def feed_audio_chunk(
+        self,
+        session_id: str,
+        chunk: bytes,
+        is_final: bool,
+        sample_rate: int,
+        on_transcript: Callable[[TranscriptResult], None],
+        deadline: Optional[Deadline] = None,
+        audio_format: int = PCM,
+        channels: int = 1,
+    ) -> Optional[str]:
+        """
+        Feed a streamed audio chunk into the session's transcriber.
+
+        Partial transcripts are reported as they become available. Once the
+        endpointer detects that the user stopped talking (or the sender marks
+        the final chunk), the final transcript is reported and returned.
+
+        Args:
+            session_id: Identifies the utterance stream (e.g. the user ID)
+            chunk: Audio data of one AudioData packet
+            is_final: Whether the sender marked this as the last chunk
+            sample_rate: Sample rate of the audio
+            on_transcript: Called with each partial and final transcript
+            deadline: Deadline of the turn this chunk would end
+            audio_format: AudioFormat of the chunk (PCM or OPUS)
+            channels: Interleaved channels of PCM audio
+
+        Returns:
+            The final transcript once the utterance ended, or None while the
+            user is still talking or if no speech was detected
+        """
+        transcriber = self.transcribers.get(session_id)
+        if transcriber is None:
+            try:
+                decoder = AudioDecoder(audio_format, sample_rate, channels, STT_SAMPLE_RATE)
+            except ValueError as e:
+                logger.warning(f"Dropping audio from {session_id}: {e}")
+                return None
+            transcriber = StreamingTranscriber(
+                self.stt, STT_SAMPLE_RATE, decoder=decoder, vad=self.vad
+            )
+            self.transcribers[session_id] = transcriber
+
+        try:
+            results = transcriber.feed(chunk, is_final, deadline)
+        except DeadlineExceeded as e:
+            logger.warning(f"Dropping utterance from {session_id}: {e}")
+            self.transcribers.pop(session_id, None)
+            return None
+
+        # Chunks after the endpoint are trailing silence; drop them until the
+        # sender closes the utterance
+        if is_final:
+            self.transcribers.pop(session_id, None)
+
+        final_text = None
+        for result in results:
+            if result.is_final and not result.text:
+                continue
+            on_transcript(result)
+            if result.is_final:
+                final_text = result.text
+                logger.info(f"User said: {final_text}")
+
+        return final_text
+
+    def discard_utterance(self, session_id: str):
+        """Forget a session's partly received utterance (e.g. when it expires)."""
+        transcriber = self.transcribers.pop(session_id, None)
+        if transcriber is not None and transcriber.pending is not None:
+            transcriber.pending.cancel()
+            logger.info(f"Discarded incomplete utterance from {session_id}")
+
+    def speak_sentences(
+        self,
+        sentences: Iterator[str],
+        on_audio: Callable[[bytes, bool], None],
+        deadline: Optional[Deadline] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        cancel: Optional[CancelToken] = None,
+    ) -> str:
+        """
+        Synthesize sentences on a worker thread while they are being produced.
+
+        Cancelling the turn stops synthesis at the next frame and skips the
+        sentences still waiting.
+
+        Args:
+            sentences: Sentence iterator, typically backed by an LLM stream
+            on_audio: Called with (audio_chunk, is_final) in sentence order,
+                once per frame the TTS provider streams
+            deadline: Optional turn deadline bounding each synthesis
+            on_text: Called with sentences sent as text instead of speech
+                once the deadline leaves no time to synthesize them
+            audio_format: Requested AudioFormat of the frames
+            sample_rate: Requested sample rate (0 = provider default)
+            cancel: Cancels the turn when the user interrupts it
+
+        Returns:
+            The full spoken text, or once cancelled only the sentences
+            whose audio was handed to on_audio in full before that
+        """
+        pending: queue.Queue = queue.Queue()
+        spoken: List[str] = []
+        delivered: List[str] = []
+        started = time.monotonic()
+        first_audio = True
+
+        def tts_worker():
+            nonlocal first_audio
+            while True:
+                sentence = pending.get()
+                if sentence is None:
+                    break
+                if cancel is not None and cancel.cancelled:
+                    continue
+                timer = StreamTimer("tts", self.tts)
+                try:
+                    if on_text is not None and deadline is not None and deadline.text_only:
+                        on_text(sentence)
+                    else:
+                        frames = self.tts.synthesize_stream(
+                            sentence, audio_format, sample_rate, deadline
+                        )
+                        try:
+                            for frame in frames:
+                                if cancel is not None:
+                                    cancel.check("tts")
+                                timer.item()
+                                if first_audio:
+                                    first_audio = False
+                                    record_stage("first_audio", time.monotonic() - started)
+                                on_audio(frame, False)
+                        finally:
+                            # Stops an in-progress synthesis request
+                            frames.close()
+                        timer.done()
+                    delivered.append(sentence)
+                except TurnCancelled as e:
+                    logger.info(f"Stopped speaking: {e}")
+                except DeadlineExceeded as e:
+                    logger.warning(f"Dropped sentence: {e}")
+                except Exception as e:
+                    if cancel is not None and cancel.cancelled:
+                        # The response was closed under a blocked read
+                        logger.info(f"Stopped speaking: turn {cancel.reason}")
+                        continue
+                    timer.failed()
+                    logger.error(f"Error synthesizing sentence: {e}")
+
+        # Copy the context so the worker's stages join the turn's trace
+        context = contextvars.copy_context()
+        worker = threading.Thread(
+            target=context.run, args=(tts_worker,), name="tts-pipeline", daemon=True
+        )
+        worker.start()
+
+        try:
+            for sentence in sentences:
+                spoken.append(sentence)
+                pending.put(sentence)
+        finally:
+            pending.put(None)
+            worker.join()
+            if cancel is None or not cancel.cancelled:
+                on_audio(b"", True)
+
+        if cancel is not None and cancel.cancelled:
+            return " ".join(delivered)
+        return " ".join(spoken)
+
+    def speak_response(
+        self,
+        text: str,
+        on_audio: Callable[[bytes, bool], None],
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        cancel: Optional[CancelToken] = None,
+    ) -> str:
+        """
+        Generate a response to text input and speak it as it streams.
+
+        History records what was spoken; if the user interrupts, the LLM
+        request and synthesis stop and only what was delivered is recorded.
+
+        Args:
+            text: User's text input (e.g. the final transcript)
+            on_audio: Called with (audio_chunk, is_final) for every frame
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline shared by all stages
+            on_text: Called with sentences sent as text instead of speech
+            audio_format: Requested AudioFormat of the frames
+            sample_rate: Requested sample rate (0 = provider default)
+            cancel: Cancels the turn when the user interrupts it
+
+        Returns:
+            The spoken text
+        """
+        # Providers close their open responses when this turn is cancelled,
+        # so a CANCEL also aborts a read blocked on the first token or byte
+        with cancel_scope(cancel):
+            spoken = self.speak_sentences(
+                self.process_text_input_stream(text, session_id, deadline, cancel, record=False),
+                on_audio,
+                deadline,
+                on_text,
+                audio_format,
+                sample_rate,
+                cancel,
+            )
+        if cancel is not None and cancel.cancelled:
+            self.record_interrupted(spoken, session_id)
+        else:
+            self.record_response(spoken, session_id)
+        return spoken
+
+    def process_text_input_stream(
+        self,
+        text: str,
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+        cancel: Optional[CancelToken] = None,
+        record: bool = True,
+    ) -> Iterator[str]:
+        """
+        Process text input and yield the response sentence by sentence.
+
+        When the deadline passes, the response ends after the text
+        generated so far. When the turn is cancelled, the LLM request is
+        aborted and the response ends.
+
+        Args:
+            text: User's text input
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline
+            cancel: Cancels the turn when the user interrupts it
+            record: Whether to add the generated response to history
+                (callers that know what was delivered record it themselves)
+
+        Yields:
+            Complete sentences of the AI response
+        """
+        self.conversations.append(session_id, Message("user", text))
+        chunker = SentenceChunker()
+        response_parts: List[str] = []
+        timer = StreamTimer("llm", self.llm)
+
+        try:
+            logger.info("Streaming AI response...")
+            messages, system_prompt = self.prepare_context(session_id)
+            stream = self.llm.generate_response_stream(messages, system_prompt, deadline)
+            try:
+                for delta in stream:
+                    if cancel is not None:
+                        cancel.check("llm")
+                    timer.item()
+                    response_parts.append(delta)
+                    yield from chunker.feed(delta)
+                    if deadline is not None:
+                        deadline.check("llm")
+            finally:
+                # Closing the stream aborts the request if it is still running
+                stream.close()
+            timer.done()
+
+        except TurnCancelled as e:
+            logger.info(f"Stopped response: {e}")
+            return
 
-    def process_text_input(self, text: str) -> str:
+        except DeadlineExceeded as e:
+            logger.warning(f"Ending response early: {e}")
+            if not response_parts:
+                response_parts.append(TIMEOUT_MESSAGE)
+                yield TIMEOUT_MESSAGE
+
+        except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                # The response was closed under a blocked read
+                logger.info(f"Stopped response: turn {cancel.reason}")
+                return
+            logger.error(f"Error generating response: {e}")
+            timer.failed()
+            if not response_parts:
+                error_msg = TEXT_ERROR_MESSAGE
+                response_parts.append(error_msg)
+                yield error_msg
+
+        remainder = chunker.flush()
+        if remainder:
+            yield remainder
+
+        if record:
+            self.record_response("".join(response_parts), session_id)
+
+    def process_text_input(
+        self,
+        text: str,
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
         """
         Process text input and return response.
 
         Args:
             text: User's text input
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline
 
         Returns:
             AI response text
         """
         try:
             # Add user message to history
-            self.conversation_history.append(Message("user", text))
+            self.conversations.append(session_id, Message("user", text))
 
             # Generate response
             logger.info("Generating AI response...")
-            response = self.llm.generate_response(
-                self.conversation_history, self.system_prompt
-            )
-
-            # Add assistant response to history
-            self.conversation_history.append(Message("assistant", response))
+            messages, system_prompt = self.prepare_context(session_id)
+            with span("llm", self.llm):
+                response = self.llm.generate_response(messages, system_prompt, deadline)
 
-            # Keep history manageable (last 10 messages)
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
-
-            logger.info(f"Assistant response: {response}")
+            self.record_response(response, session_id)
             return response
 
+        except DeadlineExceeded as e:
+            logger.warning(f"No response in time: {e}")
+            return TIMEOUT_MESSAGE
+
         except Exception as e:
             logger.error(f"Error generating response: {e}")
-            return "I'm sorry, I encountered an error generating a response."
+            return TEXT_ERROR_MESSAGE
+
+    def prepare_context(self, session_id: str) -> tuple[List[Message], str]:
+        """
+        Build the messages and system prompt for a turn within the token budget.
+
+        Older messages that no longer fit are folded into the session's
+        rolling summary in the background.
+
+        Returns:
+            Tuple of (messages, system_prompt)
+        """
+        summary, history = self.conversations.snapshot(session_id)
+        messages, system_prompt, overflow = self.context.build(
+            self.system_prompt, summary, history
+        )
+
+        if overflow and self.context.begin_summary(session_id):
+            self.schedule_summary(session_id, summary, overflow)
+
+        return messages, system_prompt
+
+    def schedule_summary(self, session_id: str, summary: str, overflow: List[Message]):
+        """Summarize overflowed messages off the hot path."""
+        self.background.submit(self.summarize, session_id, summary, overflow)
+
+    def summarize(self, session_id: str, summary: str, overflow: List[Message]):
+        """Fold overflowed messages into the session's rolling summary."""
+        try:
+            # Queued behind voice turns sharing the API key
+            with request_priority(BACKGROUND):
+                new_summary = self.llm.generate_response(
+                    build_summary_request(summary, overflow), SUMMARY_INSTRUCTIONS
+                )
+            self.conversations.compact(session_id, overflow, new_summary.strip())
+            logger.info(f"Summarized {len(overflow)} older message(s) for {session_id}")
+        except Exception as e:
+            logger.warning(f"Could not summarize conversation {session_id}: {e}")
+        finally:
+            self.context.end_summary(session_id)
+
+    def record_response(self, response: str, session_id: str = DEFAULT_SESSION):
+        """Add an assistant response to the session's history."""
+        self.conversations.append(session_id, Message("assistant", response))
+        logger.info(f"Assistant response: {response}")
+
+    def record_interrupted(self, delivered: str, session_id: str = DEFAULT_SESSION):
+        """
+        Add the delivered part of an interrupted response to the session's history.
+
+        The marker keeps user and assistant messages alternating even when
+        nothing was delivered, and tells the model its reply was cut short.
+        """
+        self.record_response(f"{delivered} {INTERRUPTED_MARKER}".lstrip(), session_id)
 
-    def clear_history(self):
-        """Clear conversation history."""
-        self.conversation_history = []
+    def clear_history(self, session_id: str = DEFAULT_SESSION):
+        """Clear a session's conversation history."""
+        self.conversations.clear(session_id)
         logger.info("Conversation history cleared")
 
-    def get_conversation_history(self) -> List[Message]:
-        """Get conversation history."""
-        return self.conversation_history.copy()
+    def get_conversation_history(self, session_id: str = DEFAULT_SESSION) -> List[Message]:
+        """Get a session's conversation history."""
+        return self.conversations.messages(session_id)
 
     def set_system_prompt(self, prompt: str):
         """Update system prompt."""
@@ -0,0 +1,637 @@
+"""asyncio AI Assistant for serving many sessions on one event loop."""
+
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from ai.cancel import CancelToken, TurnCancelled
+from ai.context import SUMMARY_INSTRUCTIONS, ContextWindow, build_summary_request
+from ai.deadline import Deadline, DeadlineExceeded
+from ai.scheduler import BACKGROUND, SPECULATIVE, request_priority
+from ai.stt import (
+    STT_SAMPLE_RATE,
+    AsyncSTTProvider,
+    BlockingSTT,
+    StreamingTranscriber,
+    TranscriptResult,
+)
+from ai.llm import AsyncLLMProvider, Message
+from ai.sentences import SentenceChunker
+from ai.speculation import Speculator
+from ai.tts import AsyncTTSProvider
+from assistant import AUDIO_ERROR_MESSAGE, TEXT_ERROR_MESSAGE, TIMEOUT_MESSAGE, AIAssistant
+from audio.decoder import AudioDecoder
+from audio.formats import PCM
+from audio.vad import VoiceActivityDetector
+from conversation import DEFAULT_SESSION, ConversationStore
+from metrics import StreamTimer, record_stage, span
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAIAssistant(AIAssistant):
+    """
+    AI assistant whose turns run as coroutines.
+
+    Turns for the same session run one at a time; turns for different
+    sessions run concurrently, up to max_concurrent_turns at once.
+
+    With a speculator, the LLM response starts from a stable partial
+    transcript while the user is still finishing, and is used for the turn
+    if the final transcript matches.
+    """
+
+    def __init__(
+        self,
+        stt_provider: AsyncSTTProvider,
+        llm_provider: AsyncLLMProvider,
+        tts_provider: AsyncTTSProvider,
+        system_prompt: Optional[str] = None,
+        conversations: Optional[ConversationStore] = None,
+        context_window: Optional[ContextWindow] = None,
+        vad: Optional[VoiceActivityDetector] = None,
+        max_concurrent_turns: int = 8,
+        speculator: Optional[Speculator] = None,
+    ):
+        """
+        Initialize async AI Assistant.
+
+        Args:
+            stt_provider: Async speech-to-text provider
+            llm_provider: Async LLM provider
+            tts_provider: Async text-to-speech provider
+            system_prompt: System prompt for the LLM
+            conversations: Session-keyed history store
+            context_window: Token budget applied to history on every turn
+            vad: Voice activity detector applied to utterances before
+                transcription
+            max_concurrent_turns: Upper bound on turns in flight
+            speculator: Starts responses from stable partial transcripts
+                (None disables speculation)
+        """
+        super().__init__(
+            stt_provider,
+            llm_provider,
+            tts_provider,
+            system_prompt,
+            conversations,
+            context_window,
+            vad,
+        )
+        self.background_tasks: Set[asyncio.Task] = set()
+        self.turn_slots = asyncio.Semaphore(max_concurrent_turns)
+        self.session_locks: Dict[str, asyncio.Lock] = {}
+        self.feed_locks: Dict[str, asyncio.Lock] = {}
+        # Transcribers block on the event loop's STT calls, which may use the
+        # default executor themselves; their own threads can't starve those
+        self.feed_executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_turns, thread_name_prefix="stt-feed"
+        )
+        self.speculator = speculator
+        self.conversations.on_evict = self._forget_session
+
+    def _forget_session(self, session_id: str):
+        """Drop per-session locks once the store evicts the session."""
+        lock = self.session_locks.get(session_id)
+        if lock is not None and not lock.locked():
+            del self.session_locks[session_id]
+        lock = self.feed_locks.get(session_id)
+        if lock is not None and not lock.locked():
+            del self.feed_locks[session_id]
+
+    @asynccontextmanager
+    async def turn(self, session_id: str):
+        """
+        Hold the session's turn lock and a global concurrency slot.
+
+        The turn can be cancelled while it waits for them, too.
+
+        Yields:
+            The turn's CancelToken, to be handed to its stages
+        """
+        with super().turn(session_id) as cancel:
+            lock = self.session_locks.setdefault(session_id, asyncio.Lock())
+            async with lock:
+                async with self.turn_slots:
+                    yield cancel
+
+    def schedule_summary(self, session_id: str, summary: str, overflow: List[Message]):
+        """Summarize overflowed messages in a background task."""
+        task = asyncio.create_task(self.summarize(session_id, summary, overflow))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def summarize(self, session_id: str, summary: str, overflow: List[Message]):
+        """Fold overflowed messages into the session's rolling summary."""
+        try:
+            # Queued behind voice turns sharing the API key
+            with request_priority(BACKGROUND):
+                new_summary = await self.llm.generate_response(
+                    build_summary_request(summary, overflow), SUMMARY_INSTRUCTIONS
+                )
+            self.conversations.compact(session_id, overflow, new_summary.strip())
+            logger.info(f"Summarized {len(overflow)} older message(s) for {session_id}")
+        except Exception as e:
+            logger.warning(f"Could not summarize conversation {session_id}: {e}")
+        finally:
+            self.context.end_summary(session_id)
+
+    async def feed_audio_chunk(
+        self,
+        session_id: str,
+        chunk: bytes,
+        is_final: bool,
+        sample_rate: int,
+        on_transcript: Callable[[TranscriptResult], Awaitable[None]],
+        deadline: Optional[Deadline] = None,
+        audio_format: int = PCM,
+        channels: int = 1,
+    ) -> Optional[str]:
+        """
+        Feed a streamed audio chunk into the session's transcriber.
+
+        Chunks of one session are processed in arrival order.
+
+        Args:
+            session_id: Identifies the utterance stream (e.g. the user ID)
+            chunk: Audio data of one AudioData packet
+            is_final: Whether the sender marked this as the last chunk
+            sample_rate: Sample rate of the audio
+            on_transcript: Coroutine called with each partial and final transcript
+            deadline: Deadline of the turn this chunk would end
+            audio_format: AudioFormat of the chunk (PCM or OPUS)
+            channels: Interleaved channels of PCM audio
+
+        Returns:
+            The final transcript once the utterance ended, or None while the
+            user is still talking or if no speech was detected
+        """
+        lock = self.feed_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            transcriber = self.transcribers.get(session_id)
+            if transcriber is None:
+                try:
+                    decoder = AudioDecoder(audio_format, sample_rate, channels, STT_SAMPLE_RATE)
+                except ValueError as e:
+                    logger.warning(f"Dropping audio from {session_id}: {e}")
+                    return None
+                blocking_stt = BlockingSTT(self.stt, asyncio.get_running_loop())
+                transcriber = StreamingTranscriber(
+                    blocking_stt,
+                    STT_SAMPLE_RATE,
+                    decoder=decoder,
+                    vad=self.vad,
+                    pause_partial_ms=self.speculator.pause_partial_ms if self.speculator else 0,
+                )
+                self.transcribers[session_id] = transcriber
+
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.feed_executor,
+                    contextvars.copy_context().run,
+                    transcriber.feed,
+                    chunk,
+                    is_final,
+                    deadline,
+                )
+            except DeadlineExceeded as e:
+                logger.warning(f"Dropping utterance from {session_id}: {e}")
+                self.transcribers.pop(session_id, None)
+                self._abandon_speculation(session_id, "utterance dropped")
+                return None
+
+            if is_final:
+                self.transcribers.pop(session_id, None)
+
+        final_text = None
+        for result in results:
+            if result.is_final and not result.text:
+                continue
+            await on_transcript(result)
+            if result.is_final:
+                final_text = result.text
+                logger.info(f"User said: {final_text}")
+            elif result.stable:
+                self._speculate(session_id, result.text)
+
+        if final_text is None and transcriber.final is not None:
+            self._abandon_speculation(session_id, "no speech in utterance")
+        return final_text
+
+    def _speculate(self, session_id: str, text: str):
+        """Start generating a response to a stable partial transcript."""
+        # History is not final while an earlier turn is still running
+        if self.speculator is None or session_id in self.turn_tokens:
+            return
+
+        def stream():
+            summary, history = self.conversations.snapshot(session_id)
+            messages, system_prompt, _ = self.context.build(
+                self.system_prompt, summary, history + [Message("user", text)]
+            )
+            return self.llm.generate_response_stream(messages, system_prompt)
+
+        # The speculation's task inherits the priority
+        with request_priority(SPECULATIVE):
+            self.speculator.start(session_id, text, stream)
+
+    def _abandon_speculation(self, session_id: str, reason: str):
+        if self.speculator is not None:
+            self.speculator.abandon(session_id, reason)
+
+    def discard_utterance(self, session_id: str):
+        """Forget a session's partly received utterance and its speculation."""
+        super().discard_utterance(session_id)
+        self._abandon_speculation(session_id, "utterance discarded")
+
+    def cancel_turn(self, session_id: str, reason: str = "cancelled") -> List[CancelToken]:
+        """Interrupt the session's turns in progress and its speculation (barge-in)."""
+        self._abandon_speculation(session_id, reason)
+        return super().cancel_turn(session_id, reason)
+
+    async def process_audio_input(
+        self,
+        audio_bytes: bytes,
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+    ) -> tuple[str, str, bytes]:
+        """
+        Process audio input and return transcript, response text, and response audio.
+
+        Args:
+            audio_bytes: Input audio from user
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline shared by all stages
+
+        Returns:
+            Tuple of (transcript, response_text, response_audio)
+        """
+        try:
+            with span("stt", self.stt):
+                transcript = await self.stt.transcribe(audio_bytes, deadline=deadline)
+            logger.info(f"User said: {transcript}")
+
+            response_text = await self.process_text_input(transcript, session_id, deadline)
+            with span("tts", self.tts):
+                response_audio = await self.tts.synthesize(response_text, deadline)
+
+            return transcript, response_text, response_audio
+
+        except Exception as e:
+            logger.error(f"Error processing audio input: {e}")
+            error_audio = await self.synthesize_error(AUDIO_ERROR_MESSAGE)
+            return "", AUDIO_ERROR_MESSAGE, error_audio
+
+    async def synthesize_error(self, message: str) -> bytes:
+        """Synthesize an error message, returning no audio if TTS itself fails."""
+        try:
+            return await self.tts.synthesize(message)
+        except Exception as e:
+            logger.error(f"Error synthesizing error message: {e}")
+            return b""
+
+    async def process_audio_input_streaming(
+        self,
+        audio_bytes: bytes,
+        on_audio: Callable[[bytes, bool], Awaitable[None]],
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+        on_text: Optional[Callable[[str], Awaitable[None]]] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> tuple[str, str]:
+        """
+        Process audio input, sending response audio sentence by sentence.
+
+        Args:
+            audio_bytes: Input audio from user
+            on_audio: Coroutine called with (audio_chunk, is_final) for every
+                synthesized sentence, then once with (b"", True)
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline shared by all stages
+            on_text: Coroutine called with sentences sent as text once there
+                is no time left for speech
+            cancel: Cancels the turn when the user interrupts it
+
+        Returns:
+            Tuple of (transcript, response_text)
+        """
+        try:
+            with span("stt", self.stt):
+                transcript = await self.stt.transcribe(audio_bytes, deadline=deadline)
+            logger.info(f"User said: {transcript}")
+        except Exception as e:
+            logger.error(f"Error processing audio input: {e}")
+            error_msg = AUDIO_ERROR_MESSAGE
+            await self.speak_sentences(_iterate([error_msg]), on_audio)
+            return "", error_msg
+
+        response_text = await self.speak_response(
+            transcript, on_audio, session_id, deadline, on_text, cancel=cancel
+        )
+        return transcript, response_text
+
+    async def speak_sentences(
+        self,
+        sentences: AsyncIterator[str],
+        on_audio: Callable[[bytes, bool], Awaitable[None]],
+        deadline: Optional[Deadline] = None,
+        on_text: Optional[Callable[[str], Awaitable[None]]] = None,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        cancel: Optional[CancelToken] = None,
+    ) -> str:
+        """
+        Synthesize sentences in a separate task while they are being produced.
+
+        Cancelling the turn abandons the synthesis in progress immediately
+        and skips the sentences still waiting.
+
+        Args:
+            sentences: Async sentence iterator, typically backed by an LLM stream
+            on_audio: Coroutine called with (audio_chunk, is_final) in sentence
+                order, once per frame the TTS provider streams
+            deadline: Optional turn deadline bounding each synthesis
+            on_text: Coroutine called with sentences sent as text instead of
+                speech once the deadline leaves no time to synthesize them
+            audio_format: Requested AudioFormat of the frames
+            sample_rate: Requested sample rate (0 = provider default)
+            cancel: Cancels the turn when the user interrupts it
+
+        Returns:
+            The full spoken text, or once cancelled only the sentences
+            whose audio was handed to on_audio in full before that
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        spoken: List[str] = []
+        delivered: List[str] = []
+        started = time.monotonic()
+        first_audio = True
+
+        async def tts_worker():
+            nonlocal first_audio
+            while True:
+                sentence = await pending.get()
+                if sentence is None:
+                    break
+                if cancel is not None and cancel.cancelled:
+                    continue
+                timer = StreamTimer("tts", self.tts)
+                try:
+                    if on_text is not None and deadline is not None and deadline.text_only:
+                        await on_text(sentence)
+                    else:
+                        frames = self.tts.synthesize_stream(
+                            sentence, audio_format, sample_rate, deadline
+                        )
+                        async for frame in _within(frames, None, "tts", cancel):
+                            timer.item()
+                            if first_audio:
+                                first_audio = False
+                                record_stage("first_audio", time.monotonic() - started)
+                            await on_audio(frame, False)
+                        timer.done()
+                    delivered.append(sentence)
+                except TurnCancelled as e:
+                    logger.info(f"Stopped speaking: {e}")
+                except DeadlineExceeded as e:
+                    logger.warning(f"Dropped sentence: {e}")
+                except Exception as e:
+                    timer.failed()
+                    logger.error(f"Error synthesizing sentence: {e}")
+
+        worker = asyncio.create_task(tts_worker())
+
+        try:
+            async for sentence in sentences:
+                spoken.append(sentence)
+                pending.put_nowait(sentence)
+        finally:
+            pending.put_nowait(None)
+            await worker
+            if cancel is None or not cancel.cancelled:
+                await on_audio(b"", True)
+
+        if cancel is not None and cancel.cancelled:
+            return " ".join(delivered)
+        return " ".join(spoken)
+
+    async def speak_response(
+        self,
+        text: str,
+        on_audio: Callable[[bytes, bool], Awaitable[None]],
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+        on_text: Optional[Callable[[str], Awaitable[None]]] = None,
+        audio_format: int = PCM,
+        sample_rate: int = 0,
+        cancel: Optional[CancelToken] = None,
+    ) -> str:
+        """
+        Generate a response to text input and speak it as it streams.
+
+        History records what was spoken; if the user interrupts, the LLM
+        request and synthesis stop and only what was delivered is recorded.
+
+        Args:
+            text: User's text input (e.g. the final transcript)
+            on_audio: Coroutine called with (audio_chunk, is_final) for every frame
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline shared by all stages
+            on_text: Coroutine called with sentences sent as text instead of speech
+            audio_format: Requested AudioFormat of the frames
+            sample_rate: Requested sample rate (0 = provider default)
+            cancel: Cancels the turn when the user interrupts it
+
+        Returns:
+            The spoken text
+        """
+        spoken = await self.speak_sentences(
+            self.process_text_input_stream(text, session_id, deadline, cancel, record=False),
+            on_audio,
+            deadline,
+            on_text,
+            audio_format,
+            sample_rate,
+            cancel,
+        )
+        if cancel is not None and cancel.cancelled:
+            self.record_interrupted(spoken, session_id)
+        else:
+            self.record_response(spoken, session_id)
+        return spoken
+
+    async def process_text_input_stream(
+        self,
+        text: str,
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+        cancel: Optional[CancelToken] = None,
+        record: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Process text input and yield the response sentence by sentence.
+
+        When the deadline passes, the LLM stream is cancelled and the
+        response ends after the text generated so far. When the turn is
+        cancelled, the LLM stream is cancelled and the response ends. A
+        speculation matching text continues instead of a new request.
+
+        Args:
+            text: User's text input
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline
+            cancel: Cancels the turn when the user interrupts it
+            record: Whether to add the generated response to history
+                (callers that know what was delivered record it themselves)
+
+        Yields:
+            Complete sentences of the AI response
+        """
+        self.conversations.append(session_id, Message("user", text))
+        chunker = SentenceChunker()
+        response_parts: List[str] = []
+        timer = StreamTimer("llm", self.llm)
+
+        try:
+            speculation = self.speculator.claim(session_id, text) if self.speculator else None
+            if speculation is not None:
+                stream = speculation.replay()
+            else:
+                messages, system_prompt = self.prepare_context(session_id)
+                stream = self.llm.generate_response_stream(messages, system_prompt, deadline)
+            async for delta in _within(stream, deadline, "llm", cancel):
+                timer.item()
+                response_parts.append(delta)
+                for sentence in chunker.feed(delta):
+                    yield sentence
+            timer.done()
+
+        except TurnCancelled as e:
+            logger.info(f"Stopped response: {e}")
+            return
+
+        except DeadlineExceeded as e:
+            logger.warning(f"Ending response early: {e}")
+            if not response_parts:
+                response_parts.append(TIMEOUT_MESSAGE)
+                yield TIMEOUT_MESSAGE
+
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            timer.failed()
+            if not response_parts:
+                error_msg = TEXT_ERROR_MESSAGE
+                response_parts.append(error_msg)
+                yield error_msg
+
+        remainder = chunker.flush()
+        if remainder:
+            yield remainder
+
+        if record:
+            self.record_response("".join(response_parts), session_id)
+
+    async def process_text_input(
+        self,
+        text: str,
+        session_id: str = DEFAULT_SESSION,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """
+        Process text input and return response.
+
+        Args:
+            text: User's text input
+            session_id: Conversation the input belongs to
+            deadline: Optional turn deadline
+
+        Returns:
+            AI response text
+        """
+        try:
+            self.conversations.append(session_id, Message("user", text))
+
+            messages, system_prompt = self.prepare_context(session_id)
+            request = self.llm.generate_response(messages, system_prompt, deadline)
+            if deadline is not None:
+                request = asyncio.wait_for(request, deadline.timeout("llm"))
+            with span("llm", self.llm):
+                response = await request
+
+            self.record_response(response, session_id)
+            return response
+
+        except (DeadlineExceeded, asyncio.TimeoutError) as e:
+            logger.warning(f"No response in time: {e}")
+            return TIMEOUT_MESSAGE
+
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            return TEXT_ERROR_MESSAGE
+
+
+async def _iterate(items: List[str]) -> AsyncIterator[str]:
+    """Turn a list into an async iterator."""
+    for item in items:
+        yield item
+
+
+async def _within(
+    iterator: AsyncIterator,
+    deadline: Optional[Deadline],
+    stage: str,
+    cancel: Optional[CancelToken] = None,
+) -> AsyncIterator:
+    """
+    Iterate until the deadline passes or the turn is cancelled.
+
+    The pending step is cancelled as soon as either happens, and the
+    iterator is closed.
+    """
+    if deadline is None and cancel is None:
+        async for item in iterator:
+            yield item
+        return
+
+    try:
+        while True:
+            try:
+                item = await _step(iterator.__anext__(), deadline, stage, cancel)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await iterator.aclose()
+
+
+async def _step(
+    awaitable: Awaitable,
+    deadline: Optional[Deadline],
+    stage: str,
+    cancel: Optional[CancelToken],
+):
+    """Await one step, raising DeadlineExceeded or TurnCancelled instead of waiting past either."""
+    timeout = deadline.timeout(stage) if deadline is not None else None
+    if cancel is None:
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            deadline.check(stage)
+            raise
+
+    cancel.check(stage)
+    step = asyncio.ensure_future(awaitable)
+    await asyncio.wait(
+        (step, cancel.waiter()), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+    )
+    if step.done():
+        return step.result()
+
+    step.cancel()
+    await asyncio.gather(step, return_exceptions=True)
+    cancel.check(stage)
+    deadline.check(stage)
+    raise asyncio.TimeoutError()
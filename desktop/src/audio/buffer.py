@@ -0,0 +1,53 @@
+"""Growable preallocated audio buffer with zero-copy views."""
+
+from typing import Optional
+
+import numpy as np
+
+
+class AudioBuffer:
+    """
+    Append-only byte buffer for an utterance.
+
+    Capacity is preallocated and doubled when exhausted, so appends do not
+    reallocate per chunk. Readers get memoryview slices instead of copies;
+    the storage behind a view is never resized or overwritten (growing
+    moves to a new allocation), so a view handed to a background
+    transcription stays valid while more audio arrives.
+    """
+
+    def __init__(self, capacity: int = 16000 * 2 * 10):
+        """
+        Initialize audio buffer.
+
+        Args:
+            capacity: Initial size in bytes (default: 10 s of 16 kHz PCM)
+        """
+        self.storage = bytearray(max(capacity, 1))
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, data) -> None:
+        """Copy a chunk (bytes-like) onto the end of the buffer."""
+        end = self.length + len(data)
+        if end > len(self.storage):
+            capacity = len(self.storage)
+            while capacity < end:
+                capacity *= 2
+            storage = bytearray(capacity)
+            storage[: self.length] = memoryview(self.storage)[: self.length]
+            self.storage = storage
+
+        self.storage[self.length : end] = data
+        self.length = end
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Zero-copy view of [start, end) of the buffered bytes."""
+        end = self.length if end is None else min(end, self.length)
+        return memoryview(self.storage)[start:end]
+
+    def samples(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Zero-copy int16 view of buffered 16-bit PCM between byte offsets."""
+        return np.frombuffer(self.view(start, end), dtype="<i2")
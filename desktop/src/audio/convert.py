@@ -0,0 +1,141 @@
+"""Vectorized PCM conversion: sample types, channel mixing, resampling, WAV."""
+
+import struct
+from typing import Union
+
+import numpy as np
+
+# bytes, bytearray or memoryview holding 16-bit little-endian samples
+PCMData = Union[bytes, bytearray, memoryview]
+
+
+def pcm16_to_float(pcm: PCMData) -> np.ndarray:
+    """16-bit PCM as float32 samples in [-1, 1) (one copy, no intermediate)."""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) * (1.0 / 32768.0)
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    """float32 samples in [-1, 1] as 16-bit little-endian PCM."""
+    scaled = np.clip(samples * 32768.0, -32768.0, 32767.0)
+    return np.rint(scaled).astype("<i2").tobytes()
+
+
+def mix_to_mono(samples: np.ndarray, channels: int) -> np.ndarray:
+    """Average interleaved channels into one; trailing partial frames are dropped."""
+    if channels <= 1:
+        return samples
+    frames = len(samples) // channels
+    return samples[: frames * channels].reshape(frames, channels).mean(axis=1, dtype=np.float32)
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Resample float samples by linear interpolation.
+
+    Downsampling first applies a box filter as wide as the rate ratio, which
+    keeps most energy above the new Nyquist frequency from aliasing into
+    the speech band.
+    """
+    if from_rate == to_rate or not len(samples):
+        return samples
+
+    ratio = from_rate / to_rate
+    if ratio >= 2:
+        width = int(ratio)
+        samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), "same")
+
+    length = int(len(samples) / ratio)
+    positions = np.arange(length, dtype=np.float64) * ratio
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class Resampler:
+    """
+    Streaming resample: the same filter and interpolation as resample, with
+    their state carried across chunks.
+
+    Resampling each 20 ms chunk on its own zero-pads the filter at both of
+    its ends and restarts the interpolation grid, an audible artifact at
+    the chunk rate; truncating each chunk's output length also drifts for
+    non-integer ratios. Here output sample k is always taken at input
+    position k * from_rate / to_rate of the whole stream.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int):
+        """
+        Initialize resampler.
+
+        Args:
+            from_rate: Sample rate of the input
+            to_rate: Sample rate to produce
+        """
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        ratio = from_rate / to_rate
+        width = int(ratio) if ratio >= 2 else 1
+        self.kernel = np.full(width, 1.0 / width, dtype=np.float32)
+        # Last width - 1 inputs, so the (causal) box filter spans chunk boundaries
+        self.history = np.zeros(width - 1, dtype=np.float32)
+        # Filtered samples not yet passed by the interpolation, from stream index start
+        self.filtered = np.zeros(0, dtype=np.float32)
+        self.start = 0
+        # Index of the next output sample
+        self.produced = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next chunk of the stream; may hold back a sample for the next one."""
+        if self.from_rate == self.to_rate or not len(samples):
+            return samples
+
+        padded = np.concatenate((self.history, samples))
+        if len(self.history):
+            self.history = padded[-len(self.history):]
+        filtered = np.convolve(padded, self.kernel, "valid").astype(np.float32)
+        self.filtered = np.concatenate((self.filtered, filtered))
+
+        # Outputs whose position lies within the filtered samples so far
+        last = self.start + len(self.filtered) - 1
+        end = last * self.to_rate // self.from_rate + 1
+        outputs = np.arange(self.produced, end, dtype=np.float64)
+        positions = outputs * self.from_rate / self.to_rate - self.start
+        resampled = np.interp(positions, np.arange(len(self.filtered)), self.filtered)
+        self.produced = end
+
+        # Keep what the next output still interpolates from
+        keep = min(self.produced * self.from_rate // self.to_rate, last + 1)
+        self.filtered = self.filtered[keep - self.start:]
+        self.start = keep
+        return resampled.astype(np.float32)
+
+
+def resample_pcm(pcm: PCMData, from_rate: int, to_rate: int) -> bytes:
+    """Resample 16-bit mono PCM."""
+    if from_rate == to_rate or not pcm:
+        return bytes(pcm)
+    return float_to_pcm16(resample(pcm16_to_float(pcm), from_rate, to_rate))
+
+
+def wav_header(data_bytes: int, sample_rate: int, channels: int = 1) -> bytes:
+    """Canonical 44-byte header of a 16-bit PCM WAV file."""
+    byte_rate = sample_rate * channels * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_bytes,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        channels,
+        sample_rate,
+        byte_rate,
+        channels * 2,
+        16,
+        b"data",
+        data_bytes,
+    )
+
+
+def pcm_to_wav(pcm: PCMData, sample_rate: int) -> bytes:
+    """Wrap 16-bit mono PCM in a WAV container with a single copy."""
+    return b"".join((wav_header(len(pcm), sample_rate), pcm))
@@ -0,0 +1,93 @@
+"""Conversion of inbound phone audio into what the STT engines expect."""
+
+from audio.convert import PCMData, Resampler, float_to_pcm16, mix_to_mono, pcm16_to_float
+from audio.formats import OPUS, PCM, UNKNOWN_FORMAT, opus_sample_rate
+
+# Longest Opus packet (120 ms), in milliseconds
+MAX_OPUS_PACKET_MS = 120
+
+
+class AudioDecoder:
+    """
+    Turns one stream of AudioData chunks into 16-bit mono PCM at a target rate.
+
+    PCM already in the target layout passes through without a copy; other
+    PCM is mixed down and resampled with NumPy, continuously across chunks.
+    Opus is decoded in-process, straight to mono at the target rate, one
+    packet per chunk.
+    """
+
+    def __init__(
+        self,
+        audio_format: int,
+        sample_rate: int,
+        channels: int = 1,
+        target_rate: int = 16000,
+    ):
+        """
+        Initialize audio decoder.
+
+        Args:
+            audio_format: AudioFormat of the incoming chunks (UNKNOWN_FORMAT
+                is treated as PCM)
+            sample_rate: Sample rate of the incoming audio
+            channels: Interleaved channels of incoming PCM
+            target_rate: Sample rate to produce
+
+        Raises:
+            ValueError: For formats that cannot be decoded in-process (AAC)
+        """
+        self.audio_format = PCM if audio_format == UNKNOWN_FORMAT else audio_format
+        self.sample_rate = sample_rate or target_rate
+        self.channels = max(channels, 1)
+        self.target_rate = target_rate
+        self.remainder = b""
+
+        if self.audio_format == OPUS:
+            # Optional dependency, only needed when the phone sends Opus
+            import opuslib
+
+            # Opus decodes at any supported rate and channel count,
+            # whatever the sender encoded
+            self.decode_rate = opus_sample_rate(target_rate)
+            self.opus = opuslib.Decoder(self.decode_rate, 1)
+            self.max_frame_samples = self.decode_rate * MAX_OPUS_PACKET_MS // 1000
+            self.resampler = Resampler(self.decode_rate, target_rate)
+        elif self.audio_format == PCM:
+            self.resampler = Resampler(self.sample_rate, target_rate)
+        else:
+            raise ValueError(f"Audio format {audio_format} cannot be decoded in-process")
+
+    @property
+    def passthrough(self) -> bool:
+        """Whether PCM chunks are already 16-bit mono at the target rate."""
+        return (
+            self.audio_format == PCM
+            and self.channels == 1
+            and self.sample_rate == self.target_rate
+        )
+
+    def decode(self, data: PCMData) -> PCMData:
+        """Convert one chunk; may return an empty result while buffering."""
+        if self.audio_format == OPUS:
+            if not data:
+                return b""
+            pcm = self.opus.decode(bytes(data), self.max_frame_samples)
+            if self.decode_rate == self.target_rate:
+                return pcm
+            return float_to_pcm16(self.resampler.process(pcm16_to_float(pcm)))
+
+        if self.passthrough and not self.remainder and len(data) % 2 == 0:
+            return data
+
+        # Keep a partial sample frame for the next chunk
+        frame_bytes = 2 * self.channels
+        if self.remainder:
+            data = self.remainder + bytes(data)
+        usable = len(data) - len(data) % frame_bytes
+        self.remainder = bytes(data[usable:])
+        if not usable:
+            return b""
+
+        samples = mix_to_mono(pcm16_to_float(memoryview(data)[:usable]), self.channels)
+        return float_to_pcm16(self.resampler.process(samples))
@@ -0,0 +1,66 @@
+"""Framing of synthesized 16-bit mono PCM for the phone."""
+
+from typing import List
+
+from audio.formats import OPUS
+
+
+class PCMFrameEncoder:
+    """Passes PCM through unchanged, one chunk per synthesized piece."""
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+
+    def encode(self, pcm: bytes) -> List[bytes]:
+        """Frames for the next piece of PCM."""
+        return [pcm] if pcm else []
+
+    def flush(self) -> List[bytes]:
+        """Frames for audio still buffered at the end of the stream."""
+        return []
+
+
+class OpusFrameEncoder:
+    """Encodes PCM into fixed-length Opus packets, one per frame."""
+
+    def __init__(self, sample_rate: int, frame_ms: int = 20):
+        """
+        Initialize Opus frame encoder.
+
+        Args:
+            sample_rate: PCM sample rate; must be one Opus supports
+            frame_ms: Frame length (2.5, 5, 10, 20, 40 or 60 ms)
+        """
+        # Optional dependency, only needed for Opus output
+        import opuslib
+
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+        self.buffer = bytearray()
+
+    def encode(self, pcm: bytes) -> List[bytes]:
+        """Opus packets for every complete frame buffered so far."""
+        self.buffer += pcm
+        complete = len(self.buffer) - len(self.buffer) % self.frame_bytes
+        packets = [
+            self.encoder.encode(bytes(self.buffer[i : i + self.frame_bytes]), self.frame_samples)
+            for i in range(0, complete, self.frame_bytes)
+        ]
+        del self.buffer[:complete]
+        return packets
+
+    def flush(self) -> List[bytes]:
+        """Encode the last partial frame, padded with silence."""
+        if not self.buffer:
+            return []
+        self.buffer += bytes(self.frame_bytes - len(self.buffer))
+        return self.encode(b"")
+
+
+def frame_encoder(audio_format: int, sample_rate: int):
+    """Encoder producing frames of audio_format at sample_rate."""
+    if audio_format == OPUS:
+        return OpusFrameEncoder(sample_rate)
+    return PCMFrameEncoder(sample_rate)
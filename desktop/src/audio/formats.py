@@ -0,0 +1,56 @@
+"""Audio formats exchanged with the phone."""
+
+# Values of the AudioFormat enum in proto/streaming.proto, mirrored here so
+# audio code does not depend on the generated protobuf modules
+UNKNOWN_FORMAT = 0
+PCM = 1
+OPUS = 2
+AAC = 3
+
+# Sample rates an Opus encoder accepts
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def opus_sample_rate(sample_rate: int) -> int:
+    """The lowest Opus-supported rate that preserves sample_rate."""
+    for rate in OPUS_SAMPLE_RATES:
+        if rate >= sample_rate:
+            return rate
+    return OPUS_SAMPLE_RATES[-1]
+
+
+def negotiate(audio_format: int, sample_rate: int, default_rate: int) -> tuple[int, int]:
+    """
+    The (format, sample_rate) to produce for a requested output.
+
+    Formats other than PCM and Opus fall back to PCM, and a missing rate
+    to default_rate.
+    """
+    if audio_format != OPUS:
+        return PCM, sample_rate or default_rate
+    return OPUS, opus_sample_rate(sample_rate or default_rate)
+
+
+def audio_filename(data: bytes) -> str:
+    """
+    A filename whose extension matches an encoded audio file's contents.
+
+    Speech APIs pick the decoder from the upload's filename.
+    """
+    head = bytes(data[:12])
+    if head.startswith(b"OggS"):
+        return "audio.ogg"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "audio.wav"
+    if head.startswith(b"fLaC"):
+        return "audio.flac"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "audio.webm"
+    if head[4:8] == b"ftyp":
+        return "audio.m4a"
+    if head.startswith(b"ID3") or head[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"):
+        return "audio.mp3"
+    if head[:2] in (b"\xff\xf1", b"\xff\xf9"):
+        return "audio.aac"
+    # Whisper sniffs Ogg containers reliably; the best guess for the rest
+    return "audio.ogg"
@@ -0,0 +1,65 @@
+"""Incremental Ogg Opus demuxing."""
+
+from typing import List
+
+# Fixed part of an Ogg page header, before the segment table
+PAGE_HEADER_BYTES = 27
+
+# OpusHead and OpusTags, which precede the audio packets
+OPUS_HEADER_PACKETS = 2
+
+
+class OggOpusDemuxer:
+    """
+    Extracts raw Opus packets from an Ogg Opus byte stream as it arrives.
+
+    Packets are unwrapped, not decoded, so streamed audio reaches the phone
+    in the same framing as locally encoded Opus.
+    """
+
+    def __init__(self):
+        """Initialize demuxer."""
+        self.buffer = bytearray()
+        self.packet = bytearray()  # Packet continued across pages
+        self.headers_left = OPUS_HEADER_PACKETS
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Add stream bytes and return the audio packets they complete.
+
+        Raises:
+            ValueError: If the stream is not Ogg
+        """
+        self.buffer += data
+        packets: List[bytes] = []
+
+        while len(self.buffer) >= PAGE_HEADER_BYTES:
+            if self.buffer[:4] != b"OggS":
+                raise ValueError("Lost Ogg page sync")
+
+            header_len = PAGE_HEADER_BYTES + self.buffer[26]
+            if len(self.buffer) < header_len:
+                break
+            lacing = self.buffer[PAGE_HEADER_BYTES:header_len]
+            if len(self.buffer) < header_len + sum(lacing):
+                break
+
+            offset = header_len
+            for size in lacing:
+                self.packet += self.buffer[offset : offset + size]
+                offset += size
+                # A segment shorter than 255 bytes ends its packet
+                if size < 255:
+                    self._complete(packets)
+            del self.buffer[:offset]
+
+        return packets
+
+    def _complete(self, packets: List[bytes]):
+        """Emit the buffered packet unless it is one of the stream headers."""
+        packet = bytes(self.packet)
+        self.packet.clear()
+        if self.headers_left:
+            self.headers_left -= 1
+        else:
+            packets.append(packet)
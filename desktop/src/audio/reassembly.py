@@ -0,0 +1,224 @@
+"""Reassembly of streamed AudioData chunks into ordered utterances."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from audio.buffer import AudioBuffer
+
+logger = logging.getLogger(__name__)
+
+# (data, is_final) in utterance order
+Chunk = Tuple[memoryview, bool]
+
+
+class Utterance:
+    """Chunks of one utterance received so far."""
+
+    __slots__ = ("audio", "next_index", "pending", "pending_bytes", "dropped", "updated")
+
+    def __init__(self, capacity: int):
+        self.audio = AudioBuffer(capacity)
+        self.next_index = 0
+        self.pending: Dict[int, Tuple[bytes, bool]] = {}
+        self.pending_bytes = 0
+        self.dropped = False  # Over budget: discard the rest until is_final
+        self.updated = time.monotonic()
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.audio) + self.pending_bytes
+
+
+class ReassemblyBuffer:
+    """
+    Per-session reassembly of AudioData chunks.
+
+    Chunks are released in chunk_index order as soon as they are
+    contiguous, so transcription can start before the utterance ends;
+    early arrivals wait until the gap before them is filled. Retransmitted
+    packets are recognized by packet_id. Every utterance is copied once
+    into a preallocated buffer that the released chunks are views of.
+
+    Memory is bounded per session and overall: an utterance that outgrows
+    its budget is discarded up to its final chunk, the least recently
+    active utterances are dropped when the global budget is exceeded, and
+    utterances idle for stale_after seconds expire.
+    """
+
+    def __init__(
+        self,
+        max_session_bytes: int = 4 * 1024 * 1024,
+        max_total_bytes: int = 64 * 1024 * 1024,
+        stale_after: float = 30.0,
+        max_gap: int = 64,
+        seen_packets: int = 4096,
+        initial_capacity: int = 64 * 1024,
+        on_expire: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize reassembly buffer.
+
+        Args:
+            max_session_bytes: Most audio held for one session's utterance
+            max_total_bytes: Most audio held across all sessions
+            stale_after: Seconds without a chunk before an incomplete
+                utterance is discarded
+            max_gap: Furthest a chunk may arrive ahead of the next expected
+                index; chunks further ahead are dropped
+            seen_packets: Recent packet_ids remembered for dedup
+            initial_capacity: Initial buffer size of an utterance in bytes
+            on_expire: Called with the session ID when an incomplete
+                utterance is discarded (expired or evicted)
+        """
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self.stale_after = stale_after
+        self.max_gap = max_gap
+        self.seen_packets = seen_packets
+        self.initial_capacity = initial_capacity
+        self.on_expire = on_expire
+
+        self.utterances: "OrderedDict[str, Utterance]" = OrderedDict()
+        self.seen: "OrderedDict[str, None]" = OrderedDict()
+        self.total_bytes = 0
+        self.last_sweep = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(
+        self,
+        session_id: str,
+        packet_id: str,
+        chunk_index: int,
+        data: bytes,
+        is_final: bool,
+    ) -> List[Chunk]:
+        """
+        Add a received chunk.
+
+        Args:
+            session_id: Utterance stream the chunk belongs to
+            packet_id: ID of the packet that carried it
+            chunk_index: Position of the chunk in its utterance (from 0)
+            data: Audio data of the chunk
+            is_final: Whether this is the utterance's last chunk
+
+        Returns:
+            Chunks that are now in order and not yet released, ending with
+            the final chunk once the utterance is complete
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_sweep >= self.stale_after / 4:
+                self._expire(now)
+
+            if packet_id and packet_id in self.seen:
+                logger.debug(f"Duplicate packet {packet_id} from {session_id}")
+                return []
+
+            utterance = self.utterances.get(session_id)
+            if utterance is None:
+                utterance = Utterance(self.initial_capacity)
+                self.utterances[session_id] = utterance
+            self.utterances.move_to_end(session_id)
+            utterance.updated = now
+
+            if utterance.dropped:
+                if is_final:
+                    self._remove(session_id)
+                return []
+
+            if chunk_index < utterance.next_index or chunk_index in utterance.pending:
+                return []
+            if chunk_index - utterance.next_index > self.max_gap:
+                logger.warning(
+                    f"Chunk {chunk_index} from {session_id} is too far ahead "
+                    f"(expected {utterance.next_index}), dropping it"
+                )
+                return []
+
+            if utterance.size_bytes + len(data) > self.max_session_bytes:
+                logger.warning(f"Utterance from {session_id} exceeds its buffer, discarding it")
+                self._drop(session_id, utterance)
+                if is_final:
+                    self._remove(session_id)
+                return []
+
+            utterance.pending[chunk_index] = (data, is_final)
+            # Only accepted chunks count as seen: a retransmission of a
+            # rejected one (too far ahead, over budget) must get through
+            if packet_id:
+                self._remember(packet_id)
+            utterance.pending_bytes += len(data)
+            self.total_bytes += len(data)
+            released = self._release(utterance)
+
+            if released and released[-1][1]:
+                self._remove(session_id)
+            elif self.total_bytes > self.max_total_bytes:
+                self._evict(keep=session_id)
+            return released
+
+    def _remember(self, packet_id: str):
+        """Remember an accepted packet_id so its retransmissions are dropped."""
+        self.seen[packet_id] = None
+        if len(self.seen) > self.seen_packets:
+            self.seen.popitem(last=False)
+
+    def _release(self, utterance: Utterance) -> List[Chunk]:
+        """Move contiguous pending chunks into the utterance buffer."""
+        released: List[Chunk] = []
+        while utterance.next_index in utterance.pending:
+            data, is_final = utterance.pending.pop(utterance.next_index)
+            utterance.pending_bytes -= len(data)
+            start = len(utterance.audio)
+            utterance.audio.append(data)
+            released.append((utterance.audio.view(start), is_final))
+            utterance.next_index += 1
+            if is_final:
+                break
+        return released
+
+    def _remove(self, session_id: str):
+        """Forget a session's utterance and release its bytes."""
+        utterance = self.utterances.pop(session_id, None)
+        if utterance is not None:
+            self.total_bytes -= utterance.size_bytes
+
+    def _drop(self, session_id: str, utterance: Utterance):
+        """Discard an utterance's audio but keep ignoring it until its final chunk."""
+        self.total_bytes -= utterance.size_bytes
+        self.utterances[session_id] = dropped = Utterance(0)
+        dropped.dropped = True
+        if self.on_expire is not None:
+            self.on_expire(session_id)
+
+    def _evict(self, keep: str):
+        """Drop the least recently active utterances until under the global budget."""
+        for session_id in list(self.utterances):
+            if self.total_bytes <= self.max_total_bytes:
+                break
+            utterance = self.utterances[session_id]
+            if session_id == keep or utterance.dropped:
+                continue
+            logger.warning(f"Reassembly memory full, discarding utterance from {session_id}")
+            self._drop(session_id, utterance)
+
+    def _expire(self, now: float):
+        """Discard utterances that have not received a chunk for stale_after seconds."""
+        self.last_sweep = now
+        for session_id, utterance in list(self.utterances.items()):
+            if now - utterance.updated < self.stale_after:
+                # Ordered by activity, so the rest are fresher
+                break
+            logger.info(f"Incomplete utterance from {session_id} expired")
+            self._remove(session_id)
+            if self.on_expire is not None and not utterance.dropped:
+                self.on_expire(session_id)
+
+    def expire(self):
+        """Discard stale utterances now (also done periodically by add())."""
+        with self.lock:
+            self._expire(time.monotonic())
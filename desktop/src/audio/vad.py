@@ -0,0 +1,297 @@
+"""Voice activity detection and endpointing for 16-bit PCM audio."""
+
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Aggressiveness (0-3, as in WebRTC VAD) -> (margin above the noise floor in
+# dB, highest spectral flatness of speech, lowest share of energy in the
+# 200-4000 Hz speech band). Higher values reject more borderline frames.
+AGGRESSIVENESS = {
+    0: (6.0, 0.65, 0.15),
+    1: (9.0, 0.55, 0.2),
+    2: (12.0, 0.45, 0.3),
+    3: (15.0, 0.35, 0.4),
+}
+
+SPEECH_BAND_HZ = (200.0, 4000.0)
+
+# (start, end) sample offsets
+Segment = Tuple[int, int]
+
+
+def frame_features(
+    frames: np.ndarray, sample_rate: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-frame level, spectral flatness and speech-band energy ratio.
+
+    Args:
+        frames: int16 samples shaped (frames, frame_len)
+        sample_rate: Sample rate of the samples
+
+    Returns:
+        (level in dBFS, flatness in [0, 1], band energy ratio in [0, 1]);
+        flatness is near 1 for noise and low for voiced speech
+    """
+    x = frames.astype(np.float32) * (1.0 / 32768.0)
+    levels_db = 10.0 * np.log10(np.mean(np.square(x), axis=1) + 1e-12)
+
+    spectrum = np.square(np.abs(np.fft.rfft(x * np.hanning(x.shape[1]), axis=1))) + 1e-12
+    flatness = np.exp(np.mean(np.log(spectrum), axis=1)) / np.mean(spectrum, axis=1)
+
+    freqs = np.fft.rfftfreq(x.shape[1], 1.0 / sample_rate)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    band_ratio = spectrum[:, band].sum(axis=1) / spectrum.sum(axis=1)
+    return levels_db, flatness, band_ratio
+
+
+class VoiceActivityDetector:
+    """
+    Offline VAD for a complete utterance, fully vectorized.
+
+    Frames are speech when they are loud relative to the utterance's noise
+    floor and spectrally speech-like (not flat, energy in the speech band).
+    Used to trim silence, drop silence-only captures and split long ones
+    at pauses before anything is sent to a speech provider.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        aggressiveness: int = 2,
+        frame_ms: int = 30,
+        min_level_db: float = -50.0,
+        max_threshold_db: float = -35.0,
+        min_speech_ms: int = 150,
+        padding_ms: int = 200,
+        min_pause_ms: int = 500,
+        max_segment_seconds: float = 30.0,
+    ):
+        """
+        Initialize voice activity detector.
+
+        Args:
+            sample_rate: Sample rate of the PCM
+            aggressiveness: 0 (keep most audio) to 3 (keep only clear speech)
+            frame_ms: Analysis frame length in milliseconds
+            min_level_db: Absolute level (dBFS) below which a frame is
+                always silence
+            max_threshold_db: Level that always passes the energy test, so
+                captures that are all speech still count as speech
+            min_speech_ms: Least speech for a capture to be transcribed
+            padding_ms: Audio kept around speech so word edges survive
+            min_pause_ms: Silence that separates two speech segments
+            max_segment_seconds: Longest audio sent in one transcription
+        """
+        if aggressiveness not in AGGRESSIVENESS:
+            raise ValueError(f"VAD aggressiveness must be 0-3, got {aggressiveness}")
+
+        self.sample_rate = sample_rate
+        self.aggressiveness = aggressiveness
+        self.margin_db, self.max_flatness, self.min_band_ratio = AGGRESSIVENESS[aggressiveness]
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.min_level_db = min_level_db
+        self.max_threshold_db = max_threshold_db
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.padding_frames = padding_ms // frame_ms
+        self.min_pause_frames = max(1, min_pause_ms // frame_ms)
+        self.max_segment_frames = max(1, int(max_segment_seconds * 1000) // frame_ms)
+
+    def speech_frames(self, samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-frame speech decisions and levels (dBFS) of int16 samples."""
+        count = len(samples) // self.frame_len
+        if not count:
+            return np.zeros(0, dtype=bool), np.zeros(0)
+
+        frames = samples[: count * self.frame_len].reshape(count, self.frame_len)
+        levels_db, flatness, band_ratio = frame_features(frames, self.sample_rate)
+
+        noise_floor_db = np.percentile(levels_db, 10)
+        threshold_db = min(noise_floor_db + self.margin_db, self.max_threshold_db)
+        speech = (
+            (levels_db > max(threshold_db, self.min_level_db))
+            & (flatness < self.max_flatness)
+            & (band_ratio > self.min_band_ratio)
+        )
+        return speech, levels_db
+
+    def segments(self, samples: np.ndarray) -> List[Segment]:
+        """
+        Sample ranges to transcribe, with silence trimmed.
+
+        Returns an empty list when the capture holds too little speech.
+        Speech separated by short pauses stays in one segment; segments
+        longer than max_segment_seconds are cut at their quietest frame.
+        """
+        speech, levels_db = self.speech_frames(samples)
+        if np.count_nonzero(speech) < self.min_speech_frames:
+            return []
+
+        # Runs of speech frames, bridging pauses shorter than min_pause_ms
+        padded = np.concatenate(([False], speech, [False]))
+        edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+        runs: List[List[int]] = []
+        for start, end in zip(edges[::2], edges[1::2]):
+            if runs and start - runs[-1][1] < self.min_pause_frames:
+                runs[-1][1] = end
+            else:
+                runs.append([start, end])
+
+        frames: List[Segment] = []
+        for start, end in runs:
+            start = max(0, start - self.padding_frames)
+            end = min(len(speech), end + self.padding_frames)
+            while end - start > self.max_segment_frames:
+                # Cut where it is quietest in the second half of the window
+                lo = start + self.max_segment_frames // 2
+                cut = lo + int(np.argmin(levels_db[lo : start + self.max_segment_frames]))
+                frames.append((start, cut))
+                start = cut
+            frames.append((start, end))
+
+        return [(int(start) * self.frame_len, int(end) * self.frame_len) for start, end in frames]
+
+    def endpointer(self) -> "Endpointer":
+        """A streaming endpointer using this detector's thresholds."""
+        return Endpointer(
+            self.sample_rate,
+            margin_db=self.margin_db,
+            min_level_db=self.min_level_db,
+            max_flatness=self.max_flatness,
+            min_band_ratio=self.min_band_ratio,
+        )
+
+    def group(self, segments: List[Segment]) -> List[List[Segment]]:
+        """Pack consecutive segments into uploads of at most max_segment_seconds."""
+        limit = self.max_segment_frames * self.frame_len
+        groups: List[List[Segment]] = []
+        total = 0
+        for segment in segments:
+            length = segment[1] - segment[0]
+            if groups and total + length <= limit:
+                groups[-1].append(segment)
+                total += length
+            else:
+                groups.append([segment])
+                total = length
+        return groups
+
+
+class Endpointer:
+    """
+    Endpointer for streamed 16-bit mono PCM.
+
+    Tracks an adaptive noise floor, marks frames well above it (and, when
+    configured, spectrally speech-like) as speech, and reports an endpoint
+    once speech has been followed by enough silence.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        margin_db: float = 12.0,
+        min_level_db: float = -50.0,
+        min_speech_ms: int = 200,
+        end_silence_ms: int = 600,
+        max_flatness: float = 1.0,
+        min_band_ratio: float = 0.0,
+    ):
+        """
+        Initialize endpointer.
+
+        Args:
+            sample_rate: Sample rate of the PCM stream
+            frame_ms: Analysis frame length in milliseconds
+            margin_db: How far above the noise floor a frame must be to
+                count as speech
+            min_level_db: Absolute level (dBFS) below which a frame is
+                always silence
+            min_speech_ms: Speech needed before an endpoint can trigger
+            end_silence_ms: Trailing silence that ends an utterance
+            max_flatness: Highest spectral flatness of a speech frame
+                (1.0 disables the check)
+            min_band_ratio: Lowest share of energy in the speech band
+        """
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.end_silence_frames = max(1, end_silence_ms // frame_ms)
+        self.max_flatness = max_flatness
+        self.min_band_ratio = min_band_ratio
+
+        self.noise_floor_db: Optional[float] = None
+        self.remainder = b""
+        self.frames_seen = 0
+        self.speech_frames = 0
+        self.silence_run = 0
+        self.speech_start_sample: Optional[int] = None
+        self.speech_end_sample: Optional[int] = None
+        self.endpointed = False
+
+    @property
+    def speech_detected(self) -> bool:
+        """Whether enough speech has been heard to form an utterance."""
+        return self.speech_frames >= self.min_speech_frames
+
+    def process(self, pcm: bytes) -> bool:
+        """
+        Analyze a chunk of PCM audio.
+
+        Args:
+            pcm: 16-bit little-endian mono PCM
+
+        Returns:
+            True once the end of the utterance has been detected
+        """
+        if self.endpointed:
+            return True
+
+        data = self.remainder + pcm
+        frame_bytes = self.frame_len * 2
+        usable = len(data) - len(data) % frame_bytes
+        self.remainder = data[usable:]
+        if not usable:
+            return False
+
+        frames = np.frombuffer(data[:usable], dtype="<i2").reshape(-1, self.frame_len)
+        levels_db, flatness, band_ratio = frame_features(frames, self.sample_rate)
+        voiced = (flatness < self.max_flatness) & (band_ratio >= self.min_band_ratio)
+
+        for level_db, is_voiced in zip(levels_db, voiced):
+            frame_index = self.frames_seen
+            self.frames_seen += 1
+
+            if self.noise_floor_db is None:
+                self.noise_floor_db = level_db
+
+            is_speech = (
+                is_voiced
+                and level_db > self.min_level_db
+                and level_db > self.noise_floor_db + self.margin_db
+            )
+
+            if is_speech:
+                if self.speech_start_sample is None:
+                    self.speech_start_sample = frame_index * self.frame_len
+                self.speech_frames += 1
+                self.silence_run = 0
+                self.speech_end_sample = (frame_index + 1) * self.frame_len
+            else:
+                # Follow the floor down quickly and up slowly
+                rate = 0.3 if level_db < self.noise_floor_db else 0.02
+                self.noise_floor_db += rate * (level_db - self.noise_floor_db)
+                self.silence_run += 1
+
+            if self.speech_detected and self.silence_run >= self.end_silence_frames:
+                self.endpointed = True
+                logger.debug(f"Endpoint detected at sample {self.speech_end_sample}")
+                return True
+
+        return False
@@ -0,0 +1,374 @@
+"""Local stand-ins for the OpenAI and Anthropic HTTP APIs, for benchmarks."""
+
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Words the mock LLM builds its replies from
+REPLY_WORDS = (
+    "sure here is a short answer that should be easy to follow when it is read "
+    "aloud and then a second thought with a little more detail about the topic"
+).split()
+
+# Transcript returned for audio the mock does not know
+DEFAULT_TRANSCRIPT = "What is the weather going to be like tomorrow?"
+
+# Mock TTS output: 16-bit mono PCM at OpenAI's streaming rate
+TTS_SAMPLE_RATE = 24000
+TTS_SECONDS_PER_WORD = 0.3
+TTS_CHUNK_BYTES = 4800  # 100 ms
+
+
+@dataclass
+class Latency:
+    """
+    A delay distribution in seconds.
+
+    Parsed from "MEAN", "MEAN:JITTER" or "DIST:MEAN:JITTER", where DIST is
+    fixed, normal, lognormal or uniform and JITTER is the standard
+    deviation (the half-width for uniform).
+    """
+
+    mean: float = 0.0
+    jitter: float = 0.0
+    distribution: str = "normal"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        parts = spec.split(":")
+        distribution = "normal"
+        if parts[0] in ("fixed", "normal", "lognormal", "uniform"):
+            distribution = parts.pop(0)
+        if not parts or len(parts) > 2:
+            raise ValueError(f"Invalid latency {spec!r}")
+        jitter = float(parts[1]) if len(parts) > 1 else 0.0
+        return cls(float(parts[0]), jitter, distribution)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.jitter <= 0 or self.distribution == "fixed":
+            return self.mean
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.jitter, self.mean + self.jitter))
+        if self.distribution == "lognormal" and self.mean > 0:
+            sigma2 = math.log(1 + (self.jitter / self.mean) ** 2)
+            return rng.lognormvariate(math.log(self.mean) - sigma2 / 2, math.sqrt(sigma2))
+        return max(0.0, rng.gauss(self.mean, self.jitter))
+
+    def __str__(self) -> str:
+        return f"{self.distribution}:{self.mean:g}:{self.jitter:g}"
+
+
+@dataclass
+class MockProfile:
+    """Latency and behaviour of the mock APIs."""
+
+    llm_first_token: Latency = field(default_factory=lambda: Latency(0.35, 0.1, "lognormal"))
+    llm_token_interval: Latency = field(default_factory=lambda: Latency(0.02, 0.005))
+    llm_reply_words: int = 40
+    stt_latency: Latency = field(default_factory=lambda: Latency(0.4, 0.1, "lognormal"))
+    tts_first_byte: Latency = field(default_factory=lambda: Latency(0.2, 0.05, "lognormal"))
+    tts_realtime_factor: float = 8.0  # audio seconds streamed per wall-clock second
+    error_rate: float = 0.0  # share of requests answered with HTTP 500
+    seed: Optional[int] = None
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "llm_first_token": str(self.llm_first_token),
+            "llm_token_interval": str(self.llm_token_interval),
+            "llm_reply_words": self.llm_reply_words,
+            "stt_latency": str(self.stt_latency),
+            "tts_first_byte": str(self.tts_first_byte),
+            "tts_realtime_factor": self.tts_realtime_factor,
+            "error_rate": self.error_rate,
+        }
+
+
+class MockAPIServer:
+    """
+    HTTP server speaking the parts of the OpenAI and Anthropic APIs the
+    providers use: chat completions, transcriptions and speech (OpenAI, at
+    /v1) and messages (Anthropic), each streamed when requested.
+
+    Point the SDK clients at it through ClientPool's base_urls (see
+    base_urls()). Responses are synthetic; only their timing matters.
+    Transcriptions of audio registered with add_transcript return its text.
+    """
+
+    def __init__(self, profile: Optional[MockProfile] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize mock API server.
+
+        Args:
+            profile: Latencies and error rate (defaults to MockProfile())
+            host: Interface to bind
+            port: TCP port (0 picks a free one)
+        """
+        self.profile = profile or MockProfile()
+        self.rng = random.Random(self.profile.seed)
+        self.rng_lock = threading.Lock()
+        self.transcripts: Dict[str, str] = {}
+        self.requests: Dict[str, int] = {}
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading (cancelled turn or deadline)
+                    pass
+
+            def do_POST(self):
+                api._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="mock-api", daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_urls(self) -> Dict[str, str]:
+        """ClientPool base_urls routing both providers to this server."""
+        return {"openai": f"{self.url}/v1", "anthropic": self.url}
+
+    def add_transcript(self, audio: bytes, text: str):
+        """Make transcriptions of audio return text."""
+        self.transcripts[hashlib.sha256(audio).hexdigest()] = text
+
+    def start(self):
+        self.thread.start()
+        logger.info(f"Mock OpenAI/Anthropic API listening on {self.url}")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _sample(self, latency: Latency) -> float:
+        with self.rng_lock:
+            return latency.sample(self.rng)
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        body = request.rfile.read(int(request.headers.get("Content-Length") or 0))
+        path = request.path.split("?")[0]
+        routes = {
+            "/v1/chat/completions": self._chat_completions,
+            "/v1/audio/transcriptions": self._transcription,
+            "/v1/audio/speech": self._speech,
+            "/v1/messages": self._messages,
+        }
+        route = routes.get(path)
+        if route is None:
+            _send_json(request, 404, {"error": {"message": f"No mock for {path}"}})
+            return
+
+        with self.rng_lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            failed = self.rng.random() < self.profile.error_rate
+        if failed:
+            _send_json(request, 500, {"error": {"message": "Injected mock failure"}})
+            return
+
+        route(request, body)
+
+    def _reply_words(self) -> List[str]:
+        words = []
+        for i in range(self.profile.llm_reply_words):
+            word = REPLY_WORDS[i % len(REPLY_WORDS)]
+            # End a sentence every 12 words so the pipeline can start speaking
+            words.append(word + ("." if i % 12 == 11 else ""))
+        if words and not words[-1].endswith("."):
+            words[-1] += "."
+        return words
+
+    def _token_stream(self) -> Iterator[str]:
+        """Reply deltas, paced like a model's first token and decoding rate."""
+        time.sleep(self._sample(self.profile.llm_first_token))
+        for i, word in enumerate(self._reply_words()):
+            if i:
+                time.sleep(self._sample(self.profile.llm_token_interval))
+            yield word if i == 0 else " " + word
+
+    def _chat_completions(self, request: BaseHTTPRequestHandler, body: bytes):
+        params = json.loads(body)
+        model = params.get("model", "")
+        if not params.get("stream"):
+            text = "".join(self._token_stream())
+            _send_json(request, 200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+            return
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+            return {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        with _ChunkedResponse(request, "text/event-stream") as response:
+            for delta in self._token_stream():
+                response.write(_sse(chunk({"content": delta})))
+            response.write(_sse(chunk({}, "stop")))
+            response.write(b"data: [DONE]\n\n")
+
+    def _messages(self, request: BaseHTTPRequestHandler, body: bytes):
+        params = json.loads(body)
+        model = params.get("model", "")
+        message = {
+            "id": "msg_mock",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": 0, "output_tokens": 0},
+        }
+        if not params.get("stream"):
+            text = "".join(self._token_stream())
+            message.update(
+                content=[{"type": "text", "text": text}], stop_reason="end_turn"
+            )
+            _send_json(request, 200, message)
+            return
+
+        with _ChunkedResponse(request, "text/event-stream") as response:
+            response.write(_sse({"type": "message_start", "message": message}, "message_start"))
+            response.write(_sse(
+                {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                "content_block_start",
+            ))
+            for delta in self._token_stream():
+                response.write(_sse(
+                    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": delta}},
+                    "content_block_delta",
+                ))
+            response.write(_sse({"type": "content_block_stop", "index": 0}, "content_block_stop"))
+            response.write(_sse(
+                {
+                    "type": "message_delta",
+                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": 0},
+                },
+                "message_delta",
+            ))
+            response.write(_sse({"type": "message_stop"}, "message_stop"))
+
+    def _transcription(self, request: BaseHTTPRequestHandler, body: bytes):
+        audio = _multipart_file(request.headers.get("Content-Type", ""), body)
+        text = self.transcripts.get(hashlib.sha256(audio).hexdigest(), DEFAULT_TRANSCRIPT)
+        time.sleep(self._sample(self.profile.stt_latency))
+        _send_json(request, 200, {"text": text})
+
+    def _speech(self, request: BaseHTTPRequestHandler, body: bytes):
+        params = json.loads(body)
+        response_format = params.get("response_format", "mp3")
+        if response_format not in ("pcm", "mp3"):
+            _send_json(request, 400, {"error": {"message": f"Mock speech has no {response_format}"}})
+            return
+
+        words = len(params.get("input", "").split())
+        samples = int(max(1, words) * TTS_SECONDS_PER_WORD * TTS_SAMPLE_RATE)
+        audio = _tone(samples)
+        chunk_seconds = TTS_CHUNK_BYTES / 2 / TTS_SAMPLE_RATE
+
+        time.sleep(self._sample(self.profile.tts_first_byte))
+        with _ChunkedResponse(request, "audio/pcm" if response_format == "pcm" else "audio/mpeg") as response:
+            for start in range(0, len(audio), TTS_CHUNK_BYTES):
+                if start:
+                    time.sleep(chunk_seconds / self.profile.tts_realtime_factor)
+                response.write(audio[start : start + TTS_CHUNK_BYTES])
+
+
+class _ChunkedResponse:
+    """A 200 response written with chunked transfer encoding (keeps the connection reusable)."""
+
+    def __init__(self, request: BaseHTTPRequestHandler, content_type: str):
+        self.request = request
+        request.send_response(200)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+
+    def write(self, data: bytes):
+        if data:
+            self.request.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.request.wfile.flush()
+
+    def __enter__(self) -> "_ChunkedResponse":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.request.wfile.write(b"0\r\n\r\n")
+        else:
+            self.request.close_connection = True
+
+
+def _send_json(request: BaseHTTPRequestHandler, status: int, payload: dict):
+    body = json.dumps(payload).encode()
+    request.send_response(status)
+    request.send_header("Content-Type", "application/json")
+    request.send_header("Content-Length", str(len(body)))
+    request.end_headers()
+    request.wfile.write(body)
+
+
+def _sse(payload: dict, event: Optional[str] = None) -> bytes:
+    lines = f"event: {event}\n" if event else ""
+    return f"{lines}data: {json.dumps(payload)}\n\n".encode()
+
+
+def _multipart_file(content_type: str, body: bytes) -> bytes:
+    """Content of the 'file' field of a multipart/form-data body."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True) or b""
+    return b""
+
+
+def _tone(samples: int, frequency: float = 220.0) -> bytes:
+    """16-bit PCM sine tone at TTS_SAMPLE_RATE."""
+    period = int(TTS_SAMPLE_RATE / frequency)
+    cycle = b"".join(
+        int(8000 * math.sin(2 * math.pi * i / period)).to_bytes(2, "little", signed=True)
+        for i in range(period)
+    )
+    repeats = samples // period + 1
+    return (cycle * repeats)[: samples * 2]
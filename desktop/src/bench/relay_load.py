@@ -0,0 +1,398 @@
+"""Load generator for the backend relay: paired phone/desktop streams."""
+
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set
+
+import grpc
+
+from grpc_client.client import streaming_pb2, streaming_pb2_grpc
+
+logger = logging.getLogger(__name__)
+
+# Opus voice bitrate used to size Opus frames
+OPUS_BITRATE = 24000
+
+# Largest reply frame the desktop sends (its CHUNK_SIZE default)
+REPLY_FRAME_BYTES = 1024
+
+
+@dataclass
+class Cadence:
+    """How a simulated conversation streams audio."""
+
+    audio_format: str = "opus"  # opus or pcm
+    sample_rate: int = 16000
+    frame_ms: int = 20  # phone capture frame
+    utterance_s: float = 3.0  # user speech per turn
+    reply_s: float = 4.0  # synthesized reply per turn
+    reply_speedup: float = 4.0  # reply audio streamed this much faster than realtime
+    pause_s: float = 1.0  # between the reply and the next utterance
+
+    @property
+    def frame_bytes(self) -> int:
+        if self.audio_format == "opus":
+            return OPUS_BITRATE // 8 * self.frame_ms // 1000
+        return self.sample_rate * 2 * self.frame_ms // 1000
+
+    @property
+    def proto_format(self) -> int:
+        return streaming_pb2.OPUS if self.audio_format == "opus" else streaming_pb2.PCM
+
+    @property
+    def reply_frames(self) -> int:
+        """Frames of REPLY_FRAME_BYTES (or less) in one reply."""
+        frames_per_second = 1000 / self.frame_ms
+        reply_bytes = self.reply_s * frames_per_second * self.frame_bytes
+        return max(1, math.ceil(reply_bytes / REPLY_FRAME_BYTES))
+
+
+@dataclass
+class LevelStats:
+    """Measurements of one load level."""
+
+    sent: int = 0
+    received: int = 0
+    received_bytes: int = 0
+    errors: int = 0
+    uplink: List[float] = field(default_factory=list)  # phone -> desktop hop, seconds
+    downlink: List[float] = field(default_factory=list)  # desktop -> phone hop, seconds
+    register: List[float] = field(default_factory=list)  # registration to pairing ACK
+    loop_lag: List[float] = field(default_factory=list)  # load generator's own delay
+    in_flight: Dict[str, float] = field(default_factory=dict)  # packet_id -> send time
+    stalled: Set[str] = field(default_factory=set)  # users whose desktop stopped reading
+
+    def backlog(self) -> int:
+        """Packets still queued for stalled desktops."""
+        return sum(1 for packet_id in self.in_flight if packet_id.split("/")[0] in self.stalled)
+
+
+class Device:
+    """One end of a pair: a Stream call registered as MOBILE or DESKTOP."""
+
+    def __init__(self, stub, user_id: str, device_type: int, stats: LevelStats):
+        self.stub = stub
+        self.user_id = user_id
+        self.device_type = device_type
+        self.stats = stats
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.registered = asyncio.Event()
+        self.reading = asyncio.Event()
+        self.reading.set()
+        self.on_packet = None
+        self.call = None
+        self.reader: Optional[asyncio.Task] = None
+        self.sequence = 0
+
+    @property
+    def peer(self) -> int:
+        return streaming_pb2.MOBILE if self.device_type == streaming_pb2.DESKTOP else streaming_pb2.DESKTOP
+
+    async def open(self, timeout: float) -> float:
+        """Open the stream and register; returns seconds until the relay's ACK."""
+        self.call = self.stub.Stream(self._requests())
+        self.reader = asyncio.create_task(self._read())
+        started = time.perf_counter()
+        self.outbox.put_nowait(self._packet(streaming_pb2.CONTROL))
+        await asyncio.wait_for(self.registered.wait(), timeout)
+        return time.perf_counter() - started
+
+    async def close(self):
+        self.reading.set()
+        self.outbox.put_nowait(None)
+        if self.call is not None:
+            self.call.cancel()
+        if self.reader is not None:
+            await asyncio.gather(self.reader, return_exceptions=True)
+
+    def send_audio(self, data: bytes, cadence: Cadence, chunk_index: int, is_final: bool):
+        packet = self._packet(
+            streaming_pb2.AUDIO_CHUNK,
+            audio=streaming_pb2.AudioData(
+                data=data,
+                format=cadence.proto_format,
+                sample_rate=cadence.sample_rate,
+                channels=1,
+                chunk_index=chunk_index,
+                is_final=is_final,
+            ),
+        )
+        self.stats.in_flight[packet.packet_id] = time.perf_counter()
+        self.stats.sent += 1
+        self.outbox.put_nowait(packet)
+
+    def _packet(self, packet_type: int, **payload):
+        self.sequence += 1
+        return streaming_pb2.Packet(
+            packet_id=f"{self.user_id}/{self.device_type}/{self.sequence}",
+            user_id=self.user_id,
+            source=self.device_type,
+            destination=self.peer,
+            type=packet_type,
+            timestamp=int(time.time() * 1000),
+            **payload,
+        )
+
+    async def _requests(self):
+        while True:
+            packet = await self.outbox.get()
+            if packet is None:
+                return
+            yield packet
+
+    async def _read(self):
+        try:
+            async for packet in self.call:
+                await self.reading.wait()
+                if self.user_id in self.stats.stalled:
+                    continue
+                if packet.HasField("control"):
+                    if packet.control.control_type == streaming_pb2.ACK:
+                        self.registered.set()
+                    elif packet.control.control_type == streaming_pb2.ERROR:
+                        self.stats.errors += 1
+                    continue
+
+                sent_at = self.stats.in_flight.pop(packet.packet_id, None)
+                if sent_at is not None:
+                    hop = time.perf_counter() - sent_at
+                    if self.device_type == streaming_pb2.DESKTOP:
+                        self.stats.uplink.append(hop)
+                    else:
+                        self.stats.downlink.append(hop)
+                self.stats.received += 1
+                self.stats.received_bytes += packet.ByteSize()
+                if self.on_packet is not None:
+                    self.on_packet(packet)
+        except grpc.aio.AioRpcError as e:
+            if e.code() != grpc.StatusCode.CANCELLED:
+                logger.warning(f"Stream of {self.user_id} ended: {e.code().name}")
+        except asyncio.CancelledError:
+            pass
+
+
+class Pair:
+    """A phone and its desktop holding a conversation through the relay."""
+
+    def __init__(self, stub, user_id: str, cadence: Cadence, stats: LevelStats):
+        self.cadence = cadence
+        self.mobile = Device(stub, user_id, streaming_pb2.MOBILE, stats)
+        self.desktop = Device(stub, user_id, streaming_pb2.DESKTOP, stats)
+        self.desktop.on_packet = self._desktop_received
+        self.replies: List[asyncio.Task] = []
+        self.frame = bytes(random.getrandbits(8) for _ in range(cadence.frame_bytes))
+
+    async def open(self, timeout: float) -> List[float]:
+        # The desktop registers first so the phone's audio has somewhere to go
+        return [await self.desktop.open(timeout), await self.mobile.open(timeout)]
+
+    async def converse(self, until: float):
+        """Alternate user utterances and desktop replies until the deadline."""
+        cadence = self.cadence
+        frames = max(1, int(cadence.utterance_s * 1000 / cadence.frame_ms))
+        # Stagger pairs so frames do not all arrive in lockstep
+        await asyncio.sleep(random.uniform(0, cadence.frame_ms / 1000))
+        while time.monotonic() < until:
+            started = time.monotonic()
+            for index in range(frames):
+                self.mobile.send_audio(self.frame, cadence, index, index == frames - 1)
+                # Pace against the start so scheduling delays do not accumulate
+                await _sleep_until(started + (index + 1) * cadence.frame_ms / 1000)
+                if time.monotonic() >= until:
+                    return
+            await _sleep_until(
+                min(until, time.monotonic() + cadence.reply_s / cadence.reply_speedup + cadence.pause_s)
+            )
+
+    def _desktop_received(self, packet):
+        if packet.HasField("audio") and packet.audio.is_final:
+            self.replies.append(asyncio.create_task(self._reply()))
+
+    async def _reply(self):
+        """Stream a synthesized reply the way the desktop's send queue does."""
+        cadence = self.cadence
+        frames = cadence.reply_frames
+        interval = cadence.reply_s / cadence.reply_speedup / frames
+        data = bytes(REPLY_FRAME_BYTES)
+        started = time.monotonic()
+        for index in range(frames):
+            self.desktop.send_audio(data, cadence, index, index == frames - 1)
+            await _sleep_until(started + (index + 1) * interval)
+
+    async def close(self):
+        for task in self.replies:
+            task.cancel()
+        await asyncio.gather(self.mobile.close(), self.desktop.close())
+
+
+async def _sleep_until(when: float):
+    await asyncio.sleep(max(0.0, when - time.monotonic()))
+
+
+class RelayLoad:
+    """
+    Drives the relay with increasing numbers of paired streams.
+
+    At each level, pairs phone/desktop streams register with the relay and
+    converse with the configured audio cadence for duration seconds. The
+    report covers relay hop latency in each direction, throughput, routing
+    errors and packets never delivered.
+
+    Registration takes the relay's write lock, so while the level runs a
+    probe keeps registering and closing a spare device: its ACK latency
+    shows how long writers wait behind routing that holds the read lock.
+    Stalled readers stop reading mid-level, so the relay's Send to them
+    blocks on flow control while it holds the lock.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        cadence: Cadence,
+        duration: float = 20.0,
+        streams_per_channel: int = 10,
+        stalled_readers: int = 0,
+        probe_interval: float = 0.5,
+        connect_timeout: float = 10.0,
+    ):
+        """
+        Initialize relay load.
+
+        Args:
+            target: Relay address (host:port)
+            cadence: Audio cadence of every pair
+            duration: Seconds each level streams
+            streams_per_channel: Streams sharing one HTTP/2 connection
+            stalled_readers: Desktops that stop reading halfway through a level
+            probe_interval: Seconds between registration probes
+            connect_timeout: Seconds to wait for a registration ACK
+        """
+        if streaming_pb2 is None:
+            raise RuntimeError("streaming_pb2 not found; generate the protobuf code first")
+        self.target = target
+        self.cadence = cadence
+        self.duration = duration
+        self.streams_per_channel = streams_per_channel
+        self.stalled_readers = stalled_readers
+        self.probe_interval = probe_interval
+        self.connect_timeout = connect_timeout
+
+    async def run(self, levels: Sequence[int]) -> List[Dict[str, object]]:
+        """Summaries of every level (number of pairs), in order."""
+        return [await self.run_level(pairs) for pairs in levels]
+
+    async def run_level(self, pair_count: int) -> Dict[str, object]:
+        stats = LevelStats()
+        run_id = uuid.uuid4().hex[:8]
+        channel_count = max(1, math.ceil(2 * pair_count / self.streams_per_channel))
+        channels = [grpc.aio.insecure_channel(self.target) for _ in range(channel_count)]
+        stubs = [streaming_pb2_grpc.StreamingServiceStub(channel) for channel in channels]
+        pairs = [
+            Pair(stubs[i % channel_count], f"load-{run_id}-{i}", self.cadence, stats)
+            for i in range(pair_count)
+        ]
+
+        try:
+            opened = await asyncio.gather(
+                *(pair.open(self.connect_timeout) for pair in pairs), return_exceptions=True
+            )
+            failed = [result for result in opened if isinstance(result, BaseException)]
+            if failed:
+                raise RuntimeError(f"{len(failed)} of {pair_count} pairs failed to register: {failed[0]!r}")
+            connect = [seconds for result in opened for seconds in result]
+
+            started = time.monotonic()
+            until = started + self.duration
+            background = [
+                asyncio.create_task(self._probe(stubs[0], run_id, stats, until)),
+                asyncio.create_task(self._watch_loop(stats, until)),
+            ]
+            for pair in pairs[: self.stalled_readers]:
+                background.append(asyncio.create_task(self._stall(pair.desktop)))
+
+            await asyncio.gather(*(pair.converse(until) for pair in pairs))
+            elapsed = time.monotonic() - started
+            # Let the last packets arrive before counting losses
+            await asyncio.sleep(1.0)
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+        finally:
+            await asyncio.gather(*(pair.close() for pair in pairs), return_exceptions=True)
+            await asyncio.gather(*(channel.close() for channel in channels))
+
+        return summarize_level(pair_count, channel_count, stats, connect, elapsed)
+
+    async def _probe(self, stub, run_id: str, stats: LevelStats, until: float):
+        """Register and close a spare device repeatedly, timing the relay's ACK."""
+        probes = 0
+        while time.monotonic() < until:
+            probes += 1
+            device = Device(stub, f"probe-{run_id}-{probes}", streaming_pb2.DESKTOP, stats)
+            try:
+                stats.register.append(await device.open(self.connect_timeout))
+            except asyncio.TimeoutError:
+                stats.register.append(self.connect_timeout)
+                logger.warning("Registration probe timed out")
+            finally:
+                await device.close()
+            await asyncio.sleep(self.probe_interval)
+
+    async def _watch_loop(self, stats: LevelStats, until: float, interval: float = 0.05):
+        """Record how late the event loop wakes up, to tell when the generator saturates."""
+        while time.monotonic() < until:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            stats.loop_lag.append(max(0.0, time.monotonic() - expected))
+
+    async def _stall(self, device: Device):
+        """Stop reading for the second half of the level."""
+        await asyncio.sleep(self.duration / 2)
+        logger.info(f"Desktop of {device.user_id} stops reading")
+        # Its packets are left out of latency and loss; the backlog is reported
+        device.stats.stalled.add(device.user_id)
+        device.reading.clear()
+
+
+def percentiles(values: Sequence[float], scale: float = 1000.0) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/max of values, scaled (default: seconds to milliseconds)."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return round(ordered[max(0, math.ceil(q * len(ordered)) - 1)] * scale, 3)
+
+    return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1] * scale, 3)}
+
+
+def summarize_level(
+    pairs: int,
+    channels: int,
+    stats: LevelStats,
+    connect: List[float],
+    elapsed: float,
+) -> Dict[str, object]:
+    """Machine-readable summary of one level (latencies in milliseconds)."""
+    return {
+        "pairs": pairs,
+        "channels": channels,
+        "duration_s": round(elapsed, 3),
+        "sent": stats.sent,
+        "received": stats.received,
+        "lost": len(stats.in_flight) - stats.backlog(),
+        "stalled_backlog": stats.backlog(),
+        "route_errors": stats.errors,
+        "packets_per_sec": round(stats.received / elapsed, 1),
+        "mbit_per_sec": round(stats.received_bytes * 8 / elapsed / 1e6, 3),
+        "uplink_ms": percentiles(stats.uplink),
+        "downlink_ms": percentiles(stats.downlink),
+        "connect_ms": percentiles(connect),
+        "register_probe_ms": percentiles(stats.register),
+        "generator_lag_ms": percentiles(stats.loop_lag),
+    }
@@ -0,0 +1,350 @@
+"""Replays voice and text workloads against the assistant and measures latency."""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from ai.deadline import Deadline
+from ai.llm import create_async_llm_provider, create_llm_provider
+from ai.stt import STT_SAMPLE_RATE, create_async_stt_provider, create_stt_provider
+from ai.transport import configure_client_pool
+from ai.tts import create_async_tts_provider, create_tts_provider
+from assistant import AUDIO_ERROR_MESSAGE, TEXT_ERROR_MESSAGE, TIMEOUT_MESSAGE, AIAssistant
+from async_assistant import AsyncAIAssistant
+from audio.convert import pcm_to_wav
+from bench.mock_api import MockAPIServer
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Replies that mean the turn failed
+FAILED_REPLIES = (AUDIO_ERROR_MESSAGE, TEXT_ERROR_MESSAGE, TIMEOUT_MESSAGE)
+
+# API key the providers send to the mocks
+MOCK_API_KEY = "bench"
+
+DEFAULT_PROMPTS = (
+    "What is the weather going to be like tomorrow?",
+    "Remind me what we talked about earlier.",
+    "Give me a quick summary of the news.",
+    "How long does it take to boil an egg?",
+)
+
+
+@dataclass
+class WorkloadTurn:
+    """One user turn: text input, or audio with the transcript the mock returns."""
+
+    text: str
+    audio: Optional[bytes] = None
+
+    @property
+    def kind(self) -> str:
+        return "audio" if self.audio is not None else "text"
+
+
+def load_workload(path: Path) -> List[WorkloadTurn]:
+    """
+    Load a recorded workload.
+
+    Each line of the JSONL file is {"text": ...} for a typed turn or
+    {"audio": "clip.wav", "text": ...} for a spoken one, where the audio
+    path is relative to the file and text is what the STT mock returns.
+    """
+    turns = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        audio = None
+        if entry.get("audio"):
+            audio = (path.parent / entry["audio"]).read_bytes()
+        turns.append(WorkloadTurn(entry.get("text", ""), audio))
+    return turns
+
+
+def default_workload(audio_seconds: float = 2.0) -> List[WorkloadTurn]:
+    """Alternating typed and spoken turns with synthetic audio."""
+    turns = []
+    for i, prompt in enumerate(DEFAULT_PROMPTS):
+        turns.append(WorkloadTurn(prompt))
+        # Distinct clips so each maps to its own transcript in the mock
+        samples = int(audio_seconds * STT_SAMPLE_RATE)
+        pcm = bytes((i * 7 + n) % 256 for n in range(samples * 2))
+        turns.append(WorkloadTurn(prompt, pcm_to_wav(pcm, STT_SAMPLE_RATE)))
+    return turns
+
+
+@dataclass
+class TurnResult:
+    """Timings of one replayed turn (seconds from its start)."""
+
+    kind: str
+    total: float
+    first_audio: Optional[float]
+    failed: bool
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (None without values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(concurrency: int, results: List[TurnResult], elapsed: float) -> Dict[str, object]:
+    """Machine-readable summary of one concurrency level."""
+    totals = [result.total for result in results if not result.failed]
+    first_audio = [
+        result.first_audio
+        for result in results
+        if not result.failed and result.first_audio is not None
+    ]
+
+    def stat(values: List[float], q: float) -> Optional[float]:
+        value = percentile(values, q)
+        return round(value, 4) if value is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "turns": len(results),
+        "failed": sum(result.failed for result in results),
+        "duration_s": round(elapsed, 3),
+        "turns_per_sec": round(len(totals) / elapsed, 3) if elapsed else None,
+        "e2e_p50_s": stat(totals, 0.5),
+        "e2e_p99_s": stat(totals, 0.99),
+        "first_audio_p50_s": stat(first_audio, 0.5),
+        "first_audio_p99_s": stat(first_audio, 0.99),
+        "stages": stage_summary(),
+    }
+
+
+def stage_summary() -> Dict[str, Dict[str, object]]:
+    """Per-stage quantiles recorded by the metrics spans, keyed stage/provider/model."""
+    stages = {}
+    for labels in STAGE_SECONDS.label_sets():
+        quantiles = STAGE_SECONDS.quantiles(*labels)
+        stages["/".join(label for label in labels if label)] = {
+            f"p{int(q * 100)}_s": round(value, 4) if value is not None else None
+            for q, value in quantiles.items()
+        }
+    return stages
+
+
+class Benchmark:
+    """
+    Runs a workload through the real providers, pointed at MockAPIServer.
+
+    At each concurrency level, that many simulated users replay the
+    workload in their own sessions until turns_per_level turns are done.
+    Time to first audio is measured to the first synthesized frame and
+    end-to-end latency to the end of the reply's audio.
+    """
+
+    def __init__(
+        self,
+        mock: MockAPIServer,
+        workload: List[WorkloadTurn],
+        llm_provider: str = "openai",
+        async_mode: bool = True,
+        turns_per_level: int = 40,
+        turn_deadline: float = 0.0,
+        pool_size: int = 100,
+    ):
+        """
+        Initialize benchmark.
+
+        Args:
+            mock: Running mock API server
+            workload: Turns each simulated user replays in order
+            llm_provider: 'openai' or 'anthropic'
+            async_mode: Use AsyncAIAssistant (else AIAssistant on threads)
+            turns_per_level: Turns measured at each concurrency level
+            turn_deadline: Seconds per turn (0 disables deadlines)
+            pool_size: HTTP connections per API client
+        """
+        self.mock = mock
+        self.workload = workload
+        self.llm_provider = llm_provider
+        self.async_mode = async_mode
+        self.turns_per_level = turns_per_level
+        self.turn_deadline = turn_deadline
+
+        for turn in workload:
+            if turn.audio is not None:
+                mock.add_transcript(turn.audio, turn.text)
+
+        configure_client_pool(max_connections=pool_size, base_urls=mock.base_urls())
+
+    def run(self, concurrency_levels: Sequence[int]) -> List[Dict[str, object]]:
+        """Summaries of every concurrency level, in order."""
+        if self.async_mode:
+            return asyncio.run(self._run_async(concurrency_levels))
+        return [self._run_level_sync(level) for level in concurrency_levels]
+
+    def _deadline(self) -> Optional[Deadline]:
+        return Deadline(self.turn_deadline) if self.turn_deadline > 0 else None
+
+    def _schedule(self, concurrency: int) -> List[List[WorkloadTurn]]:
+        """Turns of each simulated user, turns_per_level in total."""
+        users: List[List[WorkloadTurn]] = [[] for _ in range(concurrency)]
+        for i in range(self.turns_per_level):
+            user = i % concurrency
+            users[user].append(self.workload[len(users[user]) % len(self.workload)])
+        return users
+
+    async def _run_async(self, concurrency_levels: Sequence[int]) -> List[Dict[str, object]]:
+        assistant = AsyncAIAssistant(
+            create_async_stt_provider("openai", MOCK_API_KEY),
+            create_async_llm_provider(self.llm_provider, MOCK_API_KEY),
+            create_async_tts_provider("openai", MOCK_API_KEY),
+            max_concurrent_turns=max(concurrency_levels),
+        )
+        # Warm the connection pool so the first level does not pay for it
+        await self._turn_async(assistant, "warmup", self.workload[0])
+
+        summaries = []
+        for concurrency in concurrency_levels:
+            STAGE_SECONDS.reset()
+            started = time.monotonic()
+            per_user = await asyncio.gather(*(
+                self._user_async(assistant, f"bench-{concurrency}-{user}", turns)
+                for user, turns in enumerate(self._schedule(concurrency))
+            ))
+            elapsed = time.monotonic() - started
+            summaries.append(
+                summarize(concurrency, [r for results in per_user for r in results], elapsed)
+            )
+        return summaries
+
+    async def _user_async(
+        self, assistant: AsyncAIAssistant, session_id: str, turns: List[WorkloadTurn]
+    ) -> List[TurnResult]:
+        return [await self._turn_async(assistant, session_id, turn) for turn in turns]
+
+    async def _turn_async(
+        self, assistant: AsyncAIAssistant, session_id: str, turn: WorkloadTurn
+    ) -> TurnResult:
+        started = time.monotonic()
+        first_audio: List[float] = []
+
+        async def on_audio(chunk: bytes, is_final: bool):
+            if chunk and not first_audio:
+                first_audio.append(time.monotonic() - started)
+
+        deadline = self._deadline()
+        if turn.audio is not None:
+            _, reply = await assistant.process_audio_input_streaming(
+                turn.audio, on_audio, session_id, deadline
+            )
+        else:
+            reply = await assistant.speak_response(turn.text, on_audio, session_id, deadline)
+        return TurnResult(
+            turn.kind,
+            time.monotonic() - started,
+            first_audio[0] if first_audio else None,
+            reply in FAILED_REPLIES,
+        )
+
+    def _run_level_sync(self, concurrency: int) -> Dict[str, object]:
+        assistant = AIAssistant(
+            create_stt_provider("openai", MOCK_API_KEY),
+            create_llm_provider(self.llm_provider, MOCK_API_KEY),
+            create_tts_provider("openai", MOCK_API_KEY),
+        )
+        self._turn_sync(assistant, "warmup", self.workload[0])
+
+        STAGE_SECONDS.reset()
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(
+                    lambda session_id, turns: [
+                        self._turn_sync(assistant, session_id, turn) for turn in turns
+                    ],
+                    f"bench-{concurrency}-{user}",
+                    turns,
+                )
+                for user, turns in enumerate(self._schedule(concurrency))
+            ]
+            results = [result for future in futures for result in future.result()]
+        return summarize(concurrency, results, time.monotonic() - started)
+
+    def _turn_sync(self, assistant: AIAssistant, session_id: str, turn: WorkloadTurn) -> TurnResult:
+        started = time.monotonic()
+        first_audio: List[float] = []
+
+        def on_audio(chunk: bytes, is_final: bool):
+            if chunk and not first_audio:
+                first_audio.append(time.monotonic() - started)
+
+        deadline = self._deadline()
+        if turn.audio is not None:
+            _, reply = assistant.process_audio_input_streaming(
+                turn.audio, on_audio, session_id, deadline
+            )
+        else:
+            reply = assistant.speak_response(turn.text, on_audio, session_id, deadline)
+        return TurnResult(
+            turn.kind,
+            time.monotonic() - started,
+            first_audio[0] if first_audio else None,
+            reply in FAILED_REPLIES,
+        )
+
+
+# Summary fields where higher is worse, and where lower is worse
+LATENCY_FIELDS = ("e2e_p50_s", "e2e_p99_s", "first_audio_p50_s", "first_audio_p99_s")
+THROUGHPUT_FIELDS = ("turns_per_sec",)
+
+
+def find_regressions(
+    baseline: List[Dict[str, object]],
+    current: List[Dict[str, object]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Compare two runs level by level.
+
+    Returns:
+        A description of every latency that grew, or throughput that
+        fell, by more than tolerance (a fraction of the baseline), and of
+        every rise in the share of failed turns
+    """
+    regressions = []
+    previous = {level["concurrency"]: level for level in baseline}
+    for level in current:
+        before = previous.get(level["concurrency"])
+        if before is None:
+            continue
+        for name in LATENCY_FIELDS + THROUGHPUT_FIELDS:
+            old, new = before.get(name), level.get(name)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if name in THROUGHPUT_FIELDS:
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"concurrency {level['concurrency']}: {name} {old} -> {new} "
+                    f"({change:+.0%} worse)"
+                )
+        # Failures are usually 0 in the baseline, so any rise counts
+        if failure_rate(level) > failure_rate(before):
+            regressions.append(
+                f"concurrency {level['concurrency']}: failed {before.get('failed', 0)} "
+                f"-> {level['failed']} of {level['turns']} turns"
+            )
+    return regressions
+
+
+def failure_rate(level: Dict[str, object]) -> float:
+    """Share of a level's turns that failed."""
+    return level.get("failed", 0) / level["turns"] if level.get("turns") else 0.0
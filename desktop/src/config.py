@@ -9,6 +9,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def parse_optional_bool(value: str) -> Optional[bool]:
+    """Parse 'true'/'false', treating anything else (e.g. 'auto') as None."""
+    value = value.lower()
+    if value in ("true", "false"):
+        return value == "true"
+    return None
+
+
 @dataclass
 class Config:
     """Application configuration."""
@@ -16,6 +24,7 @@ class Config:
     # Backend
     backend_url: str
     use_tls: bool
+    send_queue_size: int  # outbound audio/text packets queued before senders wait
 
     # User
     user_id: str
@@ -28,17 +37,98 @@ class Config:
     # AI Configuration
     ai_provider: str  # openai, anthropic, local
     ai_model: str
+    llm_fast_model: Optional[str]  # used when a turn runs short on time
     stt_provider: str  # openai, local
     tts_provider: str  # openai, local
 
+    # LLM fallback (hedged requests and circuit breaking)
+    llm_fallback_provider: Optional[str]
+    llm_fallback_model: Optional[str]
+    llm_hedge_quantile: float
+    llm_hedge_max_delay: float
+    llm_circuit_failures: int
+    llm_circuit_reset: float
+
+    # Local LLM
+    local_llm_n_ctx: int
+    local_llm_cache_mb: int
+
+    # Local STT
+    stt_local_model: str
+    stt_compute_type: str
+    stt_workers: int  # 0 = one per CPU core
+
+    # Local TTS
+    tts_local_voice: Optional[str]  # Piper .onnx voice model
+
     # OpenAI specific
     openai_tts_voice: str
     openai_tts_model: str
 
+    # LLM response cache
+    llm_cache_enabled: bool
+    llm_cache_ttl: float
+    llm_cache_max_entries: int
+    llm_cache_context_turns: int
+
+    # TTS cache
+    tts_cache_enabled: bool
+    tts_cache_memory_mb: int
+    tts_cache_dir: Optional[str]
+    tts_cache_disk_mb: int
+    tts_phrase_bank: Optional[str]
+
     # Audio
     sample_rate: int
     chunk_size: int
     audio_format: str
+    vad_aggressiveness: int  # 0-3
+    vad_max_segment: float  # seconds
+    reassembly_session_mb: int
+    reassembly_total_mb: int
+    reassembly_timeout: float  # seconds
+
+    # HTTP transport
+    http_pool_size: int
+    http_keepalive_expiry: float
+    http2: Optional[bool]
+    client_idle_timeout: float
+
+    # Turn deadline
+    turn_deadline: float  # seconds from end of speech; 0 disables
+    deadline_degrade_at: float
+    deadline_text_only_at: float
+    degraded_max_tokens: int
+
+    # Speculative generation
+    speculative_llm: bool  # start the LLM on stable partial transcripts
+    speculation_max_distance: float  # fraction of filler words that may differ; 0 = exact
+    speculation_pause_ms: int
+
+    # Provider scheduling (per API key; rates of 0 are unlimited)
+    scheduler_enabled: bool
+    openai_requests_per_minute: float
+    openai_tokens_per_minute: float
+    anthropic_requests_per_minute: float
+    anthropic_tokens_per_minute: float
+    provider_max_concurrency: int
+    provider_min_concurrency: int
+    provider_latency_target: float  # seconds to a stream's first token or frame treated as overload; 0 disables
+
+    # Runtime
+    async_mode: bool
+    max_concurrent_turns: int
+
+    # Conversations
+    context_token_budget: int
+    history_max_messages: int
+    max_sessions: int
+    session_memory_mb: int
+    session_idle_timeout: float
+
+    # Metrics
+    metrics_port: int  # local Prometheus endpoint; 0 disables
+    metrics_host: str
 
     # Logging
     log_level: str
@@ -49,22 +139,89 @@ class Config:
         return cls(
             backend_url=os.getenv("BACKEND_URL", "localhost:50051"),
             use_tls=os.getenv("USE_TLS", "false").lower() == "true",
+            send_queue_size=int(os.getenv("SEND_QUEUE_SIZE", "64")),
             user_id=os.getenv("USER_ID", ""),
             access_token=os.getenv("ACCESS_TOKEN", ""),
             openai_api_key=os.getenv("OPENAI_API_KEY"),
             anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
             ai_provider=os.getenv("AI_PROVIDER", "openai"),
             ai_model=os.getenv("AI_MODEL", "gpt-4-turbo-preview"),
+            llm_fast_model=os.getenv("LLM_FAST_MODEL") or None,
             stt_provider=os.getenv("STT_PROVIDER", "openai"),
             tts_provider=os.getenv("TTS_PROVIDER", "openai"),
+            llm_fallback_provider=os.getenv("LLM_FALLBACK_PROVIDER") or None,
+            llm_fallback_model=os.getenv("LLM_FALLBACK_MODEL") or None,
+            llm_hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),
+            llm_hedge_max_delay=float(os.getenv("LLM_HEDGE_MAX_DELAY", "3.0")),
+            llm_circuit_failures=int(os.getenv("LLM_CIRCUIT_FAILURES", "3")),
+            llm_circuit_reset=float(os.getenv("LLM_CIRCUIT_RESET", "30")),
+            local_llm_n_ctx=int(os.getenv("LOCAL_LLM_N_CTX", "4096")),
+            local_llm_cache_mb=int(os.getenv("LOCAL_LLM_CACHE_MB", "1024")),
+            stt_local_model=os.getenv("STT_LOCAL_MODEL", "base"),
+            stt_compute_type=os.getenv("STT_COMPUTE_TYPE", "int8"),
+            stt_workers=int(os.getenv("STT_WORKERS", "0")),
+            tts_local_voice=os.getenv("TTS_LOCAL_VOICE") or None,
             openai_tts_voice=os.getenv("OPENAI_TTS_VOICE", "alloy"),
             openai_tts_model=os.getenv("OPENAI_TTS_MODEL", "tts-1"),
+            llm_cache_enabled=os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true",
+            llm_cache_ttl=float(os.getenv("LLM_CACHE_TTL", "60")),
+            llm_cache_max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000")),
+            llm_cache_context_turns=int(os.getenv("LLM_CACHE_CONTEXT_TURNS", "3")),
+            tts_cache_enabled=os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true",
+            tts_cache_memory_mb=int(os.getenv("TTS_CACHE_MEMORY_MB", "32")),
+            tts_cache_dir=os.getenv("TTS_CACHE_DIR", "tts_cache") or None,
+            tts_cache_disk_mb=int(os.getenv("TTS_CACHE_DISK_MB", "256")),
+            tts_phrase_bank=os.getenv("TTS_PHRASE_BANK"),
             sample_rate=int(os.getenv("SAMPLE_RATE", "16000")),
             chunk_size=int(os.getenv("CHUNK_SIZE", "1024")),
             audio_format=os.getenv("AUDIO_FORMAT", "opus"),
+            vad_aggressiveness=int(os.getenv("VAD_AGGRESSIVENESS", "2")),
+            vad_max_segment=float(os.getenv("VAD_MAX_SEGMENT", "30")),
+            reassembly_session_mb=int(os.getenv("REASSEMBLY_SESSION_MB", "4")),
+            reassembly_total_mb=int(os.getenv("REASSEMBLY_TOTAL_MB", "64")),
+            reassembly_timeout=float(os.getenv("REASSEMBLY_TIMEOUT", "30")),
+            http_pool_size=int(os.getenv("HTTP_POOL_SIZE", "20")),
+            http_keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120")),
+            http2=parse_optional_bool(os.getenv("HTTP2", "auto")),
+            client_idle_timeout=float(os.getenv("CLIENT_IDLE_TIMEOUT", "600")),
+            turn_deadline=float(os.getenv("TURN_DEADLINE", "6.0")),
+            deadline_degrade_at=float(os.getenv("DEADLINE_DEGRADE_AT", "0.5")),
+            deadline_text_only_at=float(os.getenv("DEADLINE_TEXT_ONLY_AT", "0.2")),
+            degraded_max_tokens=int(os.getenv("DEGRADED_MAX_TOKENS", "150")),
+            speculative_llm=os.getenv("SPECULATIVE_LLM", "false").lower() == "true",
+            speculation_max_distance=float(os.getenv("SPECULATION_MAX_DISTANCE", "0")),
+            speculation_pause_ms=int(os.getenv("SPECULATION_PAUSE_MS", "250")),
+            scheduler_enabled=os.getenv("SCHEDULER_ENABLED", "true").lower() == "true",
+            openai_requests_per_minute=float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0")),
+            openai_tokens_per_minute=float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0")),
+            anthropic_requests_per_minute=float(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "0")),
+            anthropic_tokens_per_minute=float(os.getenv("ANTHROPIC_TOKENS_PER_MINUTE", "0")),
+            provider_max_concurrency=int(os.getenv("PROVIDER_MAX_CONCURRENCY", "16")),
+            provider_min_concurrency=int(os.getenv("PROVIDER_MIN_CONCURRENCY", "1")),
+            provider_latency_target=float(os.getenv("PROVIDER_LATENCY_TARGET", "4.0")),
+            async_mode=os.getenv("ASYNC_MODE", "false").lower() == "true",
+            max_concurrent_turns=int(os.getenv("MAX_CONCURRENT_TURNS", "8")),
+            context_token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "0")),
+            history_max_messages=int(os.getenv("HISTORY_MAX_MESSAGES", "100")),
+            max_sessions=int(os.getenv("MAX_SESSIONS", "10000")),
+            session_memory_mb=int(os.getenv("SESSION_MEMORY_MB", "64")),
+            session_idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "3600")),
+            metrics_port=int(os.getenv("METRICS_PORT", "9464")),
+            metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
             log_level=os.getenv("LOG_LEVEL", "INFO"),
         )
 
+    @property
+    def user_ids(self) -> list[str]:
+        """User IDs served by this desktop (USER_ID may be comma-separated)."""
+        return [uid.strip() for uid in self.user_id.split(",") if uid.strip()]
+
+    def api_key_for(self, provider: str) -> Optional[str]:
+        """API key of an AI provider."""
+        if provider == "anthropic":
+            return self.anthropic_api_key
+        return self.openai_api_key
+
     def validate(self) -> list[str]:
         """Validate configuration and return list of errors."""
         errors = []
@@ -81,4 +238,25 @@ class Config:
         if self.ai_provider == "anthropic" and not self.anthropic_api_key:
             errors.append("ANTHROPIC_API_KEY is required when using Anthropic")
 
+        if self.ai_provider == "local" and not os.path.isfile(self.ai_model):
+            errors.append("AI_MODEL must be the path to a GGUF model file when using local")
+
+        if not 1 <= self.provider_min_concurrency <= self.provider_max_concurrency:
+            errors.append("PROVIDER_MIN_CONCURRENCY must be between 1 and PROVIDER_MAX_CONCURRENCY")
+
+        if self.vad_aggressiveness not in range(4):
+            errors.append("VAD_AGGRESSIVENESS must be between 0 and 3")
+
+        if self.tts_provider == "local" and not (
+            self.tts_local_voice and os.path.isfile(self.tts_local_voice)
+        ):
+            errors.append("TTS_LOCAL_VOICE must be the path to a Piper voice when using local")
+
+        if self.llm_fallback_provider in ("openai", "anthropic") and not self.api_key_for(
+            self.llm_fallback_provider
+        ):
+            errors.append(
+                f"An API key is required for LLM_FALLBACK_PROVIDER={self.llm_fallback_provider}"
+            )
+
         return errors
@@ -0,0 +1,210 @@
+"""Session-keyed conversation history store."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+from ai.llm import Message
+
+logger = logging.getLogger(__name__)
+
+# History key used when callers do not distinguish sessions
+DEFAULT_SESSION = "default"
+
+# Rough per-message overhead (object, slots, cached dict) on top of the text
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+def session_key(user_id: str, conversation_id: Optional[str] = None) -> str:
+    """Build the history key for a user and optional conversation."""
+    return f"{user_id}:{conversation_id}" if conversation_id else user_id
+
+
+def session_id_for_packet(packet) -> str:
+    """Derive the history key from a streaming_pb2.Packet."""
+    conversation_id = None
+    if packet.WhichOneof("payload") == "conversation":
+        conversation_id = packet.conversation.conversation_id
+    return session_key(packet.user_id, conversation_id)
+
+
+class Conversation:
+    """Bounded message history of one session, plus a summary of older turns."""
+
+    __slots__ = ("session_id", "messages", "summary", "size_bytes", "last_used")
+
+    def __init__(self, session_id: str, max_messages: int):
+        self.session_id = session_id
+        self.messages: Deque[Message] = deque(maxlen=max_messages)
+        self.summary = ""
+        self.size_bytes = 0
+        self.last_used = time.monotonic()
+
+    def append(self, message: Message) -> int:
+        """
+        Append a message, dropping the oldest one when full.
+
+        Returns:
+            Change in approximate memory use, in bytes
+        """
+        delta = message_size(message)
+        if len(self.messages) == self.messages.maxlen:
+            delta -= message_size(self.messages[0])
+        self.messages.append(message)
+        self.size_bytes += delta
+        return delta
+
+
+def message_size(message: Message) -> int:
+    """Approximate memory held by a message."""
+    return len(message.content) + MESSAGE_OVERHEAD_BYTES
+
+
+class ConversationStore:
+    """
+    Conversation histories keyed by session, with LRU eviction.
+
+    Each session keeps at most max_messages in a ring buffer. Sessions idle
+    for longer than idle_timeout are dropped, and the least recently used
+    sessions are evicted whenever max_sessions or max_bytes is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = 10,
+        max_sessions: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_timeout: float = 3600.0,
+        on_evict: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize conversation store.
+
+        Args:
+            max_messages: Messages kept per session
+            max_sessions: Live sessions kept before LRU eviction
+            max_bytes: Approximate memory budget across all sessions
+            idle_timeout: Seconds of inactivity after which a session is dropped
+            on_evict: Called with the session ID of every evicted session
+        """
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+
+        self.sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def append(self, session_id: str, message: Message):
+        """Add a message to a session's history, creating the session if needed."""
+        with self.lock:
+            conversation = self.sessions.get(session_id)
+            if conversation is None:
+                conversation = Conversation(session_id, self.max_messages)
+                self.sessions[session_id] = conversation
+            else:
+                self.sessions.move_to_end(session_id)
+
+            conversation.last_used = time.monotonic()
+            self.total_bytes += conversation.append(message)
+            evicted = self._evict(keep=session_id)
+
+        self._notify(evicted)
+
+    def messages(self, session_id: str) -> List[Message]:
+        """Return a snapshot of a session's history (oldest first)."""
+        with self.lock:
+            conversation = self.sessions.get(session_id)
+            if conversation is None:
+                return []
+            self.sessions.move_to_end(session_id)
+            conversation.last_used = time.monotonic()
+            return list(conversation.messages)
+
+    def snapshot(self, session_id: str) -> Tuple[str, List[Message]]:
+        """Return a session's (summary, messages) for building a prompt."""
+        with self.lock:
+            conversation = self.sessions.get(session_id)
+            if conversation is None:
+                return "", []
+            self.sessions.move_to_end(session_id)
+            conversation.last_used = time.monotonic()
+            return conversation.summary, list(conversation.messages)
+
+    def compact(self, session_id: str, summarized: Sequence[Message], summary: str):
+        """
+        Replace the oldest messages with an updated summary.
+
+        Args:
+            session_id: Session to compact
+            summarized: Messages folded into the summary (oldest first)
+            summary: New rolling summary covering them
+        """
+        with self.lock:
+            conversation = self.sessions.get(session_id)
+            if conversation is None:
+                return
+
+            summarized_ids = {id(msg) for msg in summarized}
+            while conversation.messages and id(conversation.messages[0]) in summarized_ids:
+                removed = conversation.messages.popleft()
+                conversation.size_bytes -= message_size(removed)
+                self.total_bytes -= message_size(removed)
+
+            delta = len(summary) - len(conversation.summary)
+            conversation.summary = summary
+            conversation.size_bytes += delta
+            self.total_bytes += delta
+
+    def clear(self, session_id: str):
+        """Drop a session's history."""
+        with self.lock:
+            conversation = self.sessions.pop(session_id, None)
+            if conversation:
+                self.total_bytes -= conversation.size_bytes
+
+    def clear_all(self):
+        """Drop every session."""
+        with self.lock:
+            self.sessions.clear()
+            self.total_bytes = 0
+
+    def _evict(self, keep: str) -> List[str]:
+        """Evict idle and over-budget sessions, oldest first."""
+        evicted = []
+        cutoff = time.monotonic() - self.idle_timeout
+
+        while self.sessions:
+            session_id, conversation = next(iter(self.sessions.items()))
+            if session_id == keep:
+                break
+
+            over_budget = (
+                len(self.sessions) > self.max_sessions
+                or self.total_bytes > self.max_bytes
+            )
+            if not over_budget and conversation.last_used >= cutoff:
+                break
+
+            del self.sessions[session_id]
+            self.total_bytes -= conversation.size_bytes
+            evicted.append(session_id)
+
+        if evicted:
+            logger.info(
+                f"Evicted {len(evicted)} conversation(s); "
+                f"{len(self.sessions)} live, {self.total_bytes} bytes"
+            )
+        return evicted
+
+    def _notify(self, evicted: List[str]):
+        """Report evicted sessions outside the lock."""
+        if self.on_evict:
+            for session_id in evicted:
+                self.on_evict(session_id)
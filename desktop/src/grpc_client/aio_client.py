@@ -0,0 +1,160 @@
+"""asyncio gRPC client for connecting to backend relay server."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Set
+
+import grpc
+
+from ai.cancel import CancelToken
+from grpc_client.client import GRPCClient, streaming_pb2_grpc
+from grpc_client.outbound import AsyncSendQueue
+from metrics import trace
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGRPCClient(GRPCClient):
+    """
+    grpc.aio streaming client.
+
+    Shares packet construction with GRPCClient. Incoming packets are each
+    dispatched to their own task, so a slow handler never holds up the
+    receive loop (and with it, control packets).
+    """
+
+    def __init__(
+        self,
+        backend_url: str,
+        user_id: str,
+        use_tls: bool = False,
+        chunk_size: int = 1024,
+        send_queue_size: int = 64,
+    ):
+        """
+        Initialize async gRPC client.
+
+        Args:
+            backend_url: Backend server address (e.g., 'localhost:50051')
+            user_id: User ID for pairing
+            use_tls: Whether to use TLS encryption
+            chunk_size: Most bytes of audio per outgoing AudioData frame
+            send_queue_size: Most audio/text packets queued for sending
+                before send_packet waits
+        """
+        super().__init__(backend_url, user_id, use_tls, chunk_size, send_queue_size)
+        self.channel: Optional[grpc.aio.Channel] = None
+        self.outbound: Optional[AsyncSendQueue] = None
+        self.handler_tasks: Set[asyncio.Task] = set()
+
+    async def connect(self):
+        """Establish connection to backend server."""
+        logger.info(f"Connecting to backend at {self.backend_url}")
+
+        if self.use_tls:
+            credentials = grpc.ssl_channel_credentials()
+            self.channel = grpc.aio.secure_channel(self.backend_url, credentials)
+        else:
+            self.channel = grpc.aio.insecure_channel(self.backend_url)
+
+        self.stub = streaming_pb2_grpc.StreamingServiceStub(self.channel)
+        self.outbound = AsyncSendQueue(self.send_queue_size)
+
+        logger.info("Connected to backend")
+        self.connected = True
+
+    async def disconnect(self):
+        """Close connection to backend server."""
+        self.connected = False
+
+        if self.outbound:
+            await self.outbound.close()
+
+        if self.stream:
+            self.stream.cancel()
+            self.stream = None
+
+        for task in list(self.handler_tasks):
+            task.cancel()
+
+        if self.channel:
+            await self.channel.close()
+            self.channel = None
+
+        logger.info("Disconnected from backend")
+
+    async def start_stream(self, packet_handler: Callable[..., Awaitable[None]]):
+        """
+        Run bidirectional streaming until the stream ends.
+
+        Args:
+            packet_handler: Coroutine function called with each incoming packet
+        """
+        if not self.connected:
+            raise RuntimeError("Not connected to backend")
+
+        logger.info("Starting stream...")
+
+        async def packet_generator():
+            # First packet: registration
+            yield self.create_registration_packet()
+
+            while True:
+                packet = await self.outbound.get()
+                if packet is None:
+                    return
+                yield packet
+
+        self.stream = self.stub.Stream(packet_generator())
+        logger.info("Stream started")
+
+        async for packet in self.stream:
+            self._received(packet)
+            task = asyncio.create_task(self._handle(packet_handler, packet))
+            self.handler_tasks.add(task)
+            task.add_done_callback(self._handler_done)
+
+        logger.info("Stream ended")
+
+    async def send_packet(
+        self,
+        packet,
+        timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> bool:
+        """
+        Queue a packet for sending to the backend.
+
+        Control packets are sent ahead of queued audio and never wait;
+        other packets wait while the send queue is full.
+
+        Args:
+            packet: Packet to send
+            timeout: Most seconds to wait for room in the queue
+            cancel: Turn the packet belongs to; it is dropped once the
+                turn is cancelled
+
+        Returns:
+            False if the packet was dropped (timed out, disconnected or
+            the turn was cancelled)
+        """
+        if self.outbound is None:
+            raise RuntimeError("Not connected to backend")
+        return await self.outbound.put(packet, timeout, cancel)
+
+    async def flush(self, cancel: CancelToken) -> int:
+        """Drop the queued packets of a cancelled turn, returning how many."""
+        if self.outbound is None:
+            return 0
+        return await self.outbound.flush(cancel)
+
+    async def _handle(self, packet_handler: Callable[..., Awaitable[None]], packet):
+        """Call the packet handler under the packet's trace."""
+        with trace(packet.packet_id):
+            await packet_handler(packet)
+
+    def _handler_done(self, task: asyncio.Task):
+        """Forget a finished handler task and log its failure, if any."""
+        self.handler_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error handling packet: {task.exception()}")
@@ -2,15 +2,26 @@
 
 import grpc
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator, Callable, Optional
 import time
 import uuid
 
 # Import generated protobuf code
-# These will be generated by protoc
+# These will be generated by protoc into the desktop directory:
+#   python -m grpc_tools.protoc -I=../proto --python_out=. --grpc_python_out=. ../proto/*.proto
 import sys
 sys.path.append('..')
-# from proto import streaming_pb2, streaming_pb2_grpc
+try:
+    import streaming_pb2
+    import streaming_pb2_grpc
+except ImportError:
+    streaming_pb2 = None
+    streaming_pb2_grpc = None
+
+from ai.cancel import CancelToken
+from grpc_client.outbound import AudioFramer, SendQueue, is_control
+from metrics import record_transport, trace
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +29,14 @@ logger = logging.getLogger(__name__)
 class GRPCClient:
     """gRPC client for streaming communication with backend."""
 
-    def __init__(self, backend_url: str, user_id: str, use_tls: bool = False):
+    def __init__(
+        self,
+        backend_url: str,
+        user_id: str,
+        use_tls: bool = False,
+        chunk_size: int = 1024,
+        send_queue_size: int = 64,
+    ):
         """
         Initialize gRPC client.
 
@@ -26,13 +44,19 @@ class GRPCClient:
             backend_url: Backend server address (e.g., 'localhost:50051')
             user_id: User ID for pairing
             use_tls: Whether to use TLS encryption
+            chunk_size: Most bytes of audio per outgoing AudioData frame
+            send_queue_size: Most audio/text packets queued for sending
+                before send_packet blocks
         """
         self.backend_url = backend_url
         self.user_id = user_id
         self.use_tls = use_tls
+        self.chunk_size = chunk_size
+        self.send_queue_size = send_queue_size
         self.channel: Optional[grpc.Channel] = None
         self.stub = None
         self.stream = None
+        self.outbound: Optional[SendQueue] = None
         self.connected = False
 
     def connect(self):
@@ -45,14 +69,19 @@ class GRPCClient:
         else:
             self.channel = grpc.insecure_channel(self.backend_url)
 
-        # TODO: Uncomment when protobuf code is generated
-        # self.stub = streaming_pb2_grpc.StreamingServiceStub(self.channel)
+        self.stub = streaming_pb2_grpc.StreamingServiceStub(self.channel)
+        self.outbound = SendQueue(self.send_queue_size)
 
         logger.info("Connected to backend")
         self.connected = True
 
     def disconnect(self):
         """Close connection to backend server."""
+        self.connected = False
+
+        if self.outbound:
+            self.outbound.close()
+
         if self.stream:
             self.stream.cancel()
             self.stream = None
@@ -61,12 +90,15 @@ class GRPCClient:
             self.channel.close()
             self.channel = None
 
-        self.connected = False
         logger.info("Disconnected from backend")
 
     def start_stream(self, packet_handler: Callable):
         """
-        Start bidirectional streaming.
+        Run bidirectional streaming until the stream ends.
+
+        Control packets are handled on the receiving thread, so a CANCEL is
+        seen while a turn is still running; other packets are handled in
+        arrival order on a worker thread.
 
         Args:
             packet_handler: Callback function to handle incoming packets
@@ -76,47 +108,150 @@ class GRPCClient:
 
         logger.info("Starting stream...")
 
-        # TODO: Implement actual streaming when protobuf is generated
-        # def packet_generator():
-        #     # First packet: registration
-        #     registration_packet = streaming_pb2.Packet(
-        #         packet_id=str(uuid.uuid4()),
-        #         user_id=self.user_id,
-        #         source=streaming_pb2.DESKTOP,
-        #         destination=streaming_pb2.MOBILE,
-        #         type=streaming_pb2.CONTROL,
-        #         timestamp=int(time.time() * 1000),
-        #     )
-        #     yield registration_packet
-        #
-        #     # Keep connection alive
-        #     while self.connected:
-        #         time.sleep(1)
-        #
-        # self.stream = self.stub.Stream(packet_generator())
-        #
-        # # Handle incoming packets
-        # for packet in self.stream:
-        #     packet_handler(packet)
+        def packet_generator():
+            # First packet: registration
+            yield self.create_registration_packet()
+
+            while True:
+                packet = self.outbound.get()
+                if packet is None:
+                    return
+                yield packet
 
+        self.stream = self.stub.Stream(packet_generator())
         logger.info("Stream started")
 
-    def send_packet(self, packet):
-        """Send a packet to the backend."""
-        # TODO: Implement when protobuf is generated
-        pass
+        handler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="packet-handler")
+        try:
+            for packet in self.stream:
+                self._received(packet)
+                if is_control(packet):
+                    self._handle(packet_handler, packet)
+                else:
+                    handler.submit(self._handle, packet_handler, packet)
+        finally:
+            handler.shutdown(wait=False, cancel_futures=True)
+
+        logger.info("Stream ended")
+
+    def _handle(self, packet_handler: Callable, packet):
+        """Call the packet handler under the packet's trace, logging its failure."""
+        with trace(packet.packet_id):
+            try:
+                packet_handler(packet)
+            except Exception as e:
+                logger.error(f"Error handling packet: {e}")
+
+    def _received(self, packet):
+        """Record how long a packet took from its sender (timestamped in ms)."""
+        if packet.timestamp:
+            latency = max(0.0, time.time() - packet.timestamp / 1000)
+            record_transport("receive", packet, latency)
+
+    def send_packet(
+        self,
+        packet,
+        timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> bool:
+        """
+        Queue a packet for sending to the backend.
+
+        Control packets are sent ahead of queued audio and never block;
+        other packets block while the send queue is full.
+
+        Args:
+            packet: Packet to send
+            timeout: Most seconds to wait for room in the queue
+            cancel: Turn the packet belongs to; it is dropped once the
+                turn is cancelled
+
+        Returns:
+            False if the packet was dropped (timed out, disconnected or
+            the turn was cancelled)
+        """
+        if self.outbound is None:
+            raise RuntimeError("Not connected to backend")
+        return self.outbound.put(packet, timeout, cancel)
+
+    def flush(self, cancel: CancelToken) -> int:
+        """Drop the queued packets of a cancelled turn, returning how many."""
+        if self.outbound is None:
+            return 0
+        return self.outbound.flush(cancel)
+
+    def audio_framer(self, audio_format: int = 0, sample_rate: int = 0) -> AudioFramer:
+        """Frame an outgoing audio stream into numbered packets of at most chunk_size."""
+        return AudioFramer(self, self.chunk_size, audio_format, sample_rate)
+
+    def send_stats(self) -> dict:
+        """Send queue depth and latency (see SendQueue.stats)."""
+        return self.outbound.stats() if self.outbound else {}
+
+    def create_packet(self, packet_type: int, **payload):
+        """
+        Create a packet from this desktop to the paired phone.
+
+        Args:
+            packet_type: streaming_pb2.PacketType value
+            **payload: At most one payload field (audio, text, transcript, ...)
+        """
+        return streaming_pb2.Packet(
+            packet_id=str(uuid.uuid4()),
+            user_id=self.user_id,
+            source=streaming_pb2.DESKTOP,
+            destination=streaming_pb2.MOBILE,
+            type=packet_type,
+            timestamp=int(time.time() * 1000),
+            **payload,
+        )
+
+    def create_registration_packet(self):
+        """Create the first packet of a stream, which registers this device."""
+        return self.create_packet(streaming_pb2.CONTROL)
+
+    def create_control_packet(self, control_type: int, message: str = ""):
+        """Create a control packet."""
+        return self.create_packet(
+            streaming_pb2.CONTROL,
+            control=streaming_pb2.ControlMessage(control_type=control_type, message=message),
+        )
 
     def create_text_packet(self, text: str, text_type: str = "AI_RESPONSE"):
         """Create a text packet."""
-        # TODO: Implement when protobuf is generated
-        pass
+        return self.create_packet(
+            streaming_pb2.TEXT_MESSAGE,
+            text=streaming_pb2.TextData(
+                text=text, text_type=streaming_pb2.TextType.Value(text_type)
+            ),
+        )
 
-    def create_audio_packet(self, audio_data: bytes, is_final: bool = False):
+    def create_audio_packet(
+        self,
+        audio_data: bytes,
+        is_final: bool = False,
+        audio_format: int = 0,
+        sample_rate: int = 0,
+        chunk_index: int = 0,
+    ):
         """Create an audio packet."""
-        # TODO: Implement when protobuf is generated
-        pass
+        return self.create_packet(
+            streaming_pb2.AUDIO_CHUNK,
+            audio=streaming_pb2.AudioData(
+                data=audio_data,
+                format=audio_format,
+                sample_rate=sample_rate,
+                channels=1,
+                chunk_index=chunk_index,
+                is_final=is_final,
+            ),
+        )
 
     def create_transcript_packet(self, text: str, is_final: bool = False, confidence: float = 1.0):
         """Create a transcript packet."""
-        # TODO: Implement when protobuf is generated
-        pass
+        return self.create_packet(
+            streaming_pb2.TRANSCRIPT,
+            transcript=streaming_pb2.TranscriptData(
+                text=text, is_final=is_final, confidence=confidence
+            ),
+        )
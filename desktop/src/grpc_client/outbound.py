@@ -0,0 +1,309 @@
+"""Outbound packet pipeline: audio framing and the prioritized send queue."""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ai.cancel import CancelToken
+from audio.formats import OPUS
+from metrics import LatencyTracker, record_transport
+
+logger = logging.getLogger(__name__)
+
+# (packet, time it was queued, turn it belongs to)
+Queued = Tuple[object, float, Optional[CancelToken]]
+
+
+def is_control(packet) -> bool:
+    """Whether a packet jumps the queue (ACK, CANCEL, ERROR, ...)."""
+    return packet.HasField("control")
+
+
+def _cancelled(cancel: Optional[CancelToken]) -> bool:
+    return cancel is not None and cancel.cancelled
+
+
+class AudioFramer:
+    """
+    Numbers the AudioData frames of one outgoing audio stream.
+
+    Large chunks (a whole synthesized sentence) are split into frames of at
+    most chunk_size bytes, so a frame never holds the stream up for long
+    and the phone can start playback early. Opus chunks are already one
+    packet each and are never split.
+    """
+
+    def __init__(self, client, chunk_size: int, audio_format: int = 0, sample_rate: int = 0):
+        """
+        Initialize audio framer.
+
+        Args:
+            client: GRPCClient creating the packets
+            chunk_size: Most bytes of audio per frame
+            audio_format: AudioFormat of the stream
+            sample_rate: Sample rate of the stream
+        """
+        self.client = client
+        # Whole 16-bit samples per PCM frame
+        self.chunk_size = max(chunk_size - chunk_size % 2, 2)
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        self.next_index = 0
+
+    def packets(self, data: bytes, is_final: bool = False) -> List:
+        """
+        Audio packets carrying a chunk of the stream.
+
+        Args:
+            data: Encoded audio (may be empty for a bare end-of-stream marker)
+            is_final: Whether this chunk ends the stream
+
+        Returns:
+            Packets with consecutive chunk_index values, the last one
+            marked final if is_final
+        """
+        if self.audio_format == OPUS or len(data) <= self.chunk_size:
+            frames = [data]
+        else:
+            view = memoryview(data)
+            frames = [
+                view[start : start + self.chunk_size]
+                for start in range(0, len(data), self.chunk_size)
+            ]
+
+        packets = []
+        for i, frame in enumerate(frames):
+            packets.append(
+                self.client.create_audio_packet(
+                    bytes(frame),
+                    is_final=is_final and i == len(frames) - 1,
+                    audio_format=self.audio_format,
+                    sample_rate=self.sample_rate,
+                    chunk_index=self.next_index,
+                )
+            )
+            self.next_index += 1
+        return packets
+
+
+class SendQueue:
+    """
+    Bounded send queue where control packets overtake queued audio.
+
+    Audio and text packets wait in a queue of max_size; producers block
+    while it is full, so a slow network pushes back on TTS instead of
+    buffering a whole reply in memory. Control packets go to a separate
+    lane that is always drained first and never blocks (when even that
+    fills up, its oldest packet is dropped).
+
+    Packets can be tagged with the CancelToken of the turn they belong to;
+    once that turn is cancelled, flush() drops its queued packets and
+    senders still waiting for room give up.
+    """
+
+    def __init__(self, max_size: int = 64, max_control: int = 256):
+        """
+        Initialize send queue.
+
+        Args:
+            max_size: Most audio/text packets waiting to be sent
+            max_control: Most control packets waiting to be sent
+        """
+        self.max_size = max_size
+        self.control: Deque[Queued] = deque(maxlen=max_control)
+        self.data: Deque[Queued] = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.latency = LatencyTracker()
+        self.sent = 0
+        self.max_depth = 0
+
+    def put(
+        self,
+        packet,
+        timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> bool:
+        """
+        Queue a packet, blocking while the data lane is full.
+
+        Args:
+            packet: Packet to send
+            timeout: Most seconds to wait for room (None: no limit)
+            cancel: Turn the packet belongs to
+
+        Returns:
+            False if the packet was not queued (timed out, closed or the
+            turn was cancelled)
+        """
+        with self.condition:
+            if self.closed or _cancelled(cancel):
+                return False
+            if is_control(packet):
+                if len(self.control) == self.control.maxlen:
+                    logger.warning("Control send queue full, dropping its oldest packet")
+                self.control.append((packet, time.monotonic(), cancel))
+                self.condition.notify_all()
+                return True
+
+            has_room = self.condition.wait_for(
+                lambda: self.closed or _cancelled(cancel) or len(self.data) < self.max_size,
+                timeout,
+            )
+            if not has_room or self.closed or _cancelled(cancel):
+                return False
+            self.data.append((packet, time.monotonic(), cancel))
+            self.max_depth = max(self.max_depth, len(self.data))
+            self.condition.notify_all()
+            return True
+
+    def get(self):
+        """Next packet to send, waiting for one; None once closed."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.closed or self.control or self.data)
+            if self.closed:
+                return None
+            packet, queued_at, _ = (self.control or self.data).popleft()
+            self.condition.notify_all()
+        self._sent(packet, queued_at)
+        return packet
+
+    def flush(self, cancel: CancelToken) -> int:
+        """
+        Drop a cancelled turn's queued packets and wake its waiting senders.
+
+        Returns:
+            Number of packets dropped
+        """
+        with self.condition:
+            dropped = self._drop(cancel)
+            self.condition.notify_all()
+        return dropped
+
+    def close(self):
+        """Discard queued packets and wake every waiting producer and consumer."""
+        with self.condition:
+            self.closed = True
+            self.control.clear()
+            self.data.clear()
+            self.condition.notify_all()
+
+    def _drop(self, cancel: CancelToken) -> int:
+        """Remove the data packets tagged with cancel."""
+        kept = deque(item for item in self.data if item[2] is not cancel)
+        dropped = len(self.data) - len(kept)
+        self.data = kept
+        return dropped
+
+    def _sent(self, packet, queued_at: float):
+        waited = time.monotonic() - queued_at
+        self.sent += 1
+        self.latency.record(waited)
+        record_transport("send", packet, waited)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Queue depth and send latency (seconds from queueing to send)."""
+        return {
+            "control_depth": len(self.control),
+            "data_depth": len(self.data),
+            "max_data_depth": self.max_depth,
+            "sent": self.sent,
+            "send_latency_p50": self.latency.percentile(0.5),
+            "send_latency_p95": self.latency.percentile(0.95),
+        }
+
+
+class AsyncSendQueue(SendQueue):
+    """SendQueue for a grpc.aio stream, waiting on the event loop instead of a thread."""
+
+    def __init__(self, max_size: int = 64, max_control: int = 256):
+        """
+        Initialize async send queue.
+
+        Args:
+            max_size: Most audio/text packets waiting to be sent
+            max_control: Most control packets waiting to be sent
+        """
+        super().__init__(max_size, max_control)
+        self.condition = asyncio.Condition()
+
+    async def put(
+        self,
+        packet,
+        timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> bool:
+        """
+        Queue a packet, waiting while the data lane is full.
+
+        Args:
+            packet: Packet to send
+            timeout: Most seconds to wait for room (None: no limit)
+            cancel: Turn the packet belongs to
+
+        Returns:
+            False if the packet was not queued (timed out, closed or the
+            turn was cancelled)
+        """
+        async with self.condition:
+            if self.closed or _cancelled(cancel):
+                return False
+            if is_control(packet):
+                if len(self.control) == self.control.maxlen:
+                    logger.warning("Control send queue full, dropping its oldest packet")
+                self.control.append((packet, time.monotonic(), cancel))
+                self.condition.notify_all()
+                return True
+
+            try:
+                await asyncio.wait_for(
+                    self.condition.wait_for(
+                        lambda: self.closed
+                        or _cancelled(cancel)
+                        or len(self.data) < self.max_size
+                    ),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                return False
+            if self.closed or _cancelled(cancel):
+                return False
+            self.data.append((packet, time.monotonic(), cancel))
+            self.max_depth = max(self.max_depth, len(self.data))
+            self.condition.notify_all()
+            return True
+
+    async def get(self):
+        """Next packet to send, waiting for one; None once closed."""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.closed or self.control or self.data)
+            if self.closed:
+                return None
+            packet, queued_at, _ = (self.control or self.data).popleft()
+            self.condition.notify_all()
+        self._sent(packet, queued_at)
+        return packet
+
+    async def flush(self, cancel: CancelToken) -> int:
+        """
+        Drop a cancelled turn's queued packets and wake its waiting senders.
+
+        Returns:
+            Number of packets dropped
+        """
+        async with self.condition:
+            dropped = self._drop(cancel)
+            self.condition.notify_all()
+        return dropped
+
+    async def close(self):
+        """Discard queued packets and wake every waiting producer and consumer."""
+        async with self.condition:
+            self.closed = True
+            self.control.clear()
+            self.data.clear()
+            self.condition.notify_all()
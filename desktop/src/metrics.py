@@ -0,0 +1,480 @@
+"""Per-stage latency metrics, turn traces and a Prometheus text endpoint."""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the histogram buckets
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# Quantiles reported from each series' recent samples
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Label values of one series, in the metric's label_names order
+LabelValues = Tuple[str, ...]
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], **extra: str) -> str:
+    """Prometheus label set, e.g. {stage="llm",le="0.5"} (empty without labels)."""
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class HistogramSeries:
+    """Bucket counts, sum and recent samples of one label set."""
+
+    __slots__ = ("buckets", "sum", "count", "recent")
+
+    def __init__(self, bucket_count: int, window: int):
+        self.buckets = [0] * bucket_count
+        self.sum = 0.0
+        self.count = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+
+class Histogram:
+    """
+    Latency histogram with labels.
+
+    Exported as a Prometheus histogram (cumulative buckets, sum, count) for
+    aggregation, plus a summary named <name>_recent whose quantiles are
+    computed over the last `window` samples of each series.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        window: int = 1024,
+    ):
+        """
+        Initialize histogram.
+
+        Args:
+            name: Metric name
+            help_text: Description shown by Prometheus
+            label_names: Names of the labels every observation carries
+            buckets: Sorted bucket upper bounds
+            window: Recent samples kept per series for quantiles
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.bounds = tuple(buckets)
+        self.window = window
+        self.series: Dict[LabelValues, HistogramSeries] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        """Record a sample for the series with these label values."""
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = HistogramSeries(len(self.bounds), self.window)
+                self.series[label_values] = series
+            index = bisect_left(self.bounds, value)
+            if index < len(self.bounds):
+                series.buckets[index] += 1
+            series.sum += value
+            series.count += 1
+            series.recent.append(value)
+
+    def quantiles(self, *label_values: str) -> Dict[float, Optional[float]]:
+        """p50/p95/p99 of a series' recent samples (None without samples)."""
+        with self.lock:
+            series = self.series.get(label_values)
+            recent = sorted(series.recent) if series is not None else []
+        return {q: _quantile(recent, q) for q in QUANTILES}
+
+    def label_sets(self) -> List[LabelValues]:
+        """Label values of every series observed so far."""
+        with self.lock:
+            return list(self.series)
+
+    def reset(self):
+        """Forget all samples (e.g. between benchmark runs)."""
+        with self.lock:
+            self.series.clear()
+
+    def render(self) -> List[str]:
+        with self.lock:
+            snapshot = [
+                (values, list(series.buckets), series.sum, series.count, sorted(series.recent))
+                for values, series in self.series.items()
+            ]
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for values, buckets, total, count, _ in snapshot:
+            cumulative = 0
+            for bound, bucket in zip(self.bounds, buckets):
+                cumulative += bucket
+                labels = format_labels(self.label_names, values, le=f"{bound:g}")
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, values, le="+Inf")
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {count}")
+
+        recent_name = f"{self.name}_recent"
+        lines.append(f"# HELP {recent_name} {self.help_text} (last {self.window} samples)")
+        lines.append(f"# TYPE {recent_name} summary")
+        for values, _, total, count, recent in snapshot:
+            for q in QUANTILES:
+                labels = format_labels(self.label_names, values, quantile=f"{q:g}")
+                lines.append(f"{recent_name}{labels} {_quantile(recent, q):.6f}")
+            labels = format_labels(self.label_names, values)
+            lines.append(f"{recent_name}_sum{labels} {total:.6f}")
+            lines.append(f"{recent_name}_count{labels} {count}")
+        return lines
+
+
+def _quantile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyTracker:
+    """Sliding window of latency samples (e.g. time to first token, send delay)."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-quantile (0-1) of the window, or None without samples."""
+        with self.lock:
+            ordered = sorted(self.samples)
+        return _quantile(ordered, q)
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values: Dict[LabelValues, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = list(self.values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in values:
+            lines.append(f"{self.name}{format_labels(self.label_names, label_values)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """Gauge read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[LabelValues, Optional[float]]]],
+    ):
+        """
+        Initialize gauge.
+
+        Args:
+            name: Metric name
+            help_text: Description shown by Prometheus
+            label_names: Names of the labels of each reported value
+            callback: Returns (label_values, value) pairs; None values are skipped
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            values = list(self.callback())
+        except Exception as e:
+            logger.warning(f"Could not read gauge {self.name}: {e}")
+            return lines
+        for label_values, value in values:
+            if value is not None:
+                labels = format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}{labels} {value:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics of the process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory: Callable[[], object]):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = factory()
+            return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """The histogram called name, created on first use."""
+        return self._get_or_create(
+            name, lambda: Histogram(name, help_text, label_names, buckets)
+        )
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        """The counter called name, created on first use."""
+        return self._get_or_create(name, lambda: Counter(name, help_text, label_names))
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[LabelValues, Optional[float]]]],
+    ) -> Gauge:
+        """Register (or replace) a callback gauge."""
+        gauge = Gauge(name, help_text, label_names, callback)
+        with self.lock:
+            self.metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """The process-wide metrics registry."""
+    return _registry
+
+
+# Latency of each stage of a turn, per provider and model
+STAGE_SECONDS = _registry.histogram(
+    "voice_stage_seconds",
+    "Latency of a turn stage",
+    ("stage", "provider", "model"),
+)
+STAGE_ERRORS = _registry.counter(
+    "voice_stage_errors_total",
+    "Turn stages that raised",
+    ("stage", "provider", "model"),
+)
+# Time from queueing to handing a packet to gRPC (send), and from the
+# sender's timestamp to arrival (receive; includes any clock skew)
+TRANSPORT_SECONDS = _registry.histogram(
+    "grpc_packet_seconds",
+    "Latency of packets through the backend relay",
+    ("direction", "payload"),
+)
+# Time provider requests wait for a scheduler slot, and 429s that cut a key's concurrency
+QUEUE_WAIT_SECONDS = _registry.histogram(
+    "provider_queue_wait_seconds",
+    "Time a provider request waited in its API key's queue",
+    ("scheduler", "priority"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+RATE_LIMITED = _registry.counter(
+    "provider_rate_limited_total",
+    "Provider responses with HTTP 429",
+    ("scheduler",),
+)
+
+
+def provider_labels(provider) -> Tuple[str, str]:
+    """(provider, model) labels of a provider, looking through wrappers."""
+    if provider is None:
+        return "", ""
+    # Cache, thread and blocking wrappers keep the real provider in .provider
+    while hasattr(provider, "provider"):
+        provider = provider.provider
+    if hasattr(provider, "states"):
+        return "hedged", "+".join(state.name for state in provider.states)
+    return type(provider).__name__, str(getattr(provider, "model", ""))
+
+
+class Trace:
+    """Stage timings of one turn, identified by the packet_id that started it."""
+
+    __slots__ = ("trace_id", "started", "stages")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started = time.monotonic()
+        self.stages: List[Tuple[str, float]] = []
+
+    def record(self, stage: str, seconds: float):
+        self.stages.append((stage, seconds))
+
+    def summary(self) -> str:
+        stages = " ".join(f"{stage}={seconds:.3f}s" for stage, seconds in self.stages)
+        return f"{stages} total={time.monotonic() - self.started:.3f}s"
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def trace(trace_id: str):
+    """
+    Attribute the stages recorded in this context to a turn.
+
+    Asyncio tasks and asyncio.to_thread calls started inside inherit the
+    trace. A summary line is logged if any stage was recorded.
+    """
+    current = Trace(trace_id)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+        if current.stages:
+            logger.info(f"Trace {trace_id}: {current.summary()}")
+
+
+def current_trace_id() -> Optional[str]:
+    """ID of the trace of the current context, if any."""
+    current = _current_trace.get()
+    return current.trace_id if current is not None else None
+
+
+def record_stage(stage: str, seconds: float, provider=None):
+    """Record a stage's latency in the histogram and the current trace."""
+    STAGE_SECONDS.observe(seconds, stage, *provider_labels(provider))
+    current = _current_trace.get()
+    if current is not None:
+        current.record(stage, seconds)
+        logger.debug(f"[{current.trace_id}] {stage} took {seconds:.3f}s")
+
+
+@contextmanager
+def span(stage: str, provider=None):
+    """Time a block as one stage; failures are counted instead of timed."""
+    started = time.monotonic()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage, *provider_labels(provider))
+        raise
+    record_stage(stage, time.monotonic() - started, provider)
+
+
+class StreamTimer:
+    """
+    Times a streamed stage.
+
+    Records <stage>_first when the first item arrives and <stage> once the
+    stream is done; streams that are cut short are recorded by neither.
+    """
+
+    __slots__ = ("stage", "provider", "started", "first")
+
+    def __init__(self, stage: str, provider=None):
+        self.stage = stage
+        self.provider = provider
+        self.started = time.monotonic()
+        self.first = True
+
+    def item(self):
+        """Mark an item of the stream (only the first one is timed)."""
+        if self.first:
+            self.first = False
+            record_stage(f"{self.stage}_first", time.monotonic() - self.started, self.provider)
+
+    def done(self):
+        record_stage(self.stage, time.monotonic() - self.started, self.provider)
+
+    def failed(self):
+        STAGE_ERRORS.inc(self.stage, *provider_labels(self.provider))
+
+
+def record_transport(direction: str, packet, seconds: float):
+    """Record the latency of a packet sent or received through gRPC."""
+    TRANSPORT_SECONDS.observe(seconds, direction, packet.WhichOneof("payload") or "none")
+
+
+class MetricsServer:
+    """Serves the registry at /metrics from a daemon thread."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None):
+        """
+        Initialize metrics server.
+
+        Args:
+            port: TCP port to listen on
+            host: Interface to bind (loopback by default)
+            registry: Metrics to serve (default: the process-wide registry)
+        """
+        registry = registry or get_metrics()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="metrics", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+        host, port = self.server.server_address[:2]
+        logger.info(f"Serving metrics at http://{host}:{port}/metrics")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,151 @@
+"""Startup profiling: import-time breakdown of the desktop entry point."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Set in the environment of the process being profiled
+PROFILE_ENV = "DESKTOP_PROFILE_STARTUP"
+
+# Prefix of the line the profiled process prints its phase timings on
+PHASES_MARKER = "startup-phases:"
+
+# Written to stderr between the imports needed to be ready and later ones
+READY_MARKER = "startup-ready"
+
+
+@dataclass
+class ImportRecord:
+    """One line of python -X importtime output (times in microseconds)."""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> Tuple[List[ImportRecord], List[ImportRecord]]:
+    """
+    Parse the stderr of python -X importtime, skipping anything else.
+
+    Returns:
+        Imports before READY_MARKER and imports after it
+    """
+    records: List[ImportRecord] = []
+    before: Optional[List[ImportRecord]] = None
+    for line in output.splitlines():
+        if line == READY_MARKER:
+            before, records = records, []
+            continue
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(fields[0]), int(fields[1]), depth))
+    if before is None:
+        return records, []
+    return before, records
+
+
+def in_profiled_process() -> bool:
+    """Whether this process is the one profile_startup launched."""
+    return os.environ.get(PROFILE_ENV) == "1"
+
+
+def mark_ready():
+    """Mark where the profiled process is ready; later imports are off the budget."""
+    print(READY_MARKER, file=sys.stderr, flush=True)
+
+
+def report_phases(phases: Dict[str, float]):
+    """Hand phase timings (seconds) from the profiled process to profile_startup."""
+    print(f"{PHASES_MARKER} {json.dumps(phases)}", flush=True)
+
+
+def profile_startup(
+    script: Path,
+    args: Sequence[str] = (),
+    budget: float = 0.5,
+    top: int = 15,
+) -> int:
+    """
+    Start the entry point under python -X importtime and report where startup goes.
+
+    The script is expected to initialize as usual, call mark_ready once it
+    could serve, do its background startup work, call report_phases and
+    exit when in_profiled_process() is true.
+
+    Args:
+        script: Entry point to profile
+        args: Its command line arguments
+        budget: Seconds the imports before mark_ready may take
+        top: Rows of each table
+
+    Returns:
+        Exit status: 0 within budget, 1 over budget or when startup failed
+    """
+    env = dict(os.environ, **{PROFILE_ENV: "1"})
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(script), *args],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+
+    phases: Optional[Dict[str, float]] = None
+    for line in result.stdout.splitlines():
+        if line.startswith(PHASES_MARKER):
+            phases = json.loads(line[len(PHASES_MARKER):])
+    if result.returncode != 0 or phases is None:
+        print(f"Startup failed (exit status {result.returncode}):", file=sys.stderr)
+        print(result.stdout[-2000:], file=sys.stderr)
+        return 1
+
+    ready, background = parse_importtime(result.stderr)
+    ready_total = import_seconds(ready)
+
+    print(f"Process run: {wall:.3f}s (includes -X importtime overhead)")
+    for name, seconds in phases.items():
+        print(f"  {name:<28}{seconds:8.3f}s")
+    print(f"Imports until ready: {ready_total:.3f}s of budget {budget:.3f}s")
+    print_imports(ready, top)
+    if background:
+        print(f"\nImports after ready (background): {import_seconds(background):.3f}s")
+        print_imports(background, top)
+
+    if ready_total > budget:
+        print(f"\nOver budget by {ready_total - budget:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+def import_seconds(records: List[ImportRecord]) -> float:
+    """Total import time: the cumulative times of imports at the top of a chain."""
+    return sum(record.cumulative_us for record in records if record.depth == 0) / 1e6
+
+
+def print_imports(records: List[ImportRecord], top: int):
+    """Print self time by top-level package and the costliest import chains."""
+    by_package: Dict[str, int] = defaultdict(int)
+    for record in records:
+        by_package[record.name.split(".")[0]] += record.self_us
+    # Imports at the top of a chain: what the app itself asked for
+    roots = [record for record in records if record.depth == 0]
+
+    print("  By package (self time):")
+    for name, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"    {name:<28}{self_us / 1e3:8.1f}ms")
+    print("  Top-level imports (cumulative):")
+    for record in sorted(roots, key=lambda record: -record.cumulative_us)[:top]:
+        print(f"    {record.name:<28}{record.cumulative_us / 1e3:8.1f}ms")
@@ -0,0 +1,6 @@
+"""Make the desktop sources importable as they are when running main.py."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
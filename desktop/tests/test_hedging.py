@@ -0,0 +1,145 @@
+"""Circuit breaker bookkeeping of hedged LLM requests."""
+
+import asyncio
+import time
+
+import pytest
+
+from ai.deadline import Deadline, DeadlineExceeded
+from ai.hedging import AsyncHedgedLLM, CircuitBreaker, HedgedLLM
+from ai.llm import AsyncLLMProvider, LLMProvider, Message
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+class FakeLLM(LLMProvider):
+    """Streams deltas after a delay, or fails."""
+
+    def __init__(self, model, deltas=("a", "b"), delay=0.0, error=None):
+        self.model = model
+        self.deltas = deltas
+        self.delay = delay
+        self.error = error
+
+    def generate_response(self, messages, system_prompt=None, deadline=None):
+        return "".join(self.generate_response_stream(messages, system_prompt, deadline))
+
+    def generate_response_stream(self, messages, system_prompt=None, deadline=None):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        yield from self.deltas
+
+
+class AsyncFakeLLM(AsyncLLMProvider):
+    """Async counterpart of FakeLLM."""
+
+    def __init__(self, model, deltas=("a", "b"), delay=0.0, error=None):
+        self.model = model
+        self.deltas = deltas
+        self.delay = delay
+        self.error = error
+
+    async def generate_response(self, messages, system_prompt=None, deadline=None):
+        return "".join([d async for d in self.generate_response_stream(messages)])
+
+    async def generate_response_stream(self, messages, system_prompt=None, deadline=None):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        for delta in self.deltas:
+            yield delta
+
+
+def half_open(breaker: CircuitBreaker):
+    """Open the circuit and let its reset timeout pass, so the next request probes."""
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def hedged(*providers, cls=HedgedLLM):
+    return cls(providers, max_hedge_delay=0.05, min_hedge_delay=0.05, reset_timeout=10.0)
+
+
+def breakers(llm):
+    return [state.breaker for state in llm.states]
+
+
+def test_probe_that_wins_closes_circuit():
+    llm = hedged(FakeLLM("primary"), FakeLLM("fallback"))
+    primary, _ = breakers(llm)
+    half_open(primary)
+
+    assert llm.generate_response(MESSAGES) == "ab"
+    assert primary.state == CircuitBreaker.CLOSED
+    assert primary.allow()
+
+
+def test_probe_that_loses_the_race_is_released():
+    llm = hedged(FakeLLM("primary", delay=0.3), FakeLLM("fallback"))
+    primary, _ = breakers(llm)
+    half_open(primary)
+
+    assert llm.generate_response(MESSAGES) == "ab"
+    assert primary.state == CircuitBreaker.HALF_OPEN
+    assert primary.allow()
+
+
+def test_probe_that_fails_reopens_circuit_and_falls_back():
+    llm = hedged(FakeLLM("primary", error=RuntimeError("down")), FakeLLM("fallback"))
+    primary, fallback = breakers(llm)
+    half_open(primary)
+
+    assert llm.generate_response(MESSAGES) == "ab"
+    assert primary.state == CircuitBreaker.OPEN
+    assert fallback.state == CircuitBreaker.CLOSED
+
+
+def test_probe_is_released_when_consumer_stops_mid_stream():
+    llm = hedged(FakeLLM("primary"), FakeLLM("fallback"))
+    primary, _ = breakers(llm)
+    half_open(primary)
+
+    stream = llm.generate_response_stream(MESSAGES)
+    assert next(stream) == "a"
+    stream.close()
+
+    assert primary.allow()
+
+
+def test_probe_is_released_when_deadline_expires():
+    llm = hedged(FakeLLM("primary", delay=0.5))
+    (primary,) = breakers(llm)
+    half_open(primary)
+
+    with pytest.raises(DeadlineExceeded):
+        llm.generate_response(MESSAGES, deadline=Deadline(0.1))
+
+    assert primary.allow()
+
+
+def test_async_probe_is_released_when_consumer_stops_mid_stream():
+    async def run():
+        llm = hedged(AsyncFakeLLM("primary"), AsyncFakeLLM("fallback"), cls=AsyncHedgedLLM)
+        primary, _ = breakers(llm)
+        half_open(primary)
+
+        stream = llm.generate_response_stream(MESSAGES)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        return primary
+
+    assert asyncio.run(run()).allow()
+
+
+def test_async_probe_is_released_when_deadline_expires():
+    async def run():
+        llm = hedged(AsyncFakeLLM("primary", delay=0.5), cls=AsyncHedgedLLM)
+        (primary,) = breakers(llm)
+        half_open(primary)
+        with pytest.raises(DeadlineExceeded):
+            await llm.generate_response(MESSAGES, deadline=Deadline(0.1))
+        return primary
+
+    assert asyncio.run(run()).allow()
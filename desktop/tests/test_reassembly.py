@@ -0,0 +1,59 @@
+"""Ordering, dedup and memory bounds of ReassemblyBuffer."""
+
+from audio.reassembly import ReassemblyBuffer
+
+
+def add(buffer, index, data=b"ab", is_final=False, session="s", packet_id=None):
+    released = buffer.add(session, packet_id or f"{session}-{index}", index, data, is_final)
+    return [(bytes(chunk), final) for chunk, final in released]
+
+
+def test_out_of_order_chunks_are_released_in_order():
+    buffer = ReassemblyBuffer()
+    assert add(buffer, 1, b"1") == []
+    assert add(buffer, 0, b"0") == [(b"0", False), (b"1", False)]
+    assert add(buffer, 2, b"2", is_final=True) == [(b"2", True)]
+    assert "s" not in buffer.utterances
+
+
+def test_retransmission_of_accepted_chunk_is_dropped():
+    buffer = ReassemblyBuffer()
+    assert add(buffer, 1, b"1") == []
+    assert add(buffer, 1, b"1") == []
+    assert add(buffer, 0, b"0") == [(b"0", False), (b"1", False)]
+
+
+def test_retransmission_of_chunk_rejected_as_too_far_ahead_is_accepted():
+    buffer = ReassemblyBuffer(max_gap=2)
+    assert add(buffer, 5, b"5") == []  # too far ahead of 0: rejected
+    for index in range(5):
+        assert add(buffer, index, bytes([48 + index])) == [(bytes([48 + index]), False)]
+
+    assert add(buffer, 5, b"5") == [(b"5", False)]
+    assert buffer.utterances["s"].next_index == 6
+
+
+def test_utterance_over_session_budget_is_discarded_until_final():
+    expired = []
+    buffer = ReassemblyBuffer(max_session_bytes=4, on_expire=expired.append)
+    assert add(buffer, 0, b"abc") == [(b"abc", False)]
+    assert add(buffer, 1, b"de") == []
+    assert expired == ["s"]
+    assert buffer.total_bytes == 0
+
+    assert add(buffer, 2, b"f") == []
+    assert add(buffer, 3, b"g", is_final=True) == []
+    assert "s" not in buffer.utterances
+    # The next utterance starts afresh
+    assert add(buffer, 0, b"h", packet_id="next") == [(b"h", False)]
+
+
+def test_global_budget_evicts_least_recently_active_utterance():
+    expired = []
+    buffer = ReassemblyBuffer(max_total_bytes=6, on_expire=expired.append)
+    add(buffer, 0, b"aaaa", session="old")
+    add(buffer, 0, b"bbbb", session="new")
+
+    assert expired == ["old"]
+    assert buffer.utterances["old"].dropped
+    assert buffer.total_bytes == 4